@@ -25,18 +25,98 @@ class Settings:
         self.kakao_client_id = os.getenv("KAKAO_CLIENT_ID", "").strip()
         self.kakao_client_secret = os.getenv("KAKAO_CLIENT_SECRET", "").strip()
         self.kakao_redirect_uri = os.getenv("KAKAO_REDIRECT_URI", "").strip()
+        self.kakao_auth_base = os.getenv("KAKAO_AUTH_BASE", "https://kauth.kakao.com").strip().rstrip("/")
+        self.kakao_api_base = os.getenv("KAKAO_API_BASE", "https://kapi.kakao.com").strip().rstrip("/")
+        self.kakao_http2 = os.getenv("KAKAO_HTTP2", "true").strip().lower() in ("1", "true", "yes")
+        self.kakao_max_connections = int(os.getenv("KAKAO_MAX_CONNECTIONS", "50"))
+        self.kakao_max_keepalive = int(os.getenv("KAKAO_MAX_KEEPALIVE", "20"))
+        self.kakao_rate_per_second = float(os.getenv("KAKAO_RATE_PER_SECOND", "20"))
+        self.kakao_rate_burst = int(os.getenv("KAKAO_RATE_BURST", "40"))
+        # Kakao accepts at most 5 receiver_uuids per friend-message call.
+        self.kakao_message_recipients_per_call = int(os.getenv("KAKAO_MESSAGE_RECIPIENTS_PER_CALL", "5"))
+        self.kakao_fanout_concurrency = int(os.getenv("KAKAO_FANOUT_CONCURRENCY", "4"))
+        self.kakao_max_retries = int(os.getenv("KAKAO_MAX_RETRIES", "3"))
         self.base_url = os.getenv("NEXT_PUBLIC_BASE_URL", "http://localhost:3000").strip()
         self.pinecone_api_key = os.getenv("PINECONE_API_KEY", "").strip()
         self.pinecone_environment = os.getenv("PINECONE_ENVIRONMENT", "").strip()
         self.pinecone_index = os.getenv("PINECONE_INDEX", "members").strip()
         self.app_secret = os.getenv("APP_SECRET", "dev-secret-change-me").strip()
         self.session_ttl_seconds = int(os.getenv("SESSION_TTL_SECONDS", "604800"))
+        self.session_cache_size = int(os.getenv("SESSION_CACHE_SIZE", "4096"))
         self.admin_ids: List[str] = [
             admin.strip()
             for admin in os.getenv("ADMIN_KAKAO_IDS", "").split(",")
             if admin.strip()
         ]
         self.embedding_model = os.getenv("OPENAI_EMBED_MODEL", "text-embedding-3-large").strip()
+        self.embedding_dimension = int(os.getenv("EMBEDDING_DIMENSION", "3072"))
+        # "pinecone" or "pgvector" (member_embeddings table on DATABASE_URL)
+        self.vector_backend = os.getenv("VECTOR_BACKEND", "pinecone").strip().lower()
+        # "postgrest" (supabase client) or "postgres" (direct asyncpg pool on DATABASE_URL)
+        self.storage_backend = os.getenv("STORAGE_BACKEND", "postgrest").strip().lower()
+        self.database_url = os.getenv("DATABASE_URL", "").strip()
+        self.database_pool_min_size = int(os.getenv("DATABASE_POOL_MIN_SIZE", "1"))
+        self.database_pool_max_size = int(os.getenv("DATABASE_POOL_MAX_SIZE", "10"))
+        # Set to 0 behind a transaction-mode pooler (pgbouncer) that cannot keep prepared statements.
+        self.database_statement_cache_size = int(os.getenv("DATABASE_STATEMENT_CACHE_SIZE", "100"))
+        self.profile_cache_size = int(os.getenv("PROFILE_CACHE_SIZE", "2048"))
+        self.profile_cache_ttl_seconds = int(os.getenv("PROFILE_CACHE_TTL_SECONDS", "30"))
+        self.role_reasoning_cache_size = int(os.getenv("ROLE_REASONING_CACHE_SIZE", "1024"))
+        self.role_reasoning_cache_ttl_seconds = int(os.getenv("ROLE_REASONING_CACHE_TTL_SECONDS", "21600"))
+        self.embedding_cache_size = int(os.getenv("EMBEDDING_CACHE_SIZE", "2048"))
+        # Latency budgets (seconds) for the embed -> vector -> job lookup -> LLM
+        # role chain; each stage is capped and the LLM gets what is left.
+        self.role_assignment_budget_seconds = float(os.getenv("ROLE_ASSIGNMENT_BUDGET_SECONDS", "10"))
+        self.mafbti_budget_seconds = float(os.getenv("MAFBTI_BUDGET_SECONDS", "8"))
+        self.role_embed_timeout_seconds = float(os.getenv("ROLE_EMBED_TIMEOUT_SECONDS", "3"))
+        self.role_vector_timeout_seconds = float(os.getenv("ROLE_VECTOR_TIMEOUT_SECONDS", "2"))
+        self.role_job_lookup_timeout_seconds = float(os.getenv("ROLE_JOB_LOOKUP_TIMEOUT_SECONDS", "1.5"))
+        # At this many concurrent role requests the lexical classifier answers
+        # alone (no embedding, vector or LLM calls); 0 makes it always first.
+        self.role_overload_inflight = int(os.getenv("ROLE_OVERLOAD_INFLIGHT", "32"))
+        # /search-profiles answers from the local BM25 index alone for queries
+        # up to this many characters, or single words up to the second limit.
+        self.search_keyword_max_chars = int(os.getenv("SEARCH_KEYWORD_MAX_CHARS", "4"))
+        self.search_keyword_max_word_chars = int(os.getenv("SEARCH_KEYWORD_MAX_WORD_CHARS", "8"))
+        self.vector_overfetch_max = int(os.getenv("VECTOR_OVERFETCH_MAX", "200"))
+        # "two_stage": shortened in-memory candidates re-ranked with full-size vectors.
+        self.vector_retrieval_mode = os.getenv("VECTOR_RETRIEVAL_MODE", "full").lower()
+        self.compact_embedding_dimensions = int(os.getenv("COMPACT_EMBEDDING_DIMENSIONS", "256"))
+        self.rerank_candidates = int(os.getenv("RERANK_CANDIDATES", "50"))
+        # Element type of in-process vector copies: float32, float16 or int8.
+        self.vector_store_dtype = os.getenv("VECTOR_STORE_DTYPE", "float32").lower()
+        self.data_dir = Path(os.getenv("DATA_DIR", str(Path(__file__).resolve().parents[1] / "data")))
+        self.intro_library_path = os.getenv("INTRO_LIBRARY_PATH", str(self.data_dir / "intro_library.json"))
+        self.intro_prefetch_ttl_seconds = int(os.getenv("INTRO_PREFETCH_TTL_SECONDS", "300"))
+        self.role_assignments_path = os.getenv("ROLE_ASSIGNMENTS_PATH", str(self.data_dir / "role_assignments.jsonl"))
+        # Distilled role assignments kept for the lexical classifier (oldest dropped first).
+        self.role_assignments_max = int(os.getenv("ROLE_ASSIGNMENTS_MAX", "5000"))
+        self.interest_vocabulary_path = os.getenv("INTEREST_VOCABULARY_PATH", str(self.data_dir / "interest_vocabulary.npz"))
+        self.vector_snapshot_dir = Path(os.getenv("VECTOR_SNAPSHOT_DIR", str(self.data_dir / "vector_snapshots")))
+        # How often each worker publishes its pending vector changes and
+        # picks up snapshots published by other workers; 0 disables snapshots.
+        self.vector_snapshot_check_seconds = float(os.getenv("VECTOR_SNAPSHOT_CHECK_SECONDS", "5"))
+        # auto | notify | poll | local (see app/invalidation.py).
+        self.invalidation_bus = os.getenv("INVALIDATION_BUS", "auto").strip().lower()
+        self.invalidation_poll_seconds = float(os.getenv("INVALIDATION_POLL_SECONDS", "1"))
+        self.vector_write_batch_size = int(os.getenv("VECTOR_WRITE_BATCH_SIZE", "25"))
+        self.vector_write_flush_seconds = float(os.getenv("VECTOR_WRITE_FLUSH_SECONDS", "0.5"))
+        self.vector_write_max_attempts = int(os.getenv("VECTOR_WRITE_MAX_ATTEMPTS", "4"))
+        self.vector_write_failure_log = os.getenv("VECTOR_WRITE_FAILURE_LOG", str(self.data_dir / "vector_write_failures.jsonl"))
+        # Supabase vs vector index drift check + repair interval; 0 disables the schedule.
+        self.drift_reconcile_seconds = float(os.getenv("DRIFT_RECONCILE_SECONDS", "3600"))
+        # Orphan deletes above this share of a namespace need confirm_deletes.
+        self.drift_max_delete_fraction = float(os.getenv("DRIFT_MAX_DELETE_FRACTION", "0.05"))
+        self.session_revocations_path = os.getenv("SESSION_REVOCATIONS_PATH", str(self.data_dir / "session_revocations.json"))
+        self.kakao_blasts_dir = Path(os.getenv("KAKAO_BLASTS_DIR", str(self.data_dir / "kakao_blasts")))
+        self.reembed_jobs_dir = Path(os.getenv("REEMBED_JOBS_DIR", str(self.data_dir / "reembed_jobs")))
+        self.reembed_batch_size = int(os.getenv("REEMBED_BATCH_SIZE", "50"))
+        self.reembed_concurrency = int(os.getenv("REEMBED_CONCURRENCY", "2"))
+        # USD per 1M input tokens of OPENAI_EMBED_MODEL, for dry-run cost estimates.
+        self.embedding_price_per_million_tokens = float(os.getenv("EMBEDDING_PRICE_PER_MILLION_TOKENS", "0.13"))
+        # Re-read mafia42_jobs for edits made outside /admin/embed-jobs; 0 disables.
+        self.job_catalog_refresh_seconds = float(os.getenv("JOB_CATALOG_REFRESH_SECONDS", "300"))
+        self.participant_count_reconcile_seconds = int(os.getenv("PARTICIPANT_COUNT_RECONCILE_SECONDS", "300"))
 
         # Debug Kakao Config (Masked)
         if self.kakao_client_id:
@@ -0,0 +1,36 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class Deadline:
+    """Latency budget for one request, shared by every stage it calls.
+
+    Each stage asks for at most its own cap but never more than what is left
+    of the request budget, and raises asyncio.TimeoutError when it runs out
+    so the caller can switch to that stage's degraded path.
+    """
+
+    def __init__(self, budget: float) -> None:
+        self.budget = budget
+        self.expires_at = time.monotonic() + budget
+
+    def remaining(self, cap: Optional[float] = None) -> float:
+        left = max(0.0, self.expires_at - time.monotonic())
+        return left if cap is None else min(cap, left)
+
+    async def wait(self, awaitable: Awaitable[T],
+                   cap: Optional[float] = None) -> T:
+        timeout = self.remaining(cap)
+        if timeout <= 0:
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            raise asyncio.TimeoutError()
+        return await asyncio.wait_for(awaitable, timeout)
+
+    async def call(self, func: Callable[..., T], *args: Any,
+                   cap: Optional[float] = None, **kwargs: Any) -> T:
+        """Run a blocking call in a worker thread within the budget."""
+        return await self.wait(asyncio.to_thread(func, *args, **kwargs), cap)
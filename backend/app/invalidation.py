@@ -0,0 +1,242 @@
+import json
+import logging
+import os
+import secrets
+import socket
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from .postgres import PostgresPool
+
+logger = logging.getLogger("farewell-party.invalidation")
+
+Handler = Callable[[str, Optional[str]], None]
+
+
+class InvalidationBus:
+    """Cross-worker cache invalidation: writes publish (entity, id, version) events.
+
+    Transports, picked by INVALIDATION_BUS (default "auto", in this order):
+    - "notify": Postgres LISTEN/NOTIFY on CHANNEL, one dedicated asyncpg
+      connection per worker (needs DATABASE_URL; not through a
+      transaction-mode pooler).
+    - "poll": rows in a `cache_invalidations` table read through Supabase
+      every INVALIDATION_POLL_SECONDS, for deployments without NOTIFY.
+    - "local": in-process delivery only, for a single worker.
+    Writers evict their own caches synchronously and publish; the send runs
+    on a background thread, in order, so a profile write never waits on the
+    transport. Every other worker runs the handlers registered for the
+    entity. A worker skips its own events, except `ping`, which measures
+    the round trip. Events sent while a worker's LISTEN connection was down
+    are lost to it, so after reconnecting it runs the on_resync() handlers,
+    which drop or rebuild whatever those events could have touched.
+    """
+
+    CHANNEL = "cache_invalidation"
+    TABLE = "cache_invalidations"
+    LAG_SAMPLES = 256
+    PRUNE_EVERY = 600
+    RETAIN_SECONDS = 3600
+
+    def __init__(self, mode: str, pool: Optional[PostgresPool],
+                 supabase_client: Any, poll_seconds: float) -> None:
+        self.requested_mode = mode
+        self.pool = pool
+        self.supabase = supabase_client
+        self.poll_seconds = max(0.1, poll_seconds)
+        self.origin = f"{socket.gethostname()}:{os.getpid()}:{secrets.token_hex(3)}"
+        self.mode = "local"
+        self._handlers: Dict[str, List[Handler]] = {}
+        self._resync_handlers: List[Callable[[], None]] = []
+        self._executor = ThreadPoolExecutor(max_workers=1,
+                                            thread_name_prefix="invalidation")
+        self._publisher = ThreadPoolExecutor(max_workers=1,
+                                             thread_name_prefix="invalidation-publish")
+        self._connection: Any = None
+        self._last_seq: Optional[int] = None
+        self._polls = 0
+        self._started = False
+        self._stop = threading.Event()
+        self._pings: Dict[str, threading.Event] = {}
+        self._lags: Deque[float] = deque(maxlen=self.LAG_SAMPLES)
+        # Bumped from the publisher, delivery and watch threads.
+        self.counters = {"published": 0, "received": 0, "applied": 0,
+                         "own_skipped": 0, "errors": 0, "resyncs": 0}
+        self._counters_lock = threading.Lock()
+
+    def _count(self, name: str) -> None:
+        with self._counters_lock:
+            self.counters[name] += 1
+
+    def on(self, entity: str, handler: Handler) -> None:
+        self._handlers.setdefault(entity, []).append(handler)
+
+    def on_resync(self, handler: Callable[[], None]) -> None:
+        """Run `handler` after events may have been missed (LISTEN reconnect)."""
+        self._resync_handlers.append(handler)
+
+    def start(self) -> None:
+        if self._started:
+            return
+        self._started = True
+        mode = self.requested_mode
+        if mode in ("auto", "notify") and self.pool:
+            try:
+                self._connection = self.pool.listen(self.CHANNEL, self._receive)
+                self.mode = "notify"
+            except Exception as e:
+                logger.error(f"LISTEN {self.CHANNEL} failed, falling back: {e}")
+        if self.mode == "local" and mode in ("auto", "notify", "poll") and self.supabase:
+            self._last_seq = self._max_seq()
+            if self._last_seq is not None:
+                self.mode = "poll"
+        if self.mode != "local":
+            threading.Thread(target=self._watch, name="invalidation-watch",
+                             daemon=True).start()
+        logger.info("Invalidation bus: %s (origin %s)", self.mode, self.origin)
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._publisher.shutdown(wait=True)
+
+    def publish(self, entity: str, entity_id: str,
+                version: Optional[str] = None) -> None:
+        """Queue an event for the other workers; returns without waiting on the transport."""
+        event = {"entity": entity, "id": str(entity_id),
+                 "version": version, "origin": self.origin,
+                 "sent_at": time.time()}
+        try:
+            self._publisher.submit(self._send, event)
+        except RuntimeError:
+            # Shutting down: nobody is left to tell.
+            pass
+
+    def _send(self, event: Dict[str, Any]) -> None:
+        entity, version = event["entity"], event["version"]
+        self._count("published")
+        try:
+            if self.mode == "notify":
+                self.pool.execute("SELECT pg_notify($1, $2)", self.CHANNEL,
+                                  json.dumps(event, ensure_ascii=False))
+            elif self.mode == "poll":
+                self.supabase.table(self.TABLE).insert({
+                    "entity": entity, "entity_id": event["id"],
+                    "version": version, "origin": self.origin,
+                    "sent_at": event["sent_at"]}).execute()
+            elif entity == "ping":
+                self._receive(json.dumps(event))
+        except Exception as e:
+            self._count("errors")
+            logger.error(f"Error publishing {entity} invalidation: {e}")
+
+    def ping(self, timeout: float = 5.0) -> Optional[float]:
+        """Publish a ping and block until it comes back; returns the lag in ms."""
+        token = secrets.token_hex(8)
+        arrived = self._pings[token] = threading.Event()
+        started = time.perf_counter()
+        try:
+            self.publish("ping", token)
+            if not arrived.wait(timeout):
+                return None
+            return round((time.perf_counter() - started) * 1000, 2)
+        finally:
+            self._pings.pop(token, None)
+
+    def _receive(self, payload: str) -> None:
+        # Runs on the Postgres loop (notify) or the watch thread (poll);
+        # handlers may block or use the pool, so hand them to the executor.
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            self._count("errors")
+            return
+        self._executor.submit(self._deliver, event)
+
+    def _deliver(self, event: Dict[str, Any]) -> None:
+        self._count("received")
+        sent_at = event.get("sent_at")
+        if sent_at:
+            self._lags.append(max(0.0, time.time() - float(sent_at)) * 1000)
+        entity = event.get("entity")
+        if entity == "ping":
+            arrived = self._pings.get(event.get("id"))
+            if arrived:
+                arrived.set()
+            return
+        if event.get("origin") == self.origin:
+            self._count("own_skipped")
+            return
+        for handler in self._handlers.get(entity, []):
+            try:
+                handler(event.get("id"), event.get("version"))
+                self._count("applied")
+            except Exception as e:
+                self._count("errors")
+                logger.error(f"Invalidation handler for {entity} failed: {e}")
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                if self.mode == "notify":
+                    if self._connection is None or self._connection.is_closed():
+                        logger.warning("LISTEN connection lost; reconnecting.")
+                        self._connection = self.pool.listen(self.CHANNEL, self._receive)
+                        self._executor.submit(self._resync)
+                else:
+                    self._poll()
+            except Exception as e:
+                self._count("errors")
+                logger.error(f"Invalidation bus {self.mode} error: {e}")
+
+    def _resync(self) -> None:
+        # Runs on the delivery executor, after any events queued before it.
+        self._count("resyncs")
+        for handler in self._resync_handlers:
+            try:
+                handler()
+            except Exception as e:
+                self._count("errors")
+                logger.error(f"Invalidation resync handler failed: {e}")
+
+    def _max_seq(self) -> Optional[int]:
+        try:
+            result = self.supabase.table(self.TABLE).select("seq").order(
+                "seq", desc=True).limit(1).execute()
+            return result.data[0]["seq"] if result.data else 0
+        except Exception as e:
+            logger.warning(f"{self.TABLE} table unavailable; invalidation stays local: {e}")
+            return None
+
+    def _poll(self) -> None:
+        self._polls += 1
+        if self._polls % self.PRUNE_EVERY == 0:
+            self.supabase.table(self.TABLE).delete().lt(
+                "sent_at", time.time() - self.RETAIN_SECONDS).execute()
+        result = self.supabase.table(self.TABLE).select("*").gt(
+            "seq", self._last_seq).order("seq").limit(500).execute()
+        for row in result.data or []:
+            self._last_seq = max(self._last_seq, row["seq"])
+            self._receive(json.dumps({
+                "entity": row.get("entity"), "id": row.get("entity_id"),
+                "version": row.get("version"), "origin": row.get("origin"),
+                "sent_at": row.get("sent_at")}))
+
+    def stats(self) -> Dict[str, Any]:
+        lags = sorted(self._lags)
+
+        def pct(q: float) -> Optional[float]:
+            return round(lags[min(len(lags) - 1, int(q * len(lags)))], 2) if lags else None
+
+        with self._counters_lock:
+            counters = dict(self.counters)
+        return {
+            "mode": self.mode,
+            "origin": self.origin,
+            **counters,
+            "handlers": {entity: len(h) for entity, h in self._handlers.items()},
+            "lag_ms": {"samples": len(lags), "p50": pct(0.5), "p95": pct(0.95),
+                       "max": round(lags[-1], 2) if lags else None},
+        }
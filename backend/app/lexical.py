@@ -0,0 +1,252 @@
+import math
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def normalize_text(text: str) -> str:
+    return " ".join((text or "").lower().split())
+
+
+def char_ngrams(text: str, sizes: Sequence[int] = (2, 3)) -> List[str]:
+    """Character n-grams inside word boundaries (like sklearn's char_wb).
+
+    Korean has no cheap tokenizer here, and particles glue onto nouns
+    ("개발자는", "개발을"), so overlapping syllable n-grams match far better
+    than whitespace tokens. Each word is padded with spaces so short words
+    such as "AI" or "롤" still produce n-grams.
+    """
+    grams: List[str] = []
+    for word in normalize_text(text).split():
+        padded = f" {word} "
+        for n in sizes:
+            if len(padded) < n:
+                continue
+            grams.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+    return grams
+
+
+class NgramTfidf:
+    """Sublinear-tf, smoothed-idf TF-IDF over char_ngrams(), L2-normalized."""
+
+    def __init__(self, sizes: Sequence[int] = (2, 3)) -> None:
+        self.sizes = tuple(sizes)
+        self.vocabulary: Dict[str, int] = {}
+        self.idf = np.zeros(0, dtype=np.float32)
+
+    def fit(self, docs: Sequence[str]) -> "NgramTfidf":
+        df: Counter = Counter()
+        for doc in docs:
+            df.update(set(char_ngrams(doc, self.sizes)))
+        self.vocabulary = {gram: i for i, gram in enumerate(sorted(df))}
+        n_docs = len(docs)
+        self.idf = np.array(
+            [math.log((1 + n_docs) / (1 + df[g])) + 1 for g in sorted(df)],
+            dtype=np.float32)
+        return self
+
+    def transform_one(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Sparse (indices, weights) for one text; out-of-vocabulary grams are dropped."""
+        counts = Counter(g for g in char_ngrams(text, self.sizes)
+                         if g in self.vocabulary)
+        if not counts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        idx = np.fromiter((self.vocabulary[g] for g in counts), dtype=np.int64,
+                          count=len(counts))
+        tf = np.fromiter((1 + math.log(c) for c in counts.values()),
+                         dtype=np.float32, count=len(counts))
+        weights = tf * self.idf[idx]
+        weights /= np.linalg.norm(weights) or 1.0
+        return idx, weights
+
+
+class LexicalRoleClassifier:
+    """Nearest-centroid Mafia42 job classifier over character n-gram TF-IDF.
+
+    Fit on each job's name and story plus (text, job code) pairs distilled
+    from past embedding-based assignments. Prediction is a sparse dot
+    product against one centroid per job, which keeps it in the tens of
+    microseconds with no network involved.
+    """
+
+    def __init__(self) -> None:
+        self.vectorizer = NgramTfidf()
+        self.labels: List[str] = []
+        self._centroids = np.zeros((0, 0), dtype=np.float32)  # vocab x labels
+
+    @property
+    def fitted(self) -> bool:
+        return bool(self.labels)
+
+    def fit(self, examples: Sequence[Tuple[str, str]]) -> "LexicalRoleClassifier":
+        if not examples:
+            self.labels = []
+            return self
+        self.vectorizer.fit([text for text, _ in examples])
+        labels = sorted({label for _, label in examples})
+        column = {label: i for i, label in enumerate(labels)}
+        centroids = np.zeros((len(self.vectorizer.vocabulary), len(labels)),
+                             dtype=np.float32)
+        for text, label in examples:
+            idx, weights = self.vectorizer.transform_one(text)
+            centroids[idx, column[label]] += weights
+        centroids /= np.linalg.norm(centroids, axis=0, keepdims=True) + 1e-12
+        self.labels, self._centroids = labels, centroids
+        return self
+
+    def predict(self, text: str) -> Optional[Tuple[str, float]]:
+        if not self.labels:
+            return None
+        idx, weights = self.vectorizer.transform_one(text)
+        if not idx.size:
+            return None
+        scores = weights @ self._centroids[idx]
+        best = int(np.argmax(scores))
+        if scores[best] <= 0:
+            return None
+        return self.labels[best], float(scores[best])
+
+
+def evaluate_role_classifier(base: Sequence[Tuple[str, str]],
+                             distilled: Sequence[Tuple[str, str]],
+                             folds: int = 5) -> Dict[str, Any]:
+    """Agreement with the embedding matcher on held-out distilled examples.
+
+    `base` (the job stories) is always in the training set; `distilled` is
+    split into `folds` folds and each fold is predicted by a classifier
+    trained on the stories plus the other folds.
+    """
+    if not distilled:
+        return {"examples": 0, "accuracy": None}
+    folds = max(2, min(folds, len(distilled)))
+    agree = 0
+    predicted = 0
+    per_fold = []
+    elapsed = 0.0
+    for fold in range(folds):
+        train = list(base) + [ex for i, ex in enumerate(distilled) if i % folds != fold]
+        test = [ex for i, ex in enumerate(distilled) if i % folds == fold]
+        classifier = LexicalRoleClassifier().fit(train)
+        fold_agree = 0
+        for text, label in test:
+            started = time.perf_counter()
+            prediction = classifier.predict(text)
+            elapsed += time.perf_counter() - started
+            predicted += 1
+            if prediction and prediction[0] == label:
+                fold_agree += 1
+        agree += fold_agree
+        per_fold.append(round(fold_agree / len(test), 4) if test else None)
+    return {
+        "examples": len(distilled),
+        "folds": folds,
+        "accuracy": round(agree / len(distilled), 4),
+        "per_fold": per_fold,
+        "mean_predict_us": round(elapsed / predicted * 1e6, 2) if predicted else None,
+    }
+
+
+class BM25Index:
+    """Incremental BM25 inverted index over char_ngrams() of weighted fields.
+
+    Documents are dicts; `fields` maps a field name to its weight, and a
+    field's n-gram counts are multiplied by that weight before BM25
+    saturation (a simplified BM25F). List-valued fields are joined. Each
+    document also keeps the original dict so hits need no second lookup.
+    """
+
+    def __init__(self, fields: Dict[str, float], k1: float = 1.2,
+                 b: float = 0.75) -> None:
+        self.fields = fields
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._doc_terms: Dict[str, Dict[str, float]] = {}
+        self._doc_len: Dict[str, float] = {}
+        self._docs: Dict[str, Dict[str, Any]] = {}
+        self._total_len = 0.0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def _terms(self, doc: Dict[str, Any]) -> Dict[str, float]:
+        terms: Counter = Counter()
+        for field, weight in self.fields.items():
+            value = doc.get(field) or ""
+            if isinstance(value, (list, tuple)):
+                value = " ".join(str(v) for v in value)
+            for gram in char_ngrams(str(value)):
+                terms[gram] += weight
+        return dict(terms)
+
+    def upsert(self, doc_id: str, doc: Dict[str, Any]) -> None:
+        terms = self._terms(doc)
+        with self._lock:
+            self._remove_locked(doc_id)
+            for term, tf in terms.items():
+                self._postings.setdefault(term, {})[doc_id] = tf
+            self._doc_terms[doc_id] = terms
+            self._doc_len[doc_id] = sum(terms.values())
+            self._total_len += self._doc_len[doc_id]
+            self._docs[doc_id] = doc
+
+    def remove(self, doc_id: str) -> None:
+        with self._lock:
+            self._remove_locked(doc_id)
+
+    def _remove_locked(self, doc_id: str) -> None:
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            posting = self._postings.get(term)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self._postings[term]
+        self._total_len -= self._doc_len.pop(doc_id, 0.0)
+        self._docs.pop(doc_id, None)
+
+    def get(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        return self._docs.get(doc_id)
+
+    def docs(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._docs.values())
+
+    def search(self, query: str, limit: int = 10,
+               accept: Optional[Callable[[Dict[str, Any]], bool]] = None
+               ) -> List[Tuple[str, float]]:
+        """Top `limit` (doc_id, score) pairs; `accept` filters on the stored doc."""
+        query_terms = set(char_ngrams(query))
+        with self._lock:
+            n_docs = len(self._docs)
+            if not n_docs or not query_terms:
+                return []
+            avg_len = self._total_len / n_docs or 1.0
+            scores: Dict[str, float] = {}
+            for term in query_terms:
+                posting = self._postings.get(term)
+                if not posting:
+                    continue
+                idf = math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+                for doc_id, tf in posting.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_len[doc_id] / avg_len)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+            if accept is not None:
+                ranked = [(d, s) for d, s in ranked if accept(self._docs[d])]
+        return ranked[:limit]
+
+
+def reciprocal_rank_fusion(*rankings: Sequence[str], k: int = 60) -> List[Tuple[str, float]]:
+    """Fuse ranked id lists: score(id) = sum over lists of 1 / (k + rank)."""
+    fused: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
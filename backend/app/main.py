@@ -1,32 +1,105 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import json
 import os
+import re
 import secrets
+from contextlib import aclosing, asynccontextmanager, contextmanager
 from pathlib import Path
-from typing import Annotated, Dict, List, Literal, Optional
+from typing import Annotated, Any, AsyncIterator, Callable, Dict, List, Literal, Optional
 
 from fastapi import APIRouter, Depends, FastAPI, Header, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, HTMLResponse
+from fastapi.responses import FileResponse, HTMLResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field
 
 from .config import logger, settings
+from .deadline import Deadline
+from .lexical import reciprocal_rank_fusion
+from .postgres import close_postgres_pool
 from .services import (
     assemble_profile_record,
+    benchmark_vector_tiers,
     clustering_service,
+    convert_team_name,
+    drift_reconciler,
     embedding_service,
+    InterestVocabulary,
+    TwoStageVectorService,
+    interest_vocabulary,
+    invalidation_bus,
+    job_story_embedder,
     intro_generation_service,
+    intro_library,
+    intro_prefetcher,
     kakao_client,
+    kakao_fanout_sender,
+    local_job_matcher,
+    member_vector_metadata,
     normalize_profile_text,
     normalize_intro_text,
-    normalize_interests_text,
+    participant_counter,
     pinecone_service,
+    profile_search_index,
+    refresh_job_catalog,
+    reembed_jobs,
+    role_reasoning_service,
     session_signer,
     supabase_service,
+    vector_writer,
+    watch_vector_snapshots,
 )
 
-app = FastAPI(title="2025 Farewell Party API", version="0.1.0")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    kakao_client.start()
+    await asyncio.to_thread(invalidation_bus.start)
+    background_tasks: List[asyncio.Task] = [
+        asyncio.create_task(asyncio.to_thread(local_job_matcher.load)),
+        asyncio.create_task(asyncio.to_thread(profile_search_index.rebuild)),
+        asyncio.create_task(asyncio.to_thread(vector_writer.start)),
+        asyncio.create_task(asyncio.to_thread(reembed_jobs.resume_pending)),
+    ]
+    if isinstance(pinecone_service, TwoStageVectorService):
+        background_tasks.append(
+            asyncio.create_task(asyncio.to_thread(pinecone_service.load)))
+    if settings.drift_reconcile_seconds > 0:
+        background_tasks.append(
+            asyncio.create_task(
+                drift_reconciler.reconcile_forever(settings.drift_reconcile_seconds)))
+    if settings.job_catalog_refresh_seconds > 0:
+        background_tasks.append(
+            asyncio.create_task(
+                refresh_job_catalog(settings.job_catalog_refresh_seconds)))
+    if settings.vector_snapshot_check_seconds > 0:
+        background_tasks.append(
+            asyncio.create_task(
+                watch_vector_snapshots(settings.vector_snapshot_check_seconds)))
+    if settings.participant_count_reconcile_seconds > 0:
+        background_tasks.append(
+            asyncio.create_task(
+                participant_counter.reconcile_forever(
+                    settings.participant_count_reconcile_seconds)))
+    else:
+        background_tasks.append(asyncio.create_task(participant_counter.refresh()))
+    try:
+        yield
+    finally:
+        for task in background_tasks:
+            task.cancel()
+        invalidation_bus.stop()
+        await asyncio.to_thread(reembed_jobs.stop)
+        await asyncio.to_thread(vector_writer.close)
+        await kakao_client.aclose()
+        close_postgres_pool()
+
+
+app = FastAPI(title="2025 Farewell Party API", version="0.1.0", lifespan=lifespan)
 api_router = APIRouter(prefix="/api")
 
 FRONTEND_BUILD_DIR = Path(__file__).parent.parent.parent / "frontend" / "dist"
@@ -48,6 +121,43 @@ app.add_middleware(
 )
 
 
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+SSE_KEEPALIVE_SECONDS = 15
+
+
+_detached_tasks: set[asyncio.Task] = set()
+
+
+def _spawn(coro) -> asyncio.Task:
+    """Run a fire-and-forget coroutine, keeping a reference until it finishes."""
+    task = asyncio.create_task(coro)
+    _detached_tasks.add(task)
+    task.add_done_callback(_detached_tasks.discard)
+    return task
+
+
+def _sse_event(data: Dict[str, Any], event: Optional[str] = None) -> str:
+    """Format one Server-Sent Events frame."""
+    frame = f"event: {event}\n" if event else ""
+    return frame + f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _guard_sse(events: AsyncIterator[str], detail: str) -> AsyncIterator[str]:
+    """Pass frames through; an unhandled failure ends the stream with an `error` event."""
+    try:
+        async for frame in events:
+            yield frame
+    except Exception as e:
+        logger.error(f"SSE stream failed ({detail}): {e!r}")
+        yield _sse_event({"detail": detail}, "error")
+
+
+def _sse_response(events: AsyncIterator[str], detail: str) -> StreamingResponse:
+    return StreamingResponse(_guard_sse(events, detail),
+                             media_type="text/event-stream",
+                             headers=SSE_HEADERS)
+
+
 class SessionUser(BaseModel):
     kakao_id: str
     nickname: Optional[str] = None
@@ -74,14 +184,21 @@ class PreferencePayload(BaseModel):
 
 class KakaoMessagePayload(BaseModel):
     access_token: str
-    receiver_uuids: List[str]
+    receiver_uuids: List[str] = Field(default_factory=list)
     text: Optional[str] = None
+    blast_id: Optional[str] = None
 
 
 class KakaoTemplatePayload(BaseModel):
     access_token: str
-    receiver_uuids: List[str]
+    receiver_uuids: List[str] = Field(default_factory=list)
     template_id: int = 126817
+    blast_id: Optional[str] = None
+
+
+def _load_session_user(token: str) -> SessionUser:
+    return session_signer.load_session(token,
+                                       lambda payload: SessionUser(**payload))
 
 
 async def optional_user(
@@ -92,8 +209,7 @@ async def optional_user(
         return None
     token = authorization.split(" ", 1)[1]
     try:
-        payload = session_signer.verify(token)
-        return SessionUser(**payload)
+        return _load_session_user(token)
     except ValueError:
         return None
 
@@ -107,8 +223,7 @@ async def get_current_user(
                             detail="missing_token")
     token = authorization.split(" ", 1)[1]
     try:
-        payload = session_signer.verify(token)
-        return SessionUser(**payload)
+        return _load_session_user(token)
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
                             detail=str(exc)) from exc
@@ -155,30 +270,19 @@ async def kakao_callback(code: str, state: Optional[str] = None):
     nickname = profile_data.get("nickname", "친구")
     profile_image_url = profile_data.get("profile_image_url", "")
 
-    # Check if user exists, create or update profile
-    existing_profile = supabase_service.fetch_profile(kakao_id)
-    if existing_profile:
-        # Update profile_image for existing users on every login
-        if profile_image_url:
-            supabase_service.update_profile_image(kakao_id, profile_image_url)
-    else:
-        # Create new profile for first-time users
-        new_profile_data = {
+    # One conditional write: create first-time members, refresh profile_image otherwise
+    login_res = await asyncio.to_thread(supabase_service.record_login, kakao_id, nickname, profile_image_url)
+    if "error" in login_res:
+        logger.error("Failed to record login for %s: %s", kakao_id, login_res["error"])
+    elif login_res.get("created"):
+        logger.info("Successfully created initial profile for %s", kakao_id)
+        participant_counter.increment()
+        profile_search_index.index_profile({
+            "kakao_id": kakao_id,
             "name": nickname,
-            "tagline": "",
-            "intro": "",
-            "interests": [],
-            "strengths": [],
-            "contact": "",
             "visibility": "public",
             "profile_image": profile_image_url,
-        }
-        record = assemble_profile_record(kakao_id, new_profile_data)
-        upsert_res = supabase_service.upsert_profile(record)
-        if "error" in upsert_res:
-            logger.error("Failed to create initial profile for %s: %s", kakao_id, upsert_res["error"])
-        else:
-            logger.info("Successfully created initial profile for %s", kakao_id)
+        })
 
     payload = {
         "kakao_id": kakao_id,
@@ -264,7 +368,7 @@ async def kakao_callback(code: str, state: Optional[str] = None):
 
 @api_router.get("/me")
 async def get_my_profile(user: SessionUser = Depends(get_current_user)):
-    profile = supabase_service.fetch_profile(user.kakao_id)
+    profile = await asyncio.to_thread(supabase_service.fetch_profile, user.kakao_id)
     return {"profile": profile}
 
 
@@ -274,31 +378,44 @@ async def upsert_profile(payload: ProfilePayload,
     record = assemble_profile_record(user.kakao_id, payload.model_dump(),
                                      user.profile_image_url)
     supabase_result = supabase_service.upsert_profile(record)
+    if not supabase_result.get("error") and not supabase_result.get("skipped"):
+        profile_search_index.index_profile(record)
 
-    metadata = {"visibility": record["visibility"], "name": record["name"]}
     pinecone_results = {}
-
+    # The profile is already saved; an embedding failure only leaves its
+    # vectors behind, which the drift reconciler picks up later.
     intro_text = normalize_intro_text(record)
     if intro_text.strip():
-        intro_vector = embedding_service.embed_member(intro_text)
+        try:
+            intro_vector = await asyncio.to_thread(embedding_service.embed_member,
+                                                   intro_text)
+        except Exception as e:
+            logger.error(f"Intro embedding failed for {user.kakao_id}: {e}")
+            intro_vector = None
+            pinecone_results["intro"] = {"error": "embedding_failed"}
         if intro_vector:
-            pinecone_results["intro"] = pinecone_service.upsert_embedding(
+            pinecone_results["intro"] = vector_writer.enqueue(
                 member_id=user.kakao_id,
                 vector=intro_vector,
-                metadata=metadata,
+                metadata=member_vector_metadata(record, "intro"),
                 namespace="intro",
             )
 
-    interests_text = normalize_interests_text(record)
-    if interests_text.strip():
-        interests_vector = embedding_service.embed_member(interests_text)
-        if interests_vector:
-            pinecone_results["interests"] = pinecone_service.upsert_embedding(
-                member_id=user.kakao_id,
-                vector=interests_vector,
-                metadata=metadata,
-                namespace="interests",
-            )
+    try:
+        interests_vector = await asyncio.to_thread(
+            interest_vocabulary.compose, record.get("interests"),
+            record.get("strengths"))
+    except Exception as e:
+        logger.error(f"Interest embedding failed for {user.kakao_id}: {e}")
+        interests_vector = None
+        pinecone_results["interests"] = {"error": "embedding_failed"}
+    if interests_vector:
+        pinecone_results["interests"] = vector_writer.enqueue(
+            member_id=user.kakao_id,
+            vector=interests_vector,
+            metadata=member_vector_metadata(record, "interests"),
+            namespace="interests",
+        )
 
     return {
         "profile":
@@ -339,6 +456,35 @@ async def generate_intro(payload: IntroGenerationPayload,
     return result
 
 
+async def _intro_event_stream(prompt: str, fallback: Optional[Dict[str, Any]] = None):
+    """SSE frames: raw `token` chunks while the model writes, then the parsed `done` intro."""
+    parts: List[str] = []
+    try:
+        async for delta in intro_generation_service.stream_intro(prompt):
+            parts.append(delta)
+            yield _sse_event({"text": delta}, "token")
+        result = intro_generation_service.parse_intro("".join(parts))
+    except Exception as e:
+        logger.error(f"Intro streaming failed: {e}")
+        result = fallback
+    if result:
+        yield _sse_event(result, "done")
+    else:
+        yield _sse_event({"detail": "intro_generation_failed"}, "error")
+
+
+@api_router.post("/generate-intro/stream")
+async def stream_generate_intro(payload: IntroGenerationPayload,
+                                user: SessionUser = Depends(get_current_user)):
+    if not intro_generation_service.async_client:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="intro_generation_failed",
+        )
+    prompt = intro_generation_service.answers_prompt(payload.answers)
+    return _sse_response(_intro_event_stream(prompt), "intro_generation_failed")
+
+
 class YesOrNoPayload(BaseModel):
     question_num: int = Field(..., ge=1, le=5)
     response: int = Field(..., ge=-1, le=1)
@@ -356,6 +502,12 @@ async def save_yesorno(payload: YesOrNoPayload,
     if "error" in result:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                             detail=result["error"])
+
+    # With all five answers in, start the intro the user is about to ask for
+    # (unless the pre-generated library already covers this combination).
+    row = (result.get("data") or [None])[0]
+    if row and intro_library.combination_key(row) not in intro_library.variants:
+        intro_prefetcher.start(user.kakao_id, row, user.nickname or "친구")
     return {"saved": True, "result": result}
 
 
@@ -365,9 +517,7 @@ async def get_yesorno(user: SessionUser = Depends(get_current_user)):
     return {"responses": row}
 
 
-@api_router.post("/generate-intro-from-yesorno")
-async def generate_intro_from_yesorno(
-        user: SessionUser = Depends(get_current_user)):
+def _load_yesorno_answers(user: SessionUser) -> Dict[str, Any]:
     yesorno_data = supabase_service.fetch_yesorno(user.kakao_id)
     if not yesorno_data:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
@@ -378,9 +528,31 @@ async def generate_intro_from_yesorno(
     if not has_responses:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                             detail="no_responses_found")
+    return yesorno_data
 
-    result = intro_generation_service.generate_intro_from_yesorno(
-        yesorno_data, user.nickname or "친구")
+
+@api_router.post("/generate-intro-from-yesorno")
+async def generate_intro_from_yesorno(
+        regenerate: bool = False,
+        user: SessionUser = Depends(get_current_user)):
+    yesorno_data = _load_yesorno_answers(user)
+    nickname = user.nickname or "친구"
+    library_key = intro_library.combination_key(yesorno_data)
+    if not regenerate:
+        result = intro_library.pick(library_key, nickname)
+        if result:
+            return result
+        result = await intro_prefetcher.take(user.kakao_id, yesorno_data,
+                                             nickname)
+        if result:
+            return result
+
+    result = await asyncio.to_thread(
+        intro_generation_service.generate_intro_from_yesorno, yesorno_data,
+        nickname)
+    if not result:
+        # A failed regenerate still beats an error when a canned intro exists.
+        result = intro_library.pick(library_key, nickname)
     if not result:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -389,27 +561,70 @@ async def generate_intro_from_yesorno(
     return result
 
 
+@api_router.post("/generate-intro-from-yesorno/stream")
+async def stream_generate_intro_from_yesorno(
+        regenerate: bool = False,
+        user: SessionUser = Depends(get_current_user)):
+    yesorno_data = _load_yesorno_answers(user)
+    nickname = user.nickname or "친구"
+    library_key = intro_library.combination_key(yesorno_data)
+    canned = intro_library.pick(library_key, nickname)
+    if not canned and not regenerate:
+        canned = await intro_prefetcher.take(user.kakao_id, yesorno_data,
+                                             nickname)
+
+    if canned and not regenerate:
+        async def library_stream():
+            yield _sse_event(canned, "done")
+
+        return _sse_response(library_stream(), "intro_generation_failed")
+
+    if not intro_generation_service.async_client:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="intro_generation_failed",
+        )
+    prompt = intro_generation_service.yesorno_prompt(yesorno_data, nickname)
+    return _sse_response(_intro_event_stream(prompt, fallback=canned),
+                         "intro_generation_failed")
+
+
 @api_router.get("/profiles/count")
 async def get_profiles_count():
-    if not supabase_service.client:
-        return {"count": 0}
-    try:
-        result = supabase_service.client.table("member_profiles").select(
-            "kakao_id", count="exact").execute()
-        return {"count": result.count or 0}
-    except Exception:
-        return {"count": 0}
+    return {"count": participant_counter.get()}
+
+
+@api_router.get("/profiles/count/stream")
+async def stream_profiles_count(request: Request):
+    """Push the participant count to the landing badge as it changes (SSE)."""
+    queue = participant_counter.subscribe()
+
+    async def event_stream():
+        try:
+            yield _sse_event({"count": participant_counter.get()})
+            while not await request.is_disconnected():
+                try:
+                    count = await asyncio.wait_for(queue.get(),
+                                                   SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield _sse_event({"count": count})
+        finally:
+            participant_counter.unsubscribe(queue)
+
+    return _sse_response(event_stream(), "count_stream_failed")
 
 
 @api_router.get("/profiles/public")
 async def list_public_profiles(limit: int = 50):
-    profiles = supabase_service.fetch_public_profiles(limit=limit)
+    profiles = await asyncio.to_thread(supabase_service.fetch_public_profiles, limit=limit)
     return {"profiles": profiles}
 
 
 @api_router.get("/profiles/members")
 async def list_member_visible_profiles(limit: int = 50, user: SessionUser = Depends(get_current_user)):
-    profiles = supabase_service.fetch_member_visible_profiles(limit=limit)
+    profiles = await asyncio.to_thread(supabase_service.fetch_member_visible_profiles, limit=limit)
     return {"profiles": profiles}
 
 
@@ -445,7 +660,7 @@ async def view_profile(
         kakao_id: str,
         user: SessionUser | None = Depends(optional_user),
 ):
-    profile = supabase_service.fetch_profile(kakao_id)
+    profile = await asyncio.to_thread(supabase_service.fetch_profile, kakao_id)
     if not profile:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail="not_found")
@@ -474,69 +689,290 @@ async def admin_profiles(user: SessionUser = Depends(get_current_user)):
     return {"profiles": result.data}
 
 
+def _reembed_job_response(job: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail="job_not_found")
+    if job.get("skipped") and job["reason"].startswith("job_"):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                            detail={"reason": job["reason"],
+                                    "job_id": job.get("job_id")})
+    if job.get("skipped") or job.get("error"):
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=job.get("reason") or job.get("error"),
+        )
+    return {"job": job}
+
+
 @api_router.post("/admin/reembed-all")
 async def reembed_all_profiles(user: SessionUser = Depends(get_current_user)):
+    """Start a background re-embed job; see /admin/reembed-jobs for progress."""
     if not user.is_admin:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
                             detail="admin_only")
-    if not supabase_service.client:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="supabase_not_configured",
-        )
+    job = await asyncio.to_thread(reembed_jobs.start)
+    return {"message": "reembedding_started", **_reembed_job_response(job)}
 
-    result = supabase_service.client.table("member_profiles").select(
-        "*").execute()
-    profiles = result.data or []
 
-    stats = {
-        "total": len(profiles),
-        "intro_success": 0,
-        "interests_success": 0,
-        "errors": []
+@api_router.get("/admin/reembed-jobs")
+async def list_reembed_jobs(limit: int = 20,
+                            user: SessionUser = Depends(get_current_user)):
+    if not user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                            detail="admin_only")
+    return {"jobs": await asyncio.to_thread(reembed_jobs.recent, limit)}
+
+
+@api_router.post("/admin/reembed-jobs")
+async def start_reembed_job(dry_run: bool = False,
+                            batch_size: Optional[int] = None,
+                            user: SessionUser = Depends(get_current_user)):
+    """Re-embed every profile in the background (admin only).
+
+    With dry_run=true nothing is embedded or written; the job reads the same
+    batches and reports token and cost estimates under `estimate`.
+    """
+    if not user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                            detail="admin_only")
+    job = await asyncio.to_thread(reembed_jobs.start, dry_run, batch_size)
+    return _reembed_job_response(job)
+
+
+@api_router.get("/admin/reembed-jobs/{job_id}")
+async def get_reembed_job(job_id: str,
+                          user: SessionUser = Depends(get_current_user)):
+    if not user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                            detail="admin_only")
+    return _reembed_job_response(await asyncio.to_thread(reembed_jobs.get, job_id))
+
+
+@api_router.get("/admin/reembed-jobs/{job_id}/stream")
+async def stream_reembed_job(job_id: str, request: Request,
+                             user: SessionUser = Depends(get_current_user)):
+    """Push job progress after every checkpoint until the job stops (SSE)."""
+    if not user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                            detail="admin_only")
+    job = _reembed_job_response(await asyncio.to_thread(reembed_jobs.get, job_id))["job"]
+
+    async def event_stream():
+        nonlocal job
+        last_update, idle = None, 0.0
+        while not await request.is_disconnected():
+            if job["updated_at"] != last_update:
+                last_update, idle = job["updated_at"], 0.0
+                yield _sse_event(job, "progress")
+            elif idle >= SSE_KEEPALIVE_SECONDS:
+                idle = 0.0
+                yield ": keep-alive\n\n"
+            if job["state"] not in reembed_jobs.ACTIVE:
+                yield _sse_event(job, "done")
+                return
+            await asyncio.sleep(1)
+            idle += 1
+            job = await asyncio.to_thread(reembed_jobs.get, job_id) or job
+
+    return _sse_response(event_stream(), "reembed_stream_failed")
+
+
+@api_router.post("/admin/reembed-jobs/{job_id}/cancel")
+async def cancel_reembed_job(job_id: str,
+                             user: SessionUser = Depends(get_current_user)):
+    """Stop a job after its current batch round (admin only)."""
+    if not user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                            detail="admin_only")
+    return _reembed_job_response(await asyncio.to_thread(reembed_jobs.cancel, job_id))
+
+
+@api_router.post("/admin/reembed-jobs/{job_id}/resume")
+async def resume_reembed_job(job_id: str,
+                             user: SessionUser = Depends(get_current_user)):
+    """Continue an interrupted or failed job from its last checkpoint (admin only)."""
+    if not user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                            detail="admin_only")
+    return _reembed_job_response(await asyncio.to_thread(reembed_jobs.resume, job_id))
+
+
+@api_router.get("/admin/reconcile")
+async def get_reconcile_status(user: SessionUser = Depends(get_current_user)):
+    """Progress of the running drift reconcile and the last report (admin only)."""
+    if not user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                            detail="admin_only")
+    return {"status": drift_reconciler.status,
+            "last_report": drift_reconciler.last_report}
+
+
+@api_router.post("/admin/reconcile")
+async def start_reconcile(repair: bool = True, confirm_deletes: bool = False,
+                          user: SessionUser = Depends(get_current_user)):
+    """Diff member_profiles against the vector index and repair what differs (admin only).
+
+    Runs in the background; poll GET /admin/reconcile for progress. With
+    repair=false only the diff report is produced. Orphan deletes above
+    DRIFT_MAX_DELETE_FRACTION of a namespace are held unless confirm_deletes.
+    """
+    if not user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                            detail="admin_only")
+    if drift_reconciler.status.get("state") == "running":
+        return {"started": False, "status": drift_reconciler.status}
+    _spawn(asyncio.to_thread(drift_reconciler.run, repair, confirm_deletes))
+    return {"started": True, "repair": repair, "confirm_deletes": confirm_deletes}
+
+
+@api_router.get("/admin/vector-writes")
+async def get_vector_writes(user: SessionUser = Depends(get_current_user)):
+    """Queue depth, flush latency and failures of the vector write buffer (admin only)."""
+    if not user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                            detail="admin_only")
+    return vector_writer.stats()
+
+
+@api_router.get("/admin/invalidation-bus")
+async def get_invalidation_bus(user: SessionUser = Depends(get_current_user)):
+    """Transport, counters and propagation lag of the cache invalidation bus (admin only)."""
+    if not user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                            detail="admin_only")
+    return invalidation_bus.stats()
+
+
+@api_router.post("/admin/invalidation-bus/ping")
+async def ping_invalidation_bus(user: SessionUser = Depends(get_current_user)):
+    """Send a ping through the bus and report its round-trip time (admin only)."""
+    if not user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                            detail="admin_only")
+    lag_ms = await asyncio.to_thread(invalidation_bus.ping)
+    return {"mode": invalidation_bus.mode, "round_trip_ms": lag_ms,
+            "delivered": lag_ms is not None}
+
+
+@api_router.get("/admin/storage-benchmark")
+async def storage_benchmark(rounds: int = 5,
+                            user: SessionUser = Depends(get_current_user)):
+    """Compare hot-query latency between PostgREST and the direct Postgres pool (admin only)."""
+    if not user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                            detail="admin_only")
+    rounds = max(1, min(rounds, 50))
+    return {
+        "storage_backend": settings.storage_backend,
+        **await asyncio.to_thread(supabase_service.benchmark_read_paths,
+                                  user.kakao_id, rounds),
     }
 
-    for profile in profiles:
-        kakao_id = profile.get("kakao_id")
-        if not kakao_id:
-            continue
 
-        metadata = {
-            "visibility": profile.get("visibility", "public"),
-            "name": profile.get("name", "")
-        }
+class RevokeSessionsPayload(BaseModel):
+    kakao_id: str
 
-        intro_text = normalize_intro_text(profile)
-        if intro_text.strip():
-            intro_vector = embedding_service.embed_member(intro_text)
-            if intro_vector:
-                try:
-                    pinecone_service.upsert_embedding(
-                        member_id=kakao_id,
-                        vector=intro_vector,
-                        metadata=metadata,
-                        namespace="intro",
-                    )
-                    stats["intro_success"] += 1
-                except Exception as e:
-                    stats["errors"].append(f"intro:{kakao_id}:{str(e)}")
-
-        interests_text = normalize_interests_text(profile)
-        if interests_text.strip():
-            interests_vector = embedding_service.embed_member(interests_text)
-            if interests_vector:
-                try:
-                    pinecone_service.upsert_embedding(
-                        member_id=kakao_id,
-                        vector=interests_vector,
-                        metadata=metadata,
-                        namespace="interests",
-                    )
-                    stats["interests_success"] += 1
-                except Exception as e:
-                    stats["errors"].append(f"interests:{kakao_id}:{str(e)}")
 
-    return {"message": "reembedding_complete", "stats": stats}
+@api_router.post("/admin/sessions/revoke")
+async def revoke_sessions(payload: RevokeSessionsPayload,
+                          user: SessionUser = Depends(get_current_user)):
+    """Invalidate all existing sessions of a user, e.g. after an admin change (admin only)."""
+    if not user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                            detail="admin_only")
+    evicted = session_signer.revoke(payload.kakao_id)
+    return {"message": "sessions_revoked", "kakao_id": payload.kakao_id,
+            "evicted_cache_entries": evicted}
+
+
+@api_router.get("/admin/role-reasoning-cache")
+async def role_reasoning_cache_stats(user: SessionUser = Depends(get_current_user)):
+    """Hit rate and single-flight coalescing of the role reasoning cache (admin only)."""
+    if not user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                            detail="admin_only")
+    return role_reasoning_service.stats()
+
+
+@api_router.get("/admin/role-classifier")
+async def role_classifier_report(folds: int = 5, refit: bool = False,
+                                 user: SessionUser = Depends(get_current_user)):
+    """Accuracy of the lexical role classifier against the embedding matcher (admin only)."""
+    if not user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                            detail="admin_only")
+    if refit or not local_job_matcher.loaded:
+        await asyncio.to_thread(local_job_matcher.load)
+    return await asyncio.to_thread(local_job_matcher.report,
+                                   max(2, min(folds, 10)))
+
+
+@api_router.get("/admin/vector-benchmark")
+async def vector_benchmark(namespace: Literal["intro", "interests"] = "intro",
+                           k: int = 10, dims: str = "256,512",
+                           candidates: Optional[int] = None,
+                           user: SessionUser = Depends(get_current_user)):
+    """recall@k of shortened-vector retrieval, with and without full-size re-ranking (admin only)."""
+    if not user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                            detail="admin_only")
+    try:
+        dims_options = [int(d) for d in dims.split(",") if d.strip()]
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="invalid_dims")
+    report = await asyncio.to_thread(
+        benchmark_vector_tiers, pinecone_service, supabase_service, namespace,
+        dims_options, max(1, min(k, 50)),
+        candidates or settings.rerank_candidates)
+    return {
+        **report,
+        "retrieval_mode": settings.vector_retrieval_mode,
+        "two_stage": pinecone_service.stats()
+        if isinstance(pinecone_service, TwoStageVectorService) else None,
+    }
+
+
+@api_router.get("/admin/intro-library")
+async def get_intro_library(user: SessionUser = Depends(get_current_user)):
+    """Coverage and build status of the pre-generated intro library (admin only)."""
+    if not user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                            detail="admin_only")
+    return {
+        **intro_library.stats(),
+        "build": intro_library.build_status,
+        "prefetch": intro_prefetcher.stats(),
+    }
+
+
+@api_router.post("/admin/intro-library/build")
+async def build_intro_library(variants: int = 3,
+                              user: SessionUser = Depends(get_current_user)):
+    """Regenerate every yes/no combination's intro variants in the background (admin only)."""
+    if not user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                            detail="admin_only")
+    if not intro_generation_service.client:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            detail="openai_not_configured")
+    if intro_library.build_status.get("state") == "running":
+        return {"message": "already_running", "build": intro_library.build_status}
+
+    variants = max(1, min(variants, 10))
+    intro_library.build_status = {"state": "running", "done": 0, "total": 32}
+
+    async def run_build() -> None:
+        try:
+            await asyncio.to_thread(intro_library.build,
+                                    intro_generation_service, variants)
+        except Exception as e:
+            logger.error(f"Intro library build failed: {e}")
+            intro_library.build_status = {"state": "failed", "error": str(e)}
+
+    _spawn(run_build())
+    return {"message": "build_started", "variants": variants}
 
 
 @api_router.get("/admin/profiles-order")
@@ -583,72 +1019,27 @@ async def update_profiles_order(payload: UpdateOrderPayload,
 
 
 @api_router.post("/admin/embed-jobs")
-async def embed_mafia42_jobs(user: SessionUser = Depends(get_current_user)):
-    """Embed all mafia42_jobs into Pinecone with namespace 'mafia42_jobs'."""
+async def embed_mafia42_jobs(force: bool = False,
+                             user: SessionUser = Depends(get_current_user)):
+    """Embed new or edited mafia42_jobs stories into namespace 'mafia42_jobs'.
+
+    Unchanged stories are skipped by content hash and vectors of removed
+    jobs are deleted (see JobStoryEmbedder). `force=true` re-fetches the
+    job vectors and republishes the matcher snapshot even when nothing
+    changed.
+    """
     if not user.is_admin:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
                             detail="admin_only")
 
-    jobs = supabase_service.fetch_mafia42_jobs()
-    if not jobs:
+    result = await asyncio.to_thread(job_story_embedder.run, force)
+    if result.get("error") == "no_jobs":
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail="mafia42_jobs 테이블이 비어있거나 접근할 수 없습니다.")
-
-    embedded_count = 0
-    failed_jobs = []
-
-    for job in jobs:
-        code = str(job.get("code", ""))
-        name = job.get("name", "")
-        story = job.get("story", "")
-        team = job.get("team", "")
-
-        if not story:
-            failed_jobs.append({"code": code, "reason": "no_story"})
-            continue
-
-        text_to_embed = f"{name}: {story}"
-
-        try:
-            vector = embedding_service.embed_member(text_to_embed)
-
-            if not vector:
-                failed_jobs.append({
-                    "code": code,
-                    "reason": "embedding_failed"
-                })
-                continue
-
-            story_truncated = story[:2000] if len(story) > 2000 else story
-
-            result = pinecone_service.upsert_embedding(
-                member_id=code,
-                vector=vector,
-                metadata={
-                    "code": code,
-                    "name": name,
-                    "team": team,
-                    "story": story_truncated
-                },
-                namespace="mafia42_jobs")
-
-            if result.get("skipped"):
-                failed_jobs.append({
-                    "code": code,
-                    "reason": result.get("reason")
-                })
-            else:
-                embedded_count += 1
-        except Exception as e:
-            logger.error(f"Error embedding job {code}: {e}")
-            failed_jobs.append({"code": code, "reason": str(e)[:100]})
-
-    return {
-        "message": "jobs_embedded",
-        "total_jobs": len(jobs),
-        "embedded_count": embedded_count,
-        "failed_jobs": failed_jobs
-    }
+    if result.get("skipped"):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                            detail=result["reason"])
+    return {"message": "jobs_embedded", **result}
 
 
 class FixedRolePayload(BaseModel):
@@ -657,10 +1048,18 @@ class FixedRolePayload(BaseModel):
 
 
 @api_router.get("/admin/jobs")
-async def get_mafia42_jobs():
-    """Get all Mafia42 jobs for debugging."""
-    jobs = supabase_service.fetch_mafia42_jobs()
-    return {"jobs": jobs}
+async def get_mafia42_jobs(
+    if_none_match: Annotated[Optional[str], Header(alias="If-None-Match")] = None,
+):
+    """Get all Mafia42 jobs for debugging; the ETag is the catalog version."""
+    catalog = await asyncio.to_thread(local_job_matcher.ensure_catalog)
+    etag = f'"{catalog.version}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if if_none_match and etag in [t.strip() for t in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=json.dumps({"jobs": catalog.jobs, "version": catalog.version},
+                                       ensure_ascii=False, default=str),
+                    media_type="application/json", headers=headers)
 
 
 @api_router.get("/admin/fixed-roles")
@@ -670,12 +1069,12 @@ async def get_fixed_roles(user: SessionUser = Depends(get_current_user)):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
                             detail="admin_only")
     profiles = supabase_service.fetch_all_profiles_with_roles()
-    jobs = supabase_service.fetch_mafia42_jobs()
+    catalog = await asyncio.to_thread(local_job_matcher.ensure_catalog)
     job_list = [{
         "code": str(j.get("code")),
         "name": j.get("name"),
         "team": j.get("team")
-    } for j in jobs]
+    } for j in catalog.jobs]
     return {"profiles": profiles, "jobs": job_list}
 
 
@@ -731,10 +1130,7 @@ async def admin_all_roles(user: SessionUser = Depends(get_current_user)):
                             detail="admin_only")
     
     profiles = supabase_service.fetch_all_profiles_for_admin()
-    jobs = supabase_service.fetch_mafia42_jobs()
-    job_map = {str(j.get("code")): j for j in jobs}
-    job_name_map = {j.get("name"): j for j in jobs}
-    logger.info(f"Loaded {len(jobs)} jobs, job_map keys: {list(job_map.keys())[:5]}")
+    catalog = await asyncio.to_thread(local_job_matcher.ensure_catalog)
     
     results = []
     for profile in profiles:
@@ -755,10 +1151,10 @@ async def admin_all_roles(user: SessionUser = Depends(get_current_user)):
         }
         
         if fixed_role:
-            job_data = job_name_map.get(fixed_role)
+            job_data = catalog.named(fixed_role)
             if job_data:
                 role_info["role"] = job_data.get("name")
-                role_info["team"] = _convert_team_name(job_data.get("team", "citizen"))
+                role_info["team"] = catalog.team_name(job_data)
                 role_info["code"] = str(job_data.get("code", ""))
             else:
                 role_info["role"] = fixed_role
@@ -775,14 +1171,14 @@ async def admin_all_roles(user: SessionUser = Depends(get_current_user)):
                     best = matches[0]
                     job_code = str(best.get("id", ""))
                     logger.info(f"Best match for {name}: job_code={job_code}, score={best.get('score')}")
-                    job_data = job_map.get(job_code)
+                    job_data = catalog.get(job_code)
                     if job_data:
                         role_info["role"] = job_data.get("name")
-                        role_info["team"] = _convert_team_name(job_data.get("team", "citizen"))
+                        role_info["team"] = catalog.team_name(job_data)
                         role_info["code"] = str(job_data.get("code", ""))
                         role_info["similarity"] = round(best.get("score", 0) * 100, 1)
                     else:
-                        logger.warning(f"Job not found in job_map for code: {job_code}, available keys: {list(job_map.keys())[:5]}")
+                        logger.warning(f"Job not found in catalog {catalog.version} for code: {job_code}")
         
         results.append(role_info)
     
@@ -825,7 +1221,7 @@ async def create_conversation(user: SessionUser = Depends(get_current_user)):
 @api_router.get("/conversations")
 async def list_conversations(user: SessionUser = Depends(get_current_user)):
     """List conversations for the current user."""
-    result = supabase_service.list_conversations(user.kakao_id)
+    result = await asyncio.to_thread(supabase_service.list_conversations, user.kakao_id)
     if "error" in result:
         raise HTTPException(status_code=500, detail=result["error"])
     return result
@@ -834,19 +1230,19 @@ async def list_conversations(user: SessionUser = Depends(get_current_user)):
 @api_router.get("/conversations/{conv_id}")
 async def get_conversation(conv_id: str):
     """Get conversation details."""
-    conv = supabase_service.fetch_conversation(conv_id)
+    conv = await asyncio.to_thread(supabase_service.fetch_conversation, conv_id)
     if not conv:
         raise HTTPException(status_code=404, detail="not_found")
 
     # Fetch names for speakers and listeners
     speakers_data = []
     for sid in conv.get("speakers", []):
-        p = supabase_service.fetch_profile(sid)
+        p = await asyncio.to_thread(supabase_service.fetch_profile, sid)
         speakers_data.append({"kakao_id": sid, "name": p.get("name") if p else "알 수 없음"})
 
     listeners_data = []
     for lid in conv.get("listeners", []):
-        p = supabase_service.fetch_profile(lid)
+        p = await asyncio.to_thread(supabase_service.fetch_profile, lid)
         listeners_data.append({"kakao_id": lid, "name": p.get("name") if p else "알 수 없음"})
 
     conv["speakers_data"] = speakers_data
@@ -862,7 +1258,7 @@ async def update_conversation(
 ):
     """Update conversation title or content."""
     # Optional: check if user is in speakers or is creator
-    conv = supabase_service.fetch_conversation(conv_id)
+    conv = await asyncio.to_thread(supabase_service.fetch_conversation, conv_id)
     if not conv:
         raise HTTPException(status_code=404, detail="not_found")
 
@@ -919,9 +1315,9 @@ async def get_personal_page(kakao_id: str, user: SessionUser = Depends(get_curre
                             detail="access_denied")
     
     message = supabase_service.fetch_personal_message(kakao_id)
-    profile = supabase_service.fetch_profile(kakao_id)
-    sent_letters = supabase_service.fetch_sent_letters(kakao_id)
-    received_letters = supabase_service.fetch_received_letters(kakao_id)
+    profile = await asyncio.to_thread(supabase_service.fetch_profile, kakao_id)
+    sent_letters = await asyncio.to_thread(supabase_service.fetch_sent_letters, kakao_id)
+    received_letters = await asyncio.to_thread(supabase_service.fetch_received_letters, kakao_id)
     
     all_profiles = supabase_service.fetch_all_profiles_for_admin()
     profile_map = {str(p.get("kakao_id")): p for p in all_profiles}
@@ -1119,7 +1515,7 @@ async def create_public_letter(payload: PublicLetterPayload):
 @api_router.get("/public-letters")
 async def get_all_public_letters():
     """Get all public letters for display."""
-    letters = supabase_service.fetch_public_letters()
+    letters = await asyncio.to_thread(supabase_service.fetch_public_letters)
     return {"letters": letters}
 
 
@@ -1134,24 +1530,39 @@ async def kakao_friends(access_token: str,
                             detail=f"kakao_friends_error: {exc}") from exc
 
 
+async def _fan_out(user: SessionUser, receiver_uuids: List[str],
+                   blast_id: Optional[str], send_chunk, error_prefix: str):
+    """Send to every recipient in chunks; resuming a blast retries only unsent ones."""
+    if not receiver_uuids and not blast_id:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="receiver_uuids_required")
+    try:
+        summary = await kakao_fanout_sender.send(user.kakao_id,
+                                                 receiver_uuids,
+                                                 send_chunk,
+                                                 blast_id=blast_id)
+    except ValueError as exc:
+        code = (status.HTTP_409_CONFLICT if str(exc) == "blast_in_progress"
+                else status.HTTP_404_NOT_FOUND)
+        raise HTTPException(status_code=code, detail=str(exc)) from exc
+    if summary["sent_count"] == 0 and summary["failed_count"]:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail={"error": error_prefix, **summary})
+    return {"sent": True, "result": summary}
+
+
 @api_router.post("/kakao/message")
 async def kakao_message(payload: KakaoMessagePayload,
                         user: SessionUser = Depends(get_current_user)):
-    if not payload.receiver_uuids:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
-                            detail="receiver_uuids_required")
     text = payload.text or f"{user.nickname or '친구'}가 송년회 초대장을 보냈습니다. 페이지를 확인해 주세요."
-    try:
-        result = await kakao_client.send_friend_message(
+    return await _fan_out(
+        user, payload.receiver_uuids, payload.blast_id,
+        lambda chunk: kakao_client.send_friend_message(
             access_token=payload.access_token,
-            receiver_uuids=payload.receiver_uuids,
+            receiver_uuids=chunk,
             text=text,
             link_url=settings.base_url,
-        )
-        return {"sent": True, "result": result}
-    except Exception as exc:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
-                            detail=f"kakao_message_error: {exc}") from exc
+        ), "kakao_message_error")
 
 
 @api_router.post("/kakao/template-message")
@@ -1160,19 +1571,58 @@ async def kakao_template_message(payload: KakaoTemplatePayload,
     if not user.is_admin:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
                             detail="admin_only")
-    if not payload.receiver_uuids:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
-                            detail="receiver_uuids_required")
-    try:
-        result = await kakao_client.send_template_message(
+    return await _fan_out(
+        user, payload.receiver_uuids, payload.blast_id,
+        lambda chunk: kakao_client.send_template_message(
             access_token=payload.access_token,
-            receiver_uuids=payload.receiver_uuids,
+            receiver_uuids=chunk,
             template_id=payload.template_id,
-        )
-        return {"sent": True, "result": result}
-    except Exception as exc:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
-                            detail=f"kakao_template_error: {exc}") from exc
+        ), "kakao_template_error")
+
+
+def _profiles_for_matches(matches: List[Dict[str, Any]], id_key: str,
+                          allowed_visibility: List[str]) -> List[Dict[str, Any]]:
+    """Attach profile rows to vector matches, keeping allowed visibility only.
+
+    The pgvector backend already joins the row onto each match; Pinecone
+    matches still need one fetch_profile per hit. The live row decides
+    visibility, since vector metadata can lag behind a visibility change.
+    """
+    profiles = []
+    for match in matches:
+        profile = match.get("profile") or supabase_service.fetch_profile(
+            match[id_key])
+        if profile and profile.get("visibility") in allowed_visibility:
+            profiles.append({
+                **profile,
+                "visibility": profile.get("visibility"),
+                "similarity_score": match["score"],
+            })
+    return profiles
+
+
+async def _eligible_profiles(query: Callable[[int], List[Dict[str, Any]]],
+                             id_key: str, allowed_visibility: List[str],
+                             limit: int) -> tuple[List[Dict[str, Any]], bool]:
+    """Up to `limit` eligible profiles from `query(top_k)`, over-fetching as needed.
+
+    The vector query already filters on visibility, but stale metadata or
+    deleted profiles can still drop hits afterwards. When that leaves the
+    page short while the index had more to give, re-query with a top_k
+    scaled by the observed eligibility rate, up to VECTOR_OVERFETCH_MAX.
+    Returns the profiles and whether the query matched anything at all.
+    """
+    top_k = limit + max(2, limit // 2)
+    while True:
+        matches = await asyncio.to_thread(query, top_k)
+        profiles = await asyncio.to_thread(_profiles_for_matches, matches,
+                                           id_key, allowed_visibility)
+        exhausted = len(matches) < top_k or top_k >= settings.vector_overfetch_max
+        if len(profiles) >= limit or exhausted:
+            return profiles[:limit], bool(matches)
+        eligible_rate = max(len(profiles), 1) / len(matches)
+        top_k = min(settings.vector_overfetch_max,
+                    max(top_k * 2, int(limit / eligible_rate * 1.2) + 1))
 
 
 @api_router.get("/similar-profiles")
@@ -1181,23 +1631,17 @@ async def get_similar_profiles(user: SessionUser = Depends(get_current_user),
                                criteria: Literal["intro",
                                                  "interests"] = "intro"):
     namespace = criteria
-    matches = pinecone_service.query_similar(user.kakao_id,
-                                             top_k=limit,
-                                             namespace=namespace)
-    if not matches:
+    profiles, matched = await _eligible_profiles(
+        lambda top_k: pinecone_service.query_similar(
+            user.kakao_id, top_k=top_k, namespace=namespace,
+            visibility=["public"]),
+        "kakao_id", ["public"], limit)
+    if not matched:
         return {
             "profiles": [],
             "message": "no_embedding_found",
             "criteria": criteria
         }
-    profiles = []
-    for match in matches:
-        profile = supabase_service.fetch_profile(match["kakao_id"])
-        if profile and profile.get("visibility") == "public":
-            profiles.append({
-                **profile,
-                "similarity_score": match["score"],
-            })
     return {"profiles": profiles, "criteria": criteria}
 
 
@@ -1207,79 +1651,163 @@ async def get_different_profiles(user: SessionUser = Depends(get_current_user),
                                  criteria: Literal["intro",
                                                    "interests"] = "intro"):
     namespace = criteria
-    matches = pinecone_service.query_different(user.kakao_id,
-                                               top_k=limit,
-                                               namespace=namespace)
-    if not matches:
+    profiles, matched = await _eligible_profiles(
+        lambda top_k: pinecone_service.query_different(
+            user.kakao_id, top_k=top_k, namespace=namespace,
+            visibility=["public"]),
+        "kakao_id", ["public"], limit)
+    if not matched:
         return {
             "profiles": [],
             "message": "no_embedding_found",
             "criteria": criteria
         }
-    profiles = []
-    for match in matches:
-        profile = supabase_service.fetch_profile(match["kakao_id"])
-        if profile and profile.get("visibility") == "public":
-            profiles.append({
-                **profile,
-                "similarity_score": match["score"],
-            })
     return {"profiles": profiles, "criteria": criteria}
 
 
+SEARCH_VISIBILITY = ["public", "members"]
+
+
+def _is_keyword_query(query_text: str) -> bool:
+    """Short or single-word queries want exact matches, not semantic neighbours."""
+    return (len(query_text) <= settings.search_keyword_max_chars
+            or (" " not in query_text and len(query_text) <= settings.search_keyword_max_word_chars))
+
+
+def _lexical_profiles(hits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Give lexical hits a 0-1 similarity_score relative to the best hit."""
+    top = hits[0]["lexical_score"] if hits else 1.0
+    return [{**hit, "similarity_score": hit["lexical_score"] / top} for hit in hits]
+
+
 @api_router.get("/search-profiles")
 async def search_profiles(
     q: str,
     search_type: Literal["intro", "interests"] = "intro",
     limit: int = 10
 ):
-    """Search profiles by text query using embedding similarity."""
+    """Search profiles: BM25 over a local n-gram index, fused with embedding similarity.
+
+    Both sides look at the fields `search_type` names. Keyword-like
+    queries are answered from the local index alone; longer ones merge
+    both rankings with reciprocal rank fusion.
+    """
     if not q or len(q.strip()) < 2:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="검색어는 2글자 이상 입력해주세요."
         )
-    
+
     query_text = q.strip()
-    vector = embedding_service.embed_member(query_text)
-    
-    if not vector:
+    if not profile_search_index.built:
+        await asyncio.to_thread(profile_search_index.rebuild)
+    lexical_hits = profile_search_index.search(query_text, limit * 3,
+                                               SEARCH_VISIBILITY, search_type)
+
+    if lexical_hits and _is_keyword_query(query_text):
+        return {
+            "profiles": _lexical_profiles(lexical_hits[:limit]),
+            "query": query_text,
+            "search_type": search_type,
+            "served_by": "lexical",
+        }
+
+    # `interests` vectors are composed from term embeddings, so the query
+    # has to be built the same way to land in that space.
+    embed_query = (interest_vocabulary.query_vector if search_type == "interests"
+                   else embedding_service.embed_member)
+    try:
+        vector = await asyncio.to_thread(embed_query, query_text)
+    except Exception as e:
+        logger.error(f"Search query embedding failed: {e}")
+        vector = None
+    if not vector and not lexical_hits:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="임베딩 생성에 실패했습니다."
         )
-    
-    namespace = search_type
-    matches = pinecone_service.query_by_vector(
-        vector=vector,
-        top_k=limit,
-        namespace=namespace
-    )
-    
-    if not matches:
+
+    vector_profiles: List[Dict[str, Any]] = []
+    if vector:
+        vector_profiles, _ = await _eligible_profiles(
+            lambda top_k: pinecone_service.query_by_vector(
+                vector=vector, top_k=top_k, namespace=search_type,
+                visibility=SEARCH_VISIBILITY),
+            "id", SEARCH_VISIBILITY, limit)
+
+    if not vector_profiles and not lexical_hits:
         return {
             "profiles": [],
             "query": query_text,
             "search_type": search_type,
             "message": "검색 결과가 없습니다."
         }
-    
-    profiles = []
-    for match in matches:
-        profile = supabase_service.fetch_profile(match["id"])
-        if profile and profile.get("visibility") in ["public", "members"]:
-            profiles.append({
-                **profile,
-                "similarity_score": match["score"],
-            })
-    
+
+    by_id: Dict[str, Dict[str, Any]] = {
+        str(p["kakao_id"]): p for p in _lexical_profiles(lexical_hits)
+    }
+    for profile in vector_profiles:
+        key = str(profile["kakao_id"])
+        by_id[key] = {**by_id.get(key, {}), **profile}
+    fused = reciprocal_rank_fusion(
+        [str(p["kakao_id"]) for p in vector_profiles],
+        [str(p["kakao_id"]) for p in lexical_hits],
+    )
+    profiles = [{**by_id[doc_id], "fusion_score": score}
+                for doc_id, score in fused[:limit]]
+
     return {
         "profiles": profiles,
         "query": query_text,
-        "search_type": search_type
+        "search_type": search_type,
+        "served_by": "hybrid" if vector_profiles and lexical_hits else
+        ("vector" if vector_profiles else "lexical"),
     }
 
 
+@api_router.get("/interests/search")
+async def search_interest(term: str, limit: int = 20,
+                          user: SessionUser | None = Depends(optional_user)):
+    """Profiles sharing an interest chip, then those with semantically close interests.
+
+    Known terms take their vector from the interest vocabulary, so popular
+    chips are answered without any embedding call. Signed-in members may
+    search unknown terms too; those are embedded through query_vector(),
+    which never adds them to the vocabulary. Anonymous callers only see
+    public profiles and only get related results for known terms.
+    """
+    term = InterestVocabulary.normalize_term(term)
+    if not term:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="term_required")
+    limit = max(1, min(limit, 50))
+    visibility = SEARCH_VISIBILITY if user else ["public"]
+    if not profile_search_index.built:
+        await asyncio.to_thread(profile_search_index.rebuild)
+    exact = [{**p, "similarity_score": 1.0, "exact_match": True}
+             for p in profile_search_index.holders(term, visibility)]
+
+    related: List[Dict[str, Any]] = []
+    if len(exact) < limit:
+        lookup = interest_vocabulary.query_vector if user else interest_vocabulary.known_vector
+        try:
+            vector = await asyncio.to_thread(lookup, term)
+        except Exception as e:
+            logger.error(f"Interest term embedding failed: {e}")
+            vector = None
+        if vector:
+            related, _ = await _eligible_profiles(
+                lambda top_k: pinecone_service.query_by_vector(
+                    vector=vector, top_k=top_k, namespace="interests",
+                    visibility=visibility),
+                "id", visibility, limit)
+
+    seen = {str(p["kakao_id"]) for p in exact}
+    profiles = exact + [p for p in related if str(p["kakao_id"]) not in seen]
+    return {"profiles": profiles[:limit], "term": term,
+            "exact_count": len(exact)}
+
+
 MAFIA42_ROLES = {
     "마피아팀":
     ["마피아", "스파이", "짐승인간", "마담", "도둑", "마녀", "과학자", "사기꾼", "청부업자", "악인"],
@@ -1291,21 +1819,6 @@ MAFIA42_ROLES = {
     "교주팀": ["교주", "광신도"],
 }
 
-TEAM_NAME_MAP = {
-    "citizen": "시민팀",
-    "mafia": "마피아팀",
-    "cult": "교주팀",
-    "시민": "시민팀",
-    "마피아": "마피아팀",
-    "교주": "교주팀",
-}
-
-
-def _convert_team_name(team: str) -> str:
-    """Convert English team name to Korean team name."""
-    return TEAM_NAME_MAP.get(team, team if "팀" in team else f"{team}팀")
-
-
 class RoleAssignmentPayload(BaseModel):
     name: str = ""
     tagline: str = ""
@@ -1314,19 +1827,8 @@ class RoleAssignmentPayload(BaseModel):
     strengths: List[str] = Field(default_factory=list)
 
 
-@api_router.post("/role-assignment")
-async def assign_mafia_role(payload: RoleAssignmentPayload,
-                            user: SessionUser = Depends(get_current_user)):
-    from openai import OpenAI
-
-    openai_key = settings.openai_api_key
-    if not openai_key:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                            detail="openai_not_configured")
-
-    client = OpenAI(api_key=openai_key)
-
-    profile_text = f"""
+def _role_profile_text(payload: RoleAssignmentPayload) -> str:
+    return f"""
 이름: {payload.name}
 한 줄 소개: {payload.tagline}
 자기소개: {payload.intro}
@@ -1334,168 +1836,331 @@ async def assign_mafia_role(payload: RoleAssignmentPayload,
 특기: {', '.join(payload.strengths)}
 """
 
-    user_profile = supabase_service.fetch_profile(user.kakao_id)
+
+def _fixed_role_job(kakao_id: str) -> Optional[Dict[str, Any]]:
+    """The admin-pinned job for this user, if any.
+
+    A pinned name missing from the job catalog comes back with its
+    `reasoning` already set, since there is no story to reason over.
+    """
+    user_profile = supabase_service.fetch_profile(kakao_id)
     fixed_role = user_profile.get("fixed_role") if user_profile else None
+    if not fixed_role:
+        return None
+
+    catalog = local_job_matcher.ensure_catalog()
+    job_data = catalog.named(fixed_role)
+    if not job_data:
+        return {
+            "team": "시민팀",
+            "role": fixed_role,
+            "code": "",
+            "reasoning": f"관리자가 특별히 배정한 직업: {fixed_role}",
+            "similarity_score": 1.0,
+            "fixed": True,
+        }
+    return {
+        "team": catalog.team_name(job_data),
+        "role": job_data.get("name", fixed_role),
+        "code": str(job_data.get("code", "")),
+        "story": job_data.get("story", ""),
+        "similarity_score": 1.0,
+        "fixed": True,
+    }
 
-    if fixed_role:
-        jobs = supabase_service.fetch_mafia42_jobs()
-        job_data = next((j for j in jobs if j.get("name") == fixed_role), None)
 
-        if job_data:
-            job_name = job_data.get("name", fixed_role)
-            job_team = _convert_team_name(job_data.get("team", "citizen"))
-            job_story = job_data.get("story", "")
-            job_code = str(job_data.get("code", ""))
+def _catalog_job(job_data: Dict[str, Any], score: float) -> Dict[str, Any]:
+    return {
+        "team": local_job_matcher.catalog.team_name(job_data),
+        "role": job_data.get("name", "시민"),
+        "code": str(job_data.get("code", "")),
+        "story": job_data.get("story", ""),
+        "similarity_score": score,
+    }
 
-            system_prompt = f"""당신은 마피아42 게임의 직업 배정 전문가입니다.
-사용자의 프로필과 배정된 직업의 스토리를 바탕으로, 왜 이 직업이 어울리는지 재미있고 친근하게 설명해주세요.
 
-배정된 직업: {job_name} ({job_team})
-직업 스토리: {job_story}
+async def _match_job(profile_text: str, deadline: Deadline,
+                     served_by: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    """Nearest Mafia42 job to the text, degrading stage by stage within the budget.
 
-2-3문장으로 왜 이 직업이 사용자에게 어울리는지 설명하세요.
-직업의 스토리와 사용자의 특징을 연결해서 작성하세요.
-"""
-            try:
-                response = client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": system_prompt
-                        },
-                        {
-                            "role": "user",
-                            "content": f"사용자 프로필:\n{profile_text}"
-                        },
-                    ],
-                    temperature=0.8,
-                    max_tokens=200,
-                )
-                reasoning = response.choices[0].message.content.strip()
-            except Exception as e:
-                logger.error(f"Fixed role reasoning error: {e}")
-                reasoning = f"당신에게 특별히 배정된 직업이에요. {job_name}으로서 멋진 활약을 기대해요!"
-
-            return {
-                "team": job_team,
-                "role": job_name,
-                "code": job_code,
-                "reasoning": reasoning,
-                "similarity_score": 1.0,
-                "fixed": True,
-            }
-        else:
-            return {
-                "team": "시민팀",
-                "role": fixed_role,
-                "code": "",
-                "reasoning": f"관리자가 특별히 배정한 직업: {fixed_role}",
-                "similarity_score": 1.0,
-                "fixed": True,
-            }
+    embedding: cache → OpenAI; match: vector store → in-memory job vectors
+    → lexical classifier; job: local catalog → match metadata → Supabase.
+    Under overload the lexical classifier answers first.
+    """
+    if not local_job_matcher.loaded:
+        _spawn(asyncio.to_thread(local_job_matcher.load))
+
+    if _role_requests_inflight >= settings.role_overload_inflight:
+        local = await asyncio.to_thread(local_job_matcher.match_text,
+                                        profile_text)
+        if local:
+            served_by.update(embedding="skipped", match="lexical")
+            return _catalog_job(local["job"], local["score"])
+
+    user_vector = embedding_service.cached(profile_text)
+    served_by["embedding"] = "cache"
+    if user_vector is None:
+        try:
+            user_vector = await deadline.call(
+                embedding_service.embed_member, profile_text,
+                cap=settings.role_embed_timeout_seconds)
+            served_by["embedding"] = "openai" if user_vector else "unavailable"
+        except Exception as e:
+            logger.warning(f"Role embedding degraded: {e!r}")
+            served_by["embedding"] = "unavailable"
 
-    user_vector = embedding_service.embed_member(profile_text)
+    if user_vector:
+        try:
+            matches = await deadline.call(
+                pinecone_service.query_by_vector, vector=user_vector, top_k=3,
+                namespace="mafia42_jobs",
+                cap=settings.role_vector_timeout_seconds)
+        except Exception as e:
+            logger.warning(f"Role vector query degraded: {e!r}")
+            matches = []
+        if matches:
+            served_by["match"] = "vector"
+            best_match = matches[0]
+            job_data = local_job_matcher.catalog.get(best_match.get("id", ""))
+            job_metadata = best_match.get("metadata", {})
+            job = _catalog_job(job_data, best_match.get("score", 0)) if job_data else {
+                "team": convert_team_name(job_metadata.get("team", "citizen")),
+                "role": job_metadata.get("name", "시민"),
+                "code": best_match.get("id", ""),
+                "story": job_metadata.get("story", ""),
+                "similarity_score": best_match.get("score", 0),
+            }
+            if not job_data and not job["story"]:
+                await _fill_job_story(job, deadline)
+            _spawn(asyncio.to_thread(local_job_matcher.record_assignment,
+                                     profile_text, str(job["code"])))
+            return job
+
+        local = await asyncio.to_thread(local_job_matcher.match_vector,
+                                        user_vector)
+        if local:
+            served_by["match"] = "local_vector"
+            return _catalog_job(local["job"], local["score"])
+
+    local = await asyncio.to_thread(local_job_matcher.match_text,
+                                    profile_text)
+    if local:
+        served_by["match"] = "lexical"
+        return _catalog_job(local["job"], local["score"])
+    return None
+
+
+async def _fill_job_story(job: Dict[str, Any], deadline: Deadline) -> None:
+    """Story for a matched job the catalog doesn't hold (not loaded yet, or newer)."""
+    try:
+        job_data = await deadline.call(
+            supabase_service.fetch_job_by_code, job["code"],
+            cap=settings.role_job_lookup_timeout_seconds)
+    except Exception as e:
+        logger.warning(f"Job story lookup degraded: {e!r}")
+        job_data = None
+    if job_data:
+        job["role"] = job_data.get("name", job["role"])
+        job["team"] = convert_team_name(job_data.get("team", "citizen"))
+        job["story"] = job_data.get("story", "")
 
-    if not user_vector:
-        return _fallback_role_assignment()
 
-    matches = pinecone_service.query_by_vector(vector=user_vector,
-                                               top_k=3,
-                                               namespace="mafia42_jobs")
+_role_requests_inflight = 0
 
-    if not matches:
-        return _fallback_role_assignment()
 
-    best_match = matches[0]
-    job_code = best_match.get("id", "")
-    job_metadata = best_match.get("metadata", {})
+@contextmanager
+def _role_request_slot():
+    """Count a role request as in flight from matching through the reasoning."""
+    global _role_requests_inflight
+    _role_requests_inflight += 1
+    try:
+        yield
+    finally:
+        _role_requests_inflight -= 1
 
-    job_name = job_metadata.get("name", "시민")
-    job_team = _convert_team_name(job_metadata.get("team", "citizen"))
-    job_story = job_metadata.get("story", "")
 
-    if not job_story:
-        job_data = supabase_service.fetch_job_by_code(job_code)
-        if job_data:
-            job_name = job_data.get("name", job_name)
-            job_team = _convert_team_name(job_data.get("team", "citizen"))
-            job_story = job_data.get("story", "")
+async def _resolve_role_job(kakao_id: Optional[str], match_text: str,
+                            deadline: Deadline,
+                            served_by: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    if kakao_id:
+        try:
+            job = await deadline.call(
+                _fixed_role_job, kakao_id,
+                cap=settings.role_job_lookup_timeout_seconds)
+        except Exception as e:
+            logger.warning(f"Fixed role lookup degraded: {e!r}")
+            job = None
+        if job:
+            served_by["match"] = "fixed"
+            return job
+    return await _match_job(match_text, deadline, served_by)
+
+
+def _role_summary(job: Dict[str, Any]) -> Dict[str, Any]:
+    summary = {
+        "team": job["team"],
+        "role": job["role"],
+        "code": job["code"],
+        "similarity_score": job["similarity_score"],
+    }
+    if job.get("fixed"):
+        summary["fixed"] = True
+    return summary
 
-    system_prompt = f"""당신은 마피아42 게임의 직업 배정 전문가입니다.
-사용자의 프로필과 배정된 직업의 스토리를 바탕으로, 왜 이 직업이 어울리는지 재미있고 친근하게 설명해주세요.
 
-배정된 직업: {job_name} ({job_team})
-직업 스토리: {job_story}
+def _templated_reasoning(job: Dict[str, Any], audience: str) -> str:
+    """Reasoning without the LLM, built from the job's own story."""
+    if job.get("fixed"):
+        return f"당신에게 특별히 배정된 직업이에요. {job['role']}으로서 멋진 활약을 기대해요!"
+    ending = "잘 어울려!" if audience == "mafbti" else "잘 어울려요!"
+    story = " ".join((job.get("story") or "").split())
+    first_sentence = re.split(r"(?<=[.!?。])\s", story, maxsplit=1)[0][:80]
+    if first_sentence:
+        return f"{first_sentence} 이런 {job['role']}의 모습이 당신의 특성과 {ending}"
+    return f"당신의 특성이 {job['role']}과(와) {ending}"
 
-2-3문장으로 왜 이 직업이 사용자에게 어울리는지 설명하세요.
-직업의 스토리와 사용자의 특징을 연결해서 작성하세요.
-"""
 
+async def _role_reasoning(job: Dict[str, Any], user_text: str, audience: str,
+                          deadline: Deadline, served_by: Dict[str, str]) -> str:
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {
-                    "role": "system",
-                    "content": system_prompt
-                },
-                {
-                    "role": "user",
-                    "content": f"사용자 프로필:\n{profile_text}"
-                },
-            ],
-            temperature=0.8,
-            max_tokens=200,
-        )
+        reasoning = await deadline.wait(
+            role_reasoning_service.reason_cached(job, user_text, audience))
+        served_by["reasoning"] = "llm"
+        return reasoning
+    except Exception as e:
+        logger.error(f"Role reasoning generation error ({audience}): {e!r}")
+        served_by["reasoning"] = "template"
+        return _templated_reasoning(job, audience)
+
+
+async def _role_response(job: Optional[Dict[str, Any]], user_text: str,
+                         seed_text: str, audience: str, deadline: Deadline,
+                         served_by: Dict[str, str]) -> Dict[str, Any]:
+    if not job:
+        return _fallback_role_assignment(seed_text, audience, served_by)
+    if job.get("reasoning"):
+        served_by["reasoning"] = "admin"
+        reasoning = job["reasoning"]
+    elif served_by.get("embedding") == "skipped":
+        # Overload fast path: stay off the network for the reasoning too.
+        served_by["reasoning"] = "template"
+        reasoning = _templated_reasoning(job, audience)
+    else:
+        reasoning = await _role_reasoning(job, user_text, audience, deadline,
+                                          served_by)
+    return {**_role_summary(job), "reasoning": reasoning, "served_by": served_by}
+
+
+async def _role_event_stream(resolve_job, user_text: str, seed_text: str,
+                             audience: str, deadline: Deadline,
+                             served_by: Dict[str, str]):
+    """SSE frames: the matched `role` first, then reasoning `token`s, then `done`."""
+    with _role_request_slot():
+        async with aclosing(_role_events(resolve_job, user_text, seed_text,
+                                         audience, deadline, served_by)) as frames:
+            async for frame in frames:
+                yield frame
+
+
+async def _role_events(resolve_job, user_text: str, seed_text: str,
+                       audience: str, deadline: Deadline,
+                       served_by: Dict[str, str]):
+    job = await resolve_job()
+    if not job or job.get("reasoning") or served_by.get("embedding") == "skipped":
+        result = await _role_response(job, user_text, seed_text, audience,
+                                      deadline, served_by)
+        yield _sse_event({k: v for k, v in result.items() if k != "reasoning"}, "role")
+        yield _sse_event(result, "done")
+        return
+
+    yield _sse_event(_role_summary(job), "role")
+    parts: List[str] = []
+    tokens = role_reasoning_service.stream_cached(job, user_text, audience)
+    try:
+        while True:
+            try:
+                delta = await deadline.wait(tokens.__anext__())
+            except StopAsyncIteration:
+                break
+            parts.append(delta)
+            yield _sse_event({"text": delta}, "token")
+        reasoning = "".join(parts).strip()
+        served_by["reasoning"] = "llm"
+    except Exception as e:
+        logger.error(f"Role reasoning stream error ({audience}): {e!r}")
+        reasoning = _templated_reasoning(job, audience)
+        served_by["reasoning"] = "template"
+    finally:
+        await tokens.aclose()
+    yield _sse_event({**_role_summary(job), "reasoning": reasoning,
+                      "served_by": served_by}, "done")
 
-        reasoning = response.choices[0].message.content.strip()
 
-        return {
-            "team": job_team,
-            "role": job_name,
-            "code": job_code,
-            "reasoning": reasoning,
-            "similarity_score": best_match.get("score", 0),
-        }
-    except Exception as e:
-        logger.error(f"Role reasoning generation error: {e}")
-        return {
-            "team": job_team,
-            "role": job_name,
-            "code": job_code,
-            "reasoning": f"당신의 특성이 {job_name}과(와) 잘 어울려요!",
-            "similarity_score": best_match.get("score", 0),
-        }
+@api_router.post("/role-assignment")
+async def assign_mafia_role(payload: RoleAssignmentPayload,
+                            user: SessionUser = Depends(get_current_user)):
+    if not settings.openai_api_key:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                            detail="openai_not_configured")
 
+    deadline = Deadline(settings.role_assignment_budget_seconds)
+    served_by: Dict[str, str] = {}
+    profile_text = _role_profile_text(payload)
+    with _role_request_slot():
+        job = await _resolve_role_job(user.kakao_id, profile_text, deadline,
+                                      served_by)
+        return await _role_response(job, profile_text, profile_text, "profile",
+                                    deadline, served_by)
 
-def _fallback_role_assignment():
-    """Fallback when vector search fails."""
-    import random
-    fallback_roles = [
-        {
-            "team": "시민팀",
-            "role": "시민",
-            "code": "citizen"
-        },
-        {
-            "team": "시민팀",
-            "role": "경찰",
-            "code": "police"
-        },
-        {
-            "team": "시민팀",
-            "role": "의사",
-            "code": "doctor"
-        },
-    ]
-    chosen = random.choice(fallback_roles)
+
+@api_router.post("/role-assignment/stream")
+async def stream_mafia_role(payload: RoleAssignmentPayload,
+                            user: SessionUser = Depends(get_current_user)):
+    if not settings.openai_api_key:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                            detail="openai_not_configured")
+
+    deadline = Deadline(settings.role_assignment_budget_seconds)
+    served_by: Dict[str, str] = {}
+    profile_text = _role_profile_text(payload)
+    return _sse_response(
+        _role_event_stream(
+            lambda: _resolve_role_job(user.kakao_id, profile_text, deadline,
+                                      served_by),
+            profile_text, profile_text, "profile", deadline, served_by),
+        "role_assignment_failed")
+
+
+FALLBACK_ROLES = [
+    {
+        "team": "시민팀",
+        "role": "시민",
+        "code": "citizen"
+    },
+    {
+        "team": "시민팀",
+        "role": "경찰",
+        "code": "police"
+    },
+    {
+        "team": "시민팀",
+        "role": "의사",
+        "code": "doctor"
+    },
+]
+
+
+def _fallback_role_assignment(seed_text: str = "", audience: str = "profile",
+                              served_by: Optional[Dict[str, str]] = None):
+    """Last resort when no job could be matched: a stable pick for the same text."""
+    digest = hashlib.sha256(seed_text.encode()).digest()
+    chosen = FALLBACK_ROLES[digest[0] % len(FALLBACK_ROLES)]
+    job = {**chosen, "similarity_score": 0}
+    served_by = {**(served_by or {}), "match": "default", "reasoning": "template"}
     return {
-        "team": chosen["team"],
-        "role": chosen["role"],
-        "code": chosen["code"],
-        "reasoning": "직업 매칭 서비스를 준비 중이에요. 일단 멋진 역할을 배정해드렸어요!",
-        "similarity_score": 0,
+        **_role_summary(job),
+        "reasoning": _templated_reasoning(job, audience),
+        "served_by": served_by,
     }
 
 
@@ -1506,90 +2171,34 @@ class MafBTIPayload(BaseModel):
 @api_router.post("/mafbti")
 async def mafbti_role_assignment(payload: MafBTIPayload):
     """Public MafBTI endpoint - no authentication required."""
-    from openai import OpenAI
-
-    openai_key = settings.openai_api_key
-    if not openai_key:
+    if not settings.openai_api_key:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                             detail="openai_not_configured")
 
-    client = OpenAI(api_key=openai_key)
-
-    profile_text = f"자기소개: {payload.intro}"
-
-    user_vector = embedding_service.embed_member(profile_text)
-
-    if not user_vector:
-        return _fallback_role_assignment()
-
-    matches = pinecone_service.query_by_vector(vector=user_vector,
-                                               top_k=3,
-                                               namespace="mafia42_jobs")
-
-    if not matches:
-        return _fallback_role_assignment()
-
-    best_match = matches[0]
-    job_code = best_match.get("id", "")
-    job_metadata = best_match.get("metadata", {})
-
-    job_name = job_metadata.get("name", "시민")
-    job_team = _convert_team_name(job_metadata.get("team", "citizen"))
-    job_story = job_metadata.get("story", "")
-
-    if not job_story:
-        job_data = supabase_service.fetch_job_by_code(job_code)
-        if job_data:
-            job_name = job_data.get("name", job_name)
-            job_team = _convert_team_name(job_data.get("team", "citizen"))
-            job_story = job_data.get("story", "")
-
-    system_prompt = f"""당신은 마피아42 게임의 직업 배정 전문가입니다.
-사용자의 자기소개와 배정된 직업의 스토리를 바탕으로, 왜 이 직업이 어울리는지 재미있고 친근하게 설명해주세요.
+    deadline = Deadline(settings.mafbti_budget_seconds)
+    served_by: Dict[str, str] = {}
+    match_text = f"자기소개: {payload.intro}"
+    with _role_request_slot():
+        job = await _resolve_role_job(None, match_text, deadline, served_by)
+        return await _role_response(job, payload.intro, match_text, "mafbti",
+                                    deadline, served_by)
 
-배정된 직업: {job_name} ({job_team})
-직업 스토리: {job_story}
 
-2-3문장으로 왜 이 직업이 사용자에게 어울리는지 설명하세요.
-직업의 스토리와 사용자의 특징을 연결해서 작성하세요.
-반말로 친근하게 작성하세요.
-"""
-
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {
-                    "role": "system",
-                    "content": system_prompt
-                },
-                {
-                    "role": "user",
-                    "content": f"사용자 자기소개:\n{payload.intro}"
-                },
-            ],
-            temperature=0.8,
-            max_tokens=200,
-        )
-
-        reasoning = response.choices[0].message.content.strip()
+@api_router.post("/mafbti/stream")
+async def stream_mafbti_role(payload: MafBTIPayload):
+    """Streaming MafBTI: the job is sent as soon as it is matched, then the reasoning."""
+    if not settings.openai_api_key:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                            detail="openai_not_configured")
 
-        return {
-            "team": job_team,
-            "role": job_name,
-            "code": job_code,
-            "reasoning": reasoning,
-            "similarity_score": best_match.get("score", 0),
-        }
-    except Exception as e:
-        logger.error(f"MafBTI reasoning generation error: {e}")
-        return {
-            "team": job_team,
-            "role": job_name,
-            "code": job_code,
-            "reasoning": f"당신의 특성이 {job_name}과(와) 잘 어울려!",
-            "similarity_score": best_match.get("score", 0),
-        }
+    deadline = Deadline(settings.mafbti_budget_seconds)
+    served_by: Dict[str, str] = {}
+    match_text = f"자기소개: {payload.intro}"
+    return _sse_response(
+        _role_event_stream(
+            lambda: _resolve_role_job(None, match_text, deadline, served_by),
+            payload.intro, match_text, "mafbti", deadline, served_by),
+        "role_assignment_failed")
 
 
 # Include API router with /api prefix
@@ -0,0 +1,522 @@
+import asyncio
+import json
+import logging
+import threading
+from datetime import date, datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+from uuid import UUID
+
+try:
+    import asyncpg
+except ImportError:  # optional: only needed when STORAGE_BACKEND=postgres
+    asyncpg = None
+
+from .config import settings
+
+logger = logging.getLogger("farewell-party.postgres")
+
+T = TypeVar("T")
+
+
+def _jsonable(value: Any) -> Any:
+    """Match the value shapes PostgREST returns (ISO timestamps, string ids)."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+def _row_to_dict(row: Any) -> Dict[str, Any]:
+    return {key: _jsonable(value) for key, value in row.items()}
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+class PostgresPool:
+    """asyncpg connection pool driven from a dedicated event loop thread.
+
+    The rest of the services are synchronous (the supabase client blocks on
+    HTTP), so callers submit coroutines through run() and wait for the result.
+    Every query below is a fixed SQL string, which lets asyncpg's per-connection
+    statement cache prepare it once and reuse the server-side prepared
+    statement on every later call.
+    """
+
+    def __init__(self, dsn: str, min_size: int, max_size: int,
+                 statement_cache_size: int) -> None:
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.statement_cache_size = statement_cache_size
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pool: Any = None
+        self._lock = threading.Lock()
+        self._warned_on_loop = False
+
+    def _ensure_started(self) -> None:
+        if self._pool is not None:
+            return
+        with self._lock:
+            if self._pool is not None:
+                return
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever,
+                             name="postgres-pool",
+                             daemon=True).start()
+            future = asyncio.run_coroutine_threadsafe(
+                asyncpg.create_pool(
+                    self.dsn,
+                    min_size=self.min_size,
+                    max_size=self.max_size,
+                    statement_cache_size=self.statement_cache_size,
+                    init=self._init_connection,
+                ), loop)
+            self._pool = future.result(timeout=30)
+            self._loop = loop
+            logger.info("Postgres pool ready (min=%s, max=%s)", self.min_size,
+                        self.max_size)
+
+    @staticmethod
+    async def _init_connection(conn: Any) -> None:
+        for type_name in ("json", "jsonb"):
+            await conn.set_type_codec(type_name,
+                                      encoder=json.dumps,
+                                      decoder=json.loads,
+                                      schema="pg_catalog")
+
+    def run(self, func: Callable[[Any], Awaitable[T]],
+            timeout: Optional[float] = None) -> T:
+        """Run func(pool) on the pool's loop and block for its result.
+
+        Blocking: async code must call this (and every service method built
+        on it) through asyncio.to_thread, never on the request event loop.
+        """
+        if not self._warned_on_loop and _on_event_loop():
+            self._warned_on_loop = True
+            logger.warning("PostgresPool.run() called on a running event loop; "
+                           "wrap the call in asyncio.to_thread.", stack_info=True)
+        self._ensure_started()
+        future = asyncio.run_coroutine_threadsafe(func(self._pool), self._loop)
+        return future.result(timeout)
+
+    def fetch(self, sql: str, *args: Any) -> List[Dict[str, Any]]:
+        rows = self.run(lambda pool: pool.fetch(sql, *args))
+        return [_row_to_dict(row) for row in rows]
+
+    def fetchrow(self, sql: str, *args: Any) -> Optional[Dict[str, Any]]:
+        row = self.run(lambda pool: pool.fetchrow(sql, *args))
+        return _row_to_dict(row) if row is not None else None
+
+    def fetchval(self, sql: str, *args: Any) -> Any:
+        return self.run(lambda pool: pool.fetchval(sql, *args))
+
+    def execute(self, sql: str, *args: Any) -> str:
+        return self.run(lambda pool: pool.execute(sql, *args))
+
+    def listen(self, channel: str, callback: Callable[[str], None]) -> Any:
+        """Open a dedicated LISTEN connection; callback(payload) runs on the pool's loop.
+
+        Returns the connection so the caller can watch is_closed() and
+        reconnect; pooled connections cannot hold a LISTEN.
+        """
+        async def connect(_pool: Any) -> Any:
+            conn = await asyncpg.connect(
+                self.dsn, statement_cache_size=self.statement_cache_size)
+            await conn.add_listener(
+                channel, lambda _conn, _pid, _channel, payload: callback(payload))
+            return conn
+
+        return self.run(connect, timeout=30)
+
+    def close(self) -> None:
+        if self._pool is None:
+            return
+        try:
+            self.run(lambda pool: pool.close(), timeout=10)
+        except Exception as e:
+            logger.error(f"Error closing Postgres pool: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._pool = None
+        self._loop = None
+
+
+PUBLIC_FEED_COLUMNS = (
+    "kakao_id,name,tagline,intro,interests,strengths,visibility,"
+    "profile_image,display_order,updated_at")
+MEMBER_FEED_COLUMNS = (
+    "kakao_id,name,tagline,intro,interests,strengths,contact,want_to_talk_to,"
+    "visibility,profile_image,display_order,updated_at")
+
+SQL_FETCH_PROFILE = "SELECT * FROM member_profiles WHERE kakao_id = $1 LIMIT 1"
+SQL_RECORD_LOGIN = (
+    "INSERT INTO member_profiles (kakao_id, name, tagline, intro, interests, "
+    "strengths, contact, visibility, profile_image, updated_at) "
+    "VALUES ($1, $2, '', '', '{}', '{}', '', 'public', NULLIF($3, ''), now()) "
+    "ON CONFLICT (kakao_id) DO UPDATE "
+    "SET profile_image = EXCLUDED.profile_image, updated_at = now() "
+    "WHERE EXCLUDED.profile_image IS NOT NULL "
+    "AND member_profiles.profile_image IS DISTINCT FROM EXCLUDED.profile_image "
+    "RETURNING (xmax = 0) AS inserted")
+SQL_COUNT_PROFILES = "SELECT count(*) FROM member_profiles"
+SQL_PUBLIC_FEED = (
+    f"SELECT {PUBLIC_FEED_COLUMNS} FROM member_profiles "
+    "WHERE visibility = 'public' "
+    "ORDER BY display_order ASC NULLS LAST, updated_at DESC LIMIT $1")
+SQL_MEMBER_FEED = (
+    f"SELECT {MEMBER_FEED_COLUMNS} FROM member_profiles "
+    "WHERE visibility IN ('public', 'members') "
+    "ORDER BY display_order ASC NULLS LAST, updated_at DESC LIMIT $1")
+SQL_SENT_LETTERS = ("SELECT * FROM personal_messages WHERE sender_kakao_id = $1 "
+                    "ORDER BY created_at DESC")
+SQL_RECEIVED_LETTERS = (
+    "SELECT * FROM personal_messages "
+    "WHERE kakao_id = $1 AND sender_kakao_id IS NOT NULL "
+    "ORDER BY created_at DESC")
+SQL_PUBLIC_LETTERS = "SELECT * FROM public_letters ORDER BY created_at DESC"
+# The id parameter arrives as text; it is cast to the column's own type
+# (looked up once) so the lookup stays on the primary-key index.
+SQL_FETCH_CONVERSATION = "SELECT * FROM conversations WHERE id = $1::text::{id_type} LIMIT 1"
+SQL_COLUMN_TYPE = (
+    "SELECT format_type(atttypid, atttypmod) FROM pg_attribute "
+    "WHERE attrelid = to_regclass($1) AND attname = $2 AND NOT attisdropped")
+SQL_LIST_CONVERSATIONS = (
+    "SELECT * FROM conversations "
+    "WHERE creator_id = $1 "
+    "OR speakers @> jsonb_build_array($1::text) "
+    "OR listeners @> jsonb_build_array($1::text) "
+    "ORDER BY date DESC")
+
+
+class PostgresStorageBackend:
+    """Hot read paths of SupabaseService served straight from Postgres.
+
+    Only the queries that run on every page view live here; everything else
+    keeps going through PostgREST. Return shapes mirror the PostgREST results
+    so SupabaseService can swap between the two transparently.
+    """
+
+    def __init__(self, pool: PostgresPool) -> None:
+        self.pool = pool
+        self._sql_fetch_conversation: Optional[str] = None
+
+    def fetch_profile(self, kakao_id: str) -> Optional[Dict[str, Any]]:
+        return self.pool.fetchrow(SQL_FETCH_PROFILE, kakao_id)
+
+    def record_login(self, kakao_id: str, nickname: str,
+                     profile_image_url: str) -> Dict[str, Any]:
+        # No row back means the member exists and the image is unchanged.
+        row = self.pool.fetchrow(SQL_RECORD_LOGIN, kakao_id, nickname,
+                                 profile_image_url or "")
+        if row is None:
+            return {"created": False, "updated": False}
+        return {"created": bool(row["inserted"]),
+                "updated": not row["inserted"]}
+
+    def count_profiles(self) -> int:
+        return int(self.pool.fetchval(SQL_COUNT_PROFILES) or 0)
+
+    def fetch_public_profiles(self, limit: int) -> List[Dict[str, Any]]:
+        return self.pool.fetch(SQL_PUBLIC_FEED, limit)
+
+    def fetch_member_visible_profiles(self,
+                                      limit: int) -> List[Dict[str, Any]]:
+        return self.pool.fetch(SQL_MEMBER_FEED, limit)
+
+    def fetch_sent_letters(self, sender_kakao_id: str) -> List[Dict[str, Any]]:
+        return self.pool.fetch(SQL_SENT_LETTERS, sender_kakao_id)
+
+    def fetch_received_letters(
+            self, recipient_kakao_id: str) -> List[Dict[str, Any]]:
+        return self.pool.fetch(SQL_RECEIVED_LETTERS, recipient_kakao_id)
+
+    def fetch_public_letters(self) -> List[Dict[str, Any]]:
+        return self.pool.fetch(SQL_PUBLIC_LETTERS)
+
+    def fetch_conversation(self, conv_id: str) -> Optional[Dict[str, Any]]:
+        if self._sql_fetch_conversation is None:
+            id_type = self.pool.fetchval(SQL_COLUMN_TYPE, "conversations", "id")
+            self._sql_fetch_conversation = SQL_FETCH_CONVERSATION.format(
+                id_type=id_type or "text")
+        return self.pool.fetchrow(self._sql_fetch_conversation, conv_id)
+
+    def list_conversations(self, kakao_id: str) -> List[Dict[str, Any]]:
+        return self.pool.fetch(SQL_LIST_CONVERSATIONS, kakao_id)
+
+
+_postgres_pool: Optional[PostgresPool] = None
+
+
+def get_postgres_pool() -> Optional[PostgresPool]:
+    """Shared pool for every Postgres-backed service, or None if unavailable."""
+    global _postgres_pool
+    if _postgres_pool is not None:
+        return _postgres_pool
+    if asyncpg is None:
+        logger.warning("asyncpg not installed; direct Postgres access disabled.")
+        return None
+    if not settings.database_url:
+        logger.warning("DATABASE_URL missing; direct Postgres access disabled.")
+        return None
+    _postgres_pool = PostgresPool(
+        settings.database_url,
+        min_size=settings.database_pool_min_size,
+        max_size=settings.database_pool_max_size,
+        statement_cache_size=settings.database_statement_cache_size,
+    )
+    return _postgres_pool
+
+
+def close_postgres_pool() -> None:
+    if _postgres_pool is not None:
+        _postgres_pool.close()
+
+
+class PgVectorService:
+    """Vector storage in Postgres (pgvector) with the PineconeService interface.
+
+    Pinecone namespaces map to a `namespace` column of one embeddings table.
+    Member namespaces are LEFT JOINed with member_profiles, so a single query
+    returns visible top-k profiles together with their rows (`profile` key on
+    each match) instead of a Pinecone round trip plus one fetch per hit.
+    Vectors are indexed with HNSW over a halfvec cast because pgvector caps
+    indexed `vector` columns at 2000 dimensions. Farthest-first queries
+    (query_different) cannot use that index and scan the namespace exactly.
+    """
+
+    def __init__(self, pool: PostgresPool, dimension: int) -> None:
+        self.index: Optional[PostgresPool] = pool
+        self.pool = pool
+        self.dimension = dimension
+        self._schema_ready = False
+        self._iterative_scan = False
+        self._half = f"halfvec({dimension})"
+
+    def _ensure_schema(self) -> None:
+        if self._schema_ready:
+            return
+
+        async def create(pool: Any) -> None:
+            async with pool.acquire() as conn:
+                await conn.execute("CREATE EXTENSION IF NOT EXISTS vector")
+                await conn.execute(f"""
+                    CREATE TABLE IF NOT EXISTS member_embeddings (
+                        namespace text NOT NULL,
+                        id text NOT NULL,
+                        embedding vector({self.dimension}) NOT NULL,
+                        metadata jsonb NOT NULL DEFAULT '{{}}'::jsonb,
+                        updated_at timestamptz NOT NULL DEFAULT now(),
+                        PRIMARY KEY (namespace, id)
+                    )""")
+                await conn.execute(f"""
+                    CREATE INDEX IF NOT EXISTS member_embeddings_hnsw
+                    ON member_embeddings
+                    USING hnsw ((embedding::{self._half}) halfvec_cosine_ops)""")
+                return await conn.fetchval(
+                    "SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+
+        version = self.pool.run(create, timeout=60) or "0"
+        # pgvector 0.8 can keep scanning the graph until the WHERE clause is
+        # satisfied; older versions stop after ef_search candidates.
+        self._iterative_scan = tuple(int(p) for p in version.split(".")[:2]
+                                     if p.isdigit()) >= (0, 8)
+        self._schema_ready = True
+
+    @staticmethod
+    def _literal(vector: List[float]) -> str:
+        return "[" + ",".join(repr(float(v)) for v in vector) + "]"
+
+    @staticmethod
+    def _match(row: Dict[str, Any], id_key: str) -> Dict[str, Any]:
+        profile = row.get("profile")
+        metadata = row.get("metadata") or {}
+        return {
+            id_key: row["id"],
+            "score": float(row["score"]),
+            "metadata": metadata,
+            "profile": profile,
+            "visibility": (profile or metadata).get("visibility"),
+        }
+
+    def upsert_embedding(self, member_id: str, vector: List[float],
+                         metadata: Dict[str, Any], namespace: str = "") -> Dict[str, Any]:
+        try:
+            self._ensure_schema()
+            self.pool.execute(
+                f"""INSERT INTO member_embeddings (namespace, id, embedding, metadata)
+                    VALUES ($1, $2, $3::vector({self.dimension}), $4::jsonb)
+                    ON CONFLICT (namespace, id) DO UPDATE
+                    SET embedding = EXCLUDED.embedding,
+                        metadata = EXCLUDED.metadata,
+                        updated_at = now()""",
+                namespace, member_id, self._literal(vector), metadata)
+            return {"upserted_count": 1, "namespace": namespace}
+        except Exception as e:
+            logger.error(f"pgvector upsert error for {member_id}: {e}")
+            return {"skipped": True, "reason": f"upsert_error: {str(e)[:100]}"}
+
+    def upsert_many(self, items: List[Dict[str, Any]],
+                    namespace: str = "") -> Dict[str, Any]:
+        try:
+            self._ensure_schema()
+            self.pool.run(lambda pool: pool.executemany(
+                f"""INSERT INTO member_embeddings (namespace, id, embedding, metadata)
+                    VALUES ($1, $2, $3::vector({self.dimension}), $4::jsonb)
+                    ON CONFLICT (namespace, id) DO UPDATE
+                    SET embedding = EXCLUDED.embedding,
+                        metadata = EXCLUDED.metadata,
+                        updated_at = now()""",
+                [(namespace, item["id"], self._literal(item["values"]),
+                  item.get("metadata") or {}) for item in items]))
+            return {"upserted_count": len(items), "namespace": namespace}
+        except Exception as e:
+            logger.error(f"pgvector batch upsert error ({len(items)} vectors): {e}")
+            return {"error": str(e)[:200]}
+
+    def list_entries(self, namespace: str = "") -> Optional[Dict[str, Dict[str, Any]]]:
+        try:
+            self._ensure_schema()
+            rows = self.pool.fetch(
+                "SELECT id, metadata FROM member_embeddings WHERE namespace = $1",
+                namespace)
+            return {row["id"]: row["metadata"] or {} for row in rows}
+        except Exception as e:
+            logger.error(f"pgvector list error for {namespace}: {e}")
+            return None
+
+    def delete_many(self, member_ids: List[str], namespace: str = "") -> Dict[str, Any]:
+        try:
+            self._ensure_schema()
+            self.pool.execute(
+                "DELETE FROM member_embeddings WHERE namespace = $1 AND id = ANY($2::text[])",
+                namespace, member_ids)
+            return {"deleted_count": len(member_ids), "namespace": namespace}
+        except Exception as e:
+            logger.error(f"pgvector delete error: {e}")
+            return {"error": str(e)[:200]}
+
+    def update_metadata(self, member_id: str, metadata: Dict[str, Any],
+                        namespace: str = "") -> Dict[str, Any]:
+        try:
+            self._ensure_schema()
+            self.pool.execute(
+                "UPDATE member_embeddings SET metadata = metadata || $3::jsonb, "
+                "updated_at = now() WHERE namespace = $1 AND id = $2",
+                namespace, member_id, metadata)
+            return {"updated": True}
+        except Exception as e:
+            logger.error(f"pgvector metadata update error for {member_id}: {e}")
+            return {"error": str(e)[:200]}
+
+    def fetch_vector(self, member_id: str, namespace: str = "") -> Optional[List[float]]:
+        try:
+            self._ensure_schema()
+            text = self.pool.fetchval(
+                "SELECT embedding::text FROM member_embeddings "
+                "WHERE namespace = $1 AND id = $2", namespace, member_id)
+            return json.loads(text) if text else None
+        except Exception as e:
+            logger.error(f"pgvector fetch error: {e}")
+            return None
+
+    def fetch_vectors(self, member_ids: List[str],
+                      namespace: str = "") -> Dict[str, List[float]]:
+        try:
+            self._ensure_schema()
+            rows = self.pool.fetch(
+                "SELECT id, embedding::text AS embedding FROM member_embeddings "
+                "WHERE namespace = $1 AND id = ANY($2::text[])",
+                namespace, member_ids)
+            return {row["id"]: json.loads(row["embedding"]) for row in rows}
+        except Exception as e:
+            logger.error(f"pgvector batch fetch error: {e}")
+            return {}
+
+    def _query(self, target_sql: str, args: List[Any], top_k: int,
+               namespace: str, exclude_id: Optional[str],
+               visibility: Optional[List[str]], farthest: bool) -> List[Dict[str, Any]]:
+        # target_sql yields the query vector as halfvec; $1..$4 are fixed slots.
+        distance = f"e.embedding::{self._half} <=> {target_sql}"
+        sql = f"""
+            SELECT e.id, 1 - ({distance}) AS score, e.metadata,
+                   to_jsonb(p) AS profile
+            FROM member_embeddings e
+            LEFT JOIN member_profiles p ON p.kakao_id = e.id
+            WHERE e.namespace = $1
+              AND ($2::text IS NULL OR e.id <> $2)
+              AND ($3::text[] IS NULL OR p.visibility = ANY($3::text[]))
+            ORDER BY {distance} {"DESC" if farthest else "ASC"}
+            LIMIT $4"""
+        self._ensure_schema()
+        if farthest:
+            # No index can serve a DESC distance order, so this is always an
+            # exact scan of the namespace (fine at member-table sizes).
+            return self.pool.fetch(sql, namespace, exclude_id, visibility,
+                                   top_k, *args)
+
+        # One HNSW index covers every namespace and the WHERE clause (namespace,
+        # exclusion, visibility) is applied to its candidates, so any query
+        # here can starve: widen the candidate list and, where supported, let
+        # the scan continue until LIMIT rows pass the filter. Without
+        # iterative scans a short result is re-run as an exact scan.
+        ef_search = max(200, min(top_k * 10, 1000))
+
+        async def scoped_query(pool: Any, exact: bool) -> List[Any]:
+            async with pool.acquire() as conn:
+                async with conn.transaction():
+                    if exact:
+                        await conn.execute("SET LOCAL enable_indexscan = off")
+                    else:
+                        await conn.execute(f"SET LOCAL hnsw.ef_search = {ef_search}")
+                        if self._iterative_scan:
+                            await conn.execute(
+                                "SET LOCAL hnsw.iterative_scan = strict_order")
+                    return await conn.fetch(sql, namespace, exclude_id,
+                                            visibility, top_k, *args)
+
+        rows = self.pool.run(lambda pool: scoped_query(pool, exact=False))
+        if len(rows) < top_k and not self._iterative_scan:
+            rows = self.pool.run(lambda pool: scoped_query(pool, exact=True))
+        return [_row_to_dict(row) for row in rows]
+
+    def query_similar(self, member_id: str, top_k: int = 10,
+                      exclude_self: bool = True, namespace: str = "",
+                      visibility: Optional[List[str]] = None,
+                      farthest: bool = False) -> List[Dict[str, Any]]:
+        target = (f"(SELECT embedding::{self._half} FROM member_embeddings "
+                  "WHERE namespace = $1 AND id = $5)")
+        try:
+            rows = self._query(target, [member_id], top_k, namespace,
+                               member_id if exclude_self else None,
+                               visibility, farthest)
+            return [self._match(row, "kakao_id") for row in rows]
+        except Exception as e:
+            logger.error(f"pgvector query error: {e}")
+            return []
+
+    def query_different(self, member_id: str, top_k: int = 10,
+                        exclude_self: bool = True, namespace: str = "",
+                        visibility: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        # Unlike Pinecone there is no need to approximate with the tail of the
+        # top-100 similar list: order by distance descending directly.
+        return self.query_similar(member_id, top_k=top_k,
+                                  exclude_self=exclude_self,
+                                  namespace=namespace, visibility=visibility,
+                                  farthest=True)
+
+    def query_by_vector(self, vector: List[float], top_k: int = 5,
+                        namespace: str = "",
+                        visibility: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        try:
+            rows = self._query(f"$5::{self._half}", [self._literal(vector)],
+                               top_k, namespace, None, visibility, False)
+            return [self._match(row, "id") for row in rows]
+        except Exception as e:
+            logger.error(f"pgvector query_by_vector error: {e}")
+            return []
@@ -1,45 +1,278 @@
+import asyncio
+import copy
+import fcntl
+import hashlib
+import itertools
+import json
 import logging
+import os
+import random
+import re
+import secrets
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Literal, Optional
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, List, Literal, Optional, TypeVar
 
 import httpx
 import numpy as np
 from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 from pinecone import Pinecone, ServerlessSpec
 from sklearn.cluster import KMeans
 from sklearn.decomposition import PCA
 from supabase import Client, create_client
 
+from .cache import TTLCache
 from .config import settings
+from .invalidation import InvalidationBus
+from .lexical import (
+    BM25Index,
+    LexicalRoleClassifier,
+    evaluate_role_classifier,
+    normalize_text,
+)
+from .postgres import PgVectorService, PostgresStorageBackend, get_postgres_pool
+from .vectors import (
+    CompactIndex,
+    VectorSnapshots,
+    VectorStore,
+    quantization_report,
+    recall_benchmark,
+    shorten,
+)
 
 logger = logging.getLogger("farewell-party.services")
 
+T = TypeVar("T")
+
 
 class SessionSigner:
 
-    def __init__(self) -> None:
+    def __init__(self, revocations_path: Optional[Path] = None) -> None:
         self.serializer = URLSafeTimedSerializer(settings.app_secret)
+        # sha256(token) -> (kakao_id, parsed session), expiring with the token.
+        self.cache = TTLCache(maxsize=settings.session_cache_size)
+        # kakao_id -> epoch milliseconds; tokens issued at or before this are
+        # rejected. Persisted so revocations survive restarts.
+        self.revocations_path = revocations_path
+        self.revoked_before: Dict[str, int] = self._read_revocations()
+        self.invalidation_bus: Optional[InvalidationBus] = None
+        self._file_lock = threading.Lock()
 
     def sign(self, payload: Dict[str, Any]) -> str:
-        return self.serializer.dumps(payload)
+        # itsdangerous' own timestamp has whole-second resolution, which cannot
+        # order a login against a revocation made in the same second.
+        return self.serializer.dumps({**payload, "iat_ms": int(time.time() * 1000)})
 
     def verify(self, token: str) -> Dict[str, Any]:
+        return self._verify(token)[0]
+
+    def _verify(self, token: str) -> tuple[Dict[str, Any], float]:
         try:
-            return self.serializer.loads(token,
-                                         max_age=settings.session_ttl_seconds)
+            payload, issued_at = self.serializer.loads(
+                token,
+                max_age=settings.session_ttl_seconds,
+                return_timestamp=True)
         except SignatureExpired as exc:
             raise ValueError("session_expired") from exc
         except BadSignature as exc:
             raise ValueError("invalid_session") from exc
+        issued_ts = issued_at.timestamp()
+        # Tokens signed before iat_ms existed only know their second; treat
+        # them as issued at its start, which errs towards revoking.
+        issued_ms = payload.get("iat_ms") or int(issued_ts) * 1000
+        revoked_ms = self.revoked_before.get(str(payload.get("kakao_id")))
+        if revoked_ms is not None and not issued_ms > revoked_ms:
+            raise ValueError("session_revoked")
+        return payload, issued_ts
+
+    def load_session(self, token: str, parse: Callable[[Dict[str, Any]], T]) -> T:
+        """Verify a token and parse its payload, memoizing the parsed result.
+
+        A cache hit skips the HMAC/base64/JSON work and the model build; the
+        entry expires when the token itself would. Callers get their own
+        copy, so a request mutating its session never leaks into another.
+        """
+        digest = hashlib.sha256(token.encode()).hexdigest()
+        cached = self.cache.get(digest)
+        if cached is not None:
+            return copy.copy(cached[1])
+        payload, issued_ts = self._verify(token)
+        session = parse(payload)
+        self.cache.set(digest, (str(payload.get("kakao_id")), session),
+                       expires_at=issued_ts + settings.session_ttl_seconds)
+        return copy.copy(session)
+
+    def revoke(self, kakao_id: str) -> int:
+        """Invalidate every session issued so far for kakao_id, on every worker."""
+        revoked_ms = int(time.time() * 1000)
+        evicted = self.apply_revocation(kakao_id, revoked_ms)
+        self._write_revocation(kakao_id, revoked_ms)
+        if self.invalidation_bus:
+            self.invalidation_bus.publish("session", kakao_id, str(revoked_ms))
+        return evicted
+
+    def apply_revocation(self, kakao_id: str, revoked_ms: int) -> int:
+        self.revoked_before[kakao_id] = max(revoked_ms,
+                                            self.revoked_before.get(kakao_id, 0))
+        return self.cache.evict_where(lambda _, entry: entry[0] == kakao_id)
+
+    def _read_revocations(self) -> Dict[str, int]:
+        if not self.revocations_path:
+            return {}
+        try:
+            with open(self.revocations_path, encoding="utf-8") as f:
+                return {k: int(v) for k, v in json.load(f).items()}
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.error(f"Error reading session revocations: {e}")
+            return {}
+
+    def _write_revocation(self, kakao_id: str, revoked_ms: int) -> None:
+        if not self.revocations_path:
+            return
+        # Merge with what other workers wrote; drop entries older than any
+        # token that could still be valid.
+        horizon = (time.time() - settings.session_ttl_seconds) * 1000
+        try:
+            with self._file_lock:
+                self.revocations_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.revocations_path.with_suffix(".lock"), "a") as lock_file:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                    merged = self._read_revocations()
+                    merged[kakao_id] = max(revoked_ms, merged.get(kakao_id, 0))
+                    merged = {k: v for k, v in merged.items() if v > horizon}
+                    tmp_path = self.revocations_path.with_suffix(".tmp")
+                    tmp_path.write_text(json.dumps(merged), encoding="utf-8")
+                    os.replace(tmp_path, self.revocations_path)
+        except Exception as e:
+            logger.error(f"Error persisting session revocation for {kakao_id}: {e}")
+
+
+class TokenBucket:
+    """Async token bucket that also honours server-announced back-off.
+
+    Tokens refill at `rate` per second up to `capacity`. When Kakao answers
+    with Retry-After or an exhausted rate-limit window, observe() pauses all
+    callers until that point instead of letting them hammer the API.
+    """
+
+    RESET_HEADERS = ("x-ratelimit-reset", "ratelimit-reset")
+    REMAINING_HEADERS = ("x-ratelimit-remaining", "ratelimit-remaining")
+
+    def __init__(self, rate: float, capacity: int) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self.tokens = min(self.capacity,
+                                  self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def observe(self, headers: httpx.Headers) -> Optional[float]:
+        """Apply rate-limit headers; returns the announced wait in seconds, if any."""
+        wait = _parse_seconds(headers.get("retry-after"))
+        remaining = next((headers[h] for h in self.REMAINING_HEADERS if h in headers), None)
+        if wait is None and remaining is not None and remaining.strip() == "0":
+            reset = next((headers[h] for h in self.RESET_HEADERS if h in headers), None)
+            wait = _parse_seconds(reset)
+        if wait is not None:
+            self.pause(wait)
+        return wait
+
+
+def _parse_seconds(value: Optional[str]) -> Optional[float]:
+    """Delta-seconds or epoch-seconds header value -> seconds from now."""
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        return None
+    if seconds > 1_000_000_000:  # absolute epoch timestamp
+        seconds -= time.time()
+    return max(0.0, min(seconds, 60.0))
 
 
 class KakaoClient:
-    auth_base = "https://kauth.kakao.com"
-    api_base = "https://kapi.kakao.com"
+    RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
 
     def __init__(self) -> None:
-        self.client = httpx.AsyncClient(timeout=15)
+        self.auth_base = settings.kakao_auth_base
+        self.api_base = settings.kakao_api_base
+        self.client: Optional[httpx.AsyncClient] = None
+        self.limiter = TokenBucket(settings.kakao_rate_per_second,
+                                   settings.kakao_rate_burst)
+
+    def start(self) -> httpx.AsyncClient:
+        """Create the shared connection pool (called from the app lifespan)."""
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                timeout=httpx.Timeout(15, connect=5),
+                limits=httpx.Limits(
+                    max_connections=settings.kakao_max_connections,
+                    max_keepalive_connections=settings.kakao_max_keepalive,
+                    keepalive_expiry=30,
+                ),
+                http2=settings.kakao_http2,
+            )
+        return self.client
+
+    async def aclose(self) -> None:
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    async def _request(self, method: str, url: str, *, idempotent: bool,
+                       **kwargs: Any) -> httpx.Response:
+        """Send through the limiter, retrying with backoff where it is safe.
+
+        429 means Kakao rejected the call before processing it, so every call
+        is retried on 429; 5xx and transport errors only for idempotent calls.
+        """
+        client = self.start()
+        attempt = 0
+        while True:
+            await self.limiter.acquire()
+            try:
+                resp = await client.request(method, url, **kwargs)
+            except httpx.TransportError:
+                if not idempotent or attempt >= settings.kakao_max_retries:
+                    raise
+                resp = None
+            announced = self.limiter.observe(resp.headers) if resp is not None else None
+            retryable = resp is None or resp.status_code == 429 or (
+                idempotent and resp.status_code in self.RETRYABLE_STATUSES)
+            if not retryable or attempt >= settings.kakao_max_retries:
+                return resp
+            delay = announced if announced is not None else 0.25 * (2**attempt)
+            logger.warning("Kakao %s %s -> %s, retry %s in %.2fs", method, url,
+                           resp.status_code if resp is not None else "transport_error",
+                           attempt + 1, delay)
+            attempt += 1
+            await asyncio.sleep(delay + random.uniform(0, 0.1))
 
     async def build_login_url(self, state: str) -> str:
         params = {
@@ -61,8 +294,8 @@ class KakaoClient:
             "redirect_uri": settings.kakao_redirect_uri,
             "code": code,
         }
-        resp = await self.client.post(f"{self.auth_base}/oauth/token",
-                                      data=data)
+        resp = await self._request("POST", f"{self.auth_base}/oauth/token",
+                                   idempotent=False, data=data)
         if resp.is_client_error or resp.is_server_error:
             logger.error("Kakao token error %s: %s", resp.status_code,
                          resp.text)
@@ -74,15 +307,15 @@ class KakaoClient:
 
     async def fetch_user(self, access_token: str) -> Dict[str, Any]:
         headers = {"Authorization": f"Bearer {access_token}"}
-        resp = await self.client.get(f"{self.api_base}/v2/user/me",
-                                     headers=headers)
+        resp = await self._request("GET", f"{self.api_base}/v2/user/me",
+                                   idempotent=True, headers=headers)
         resp.raise_for_status()
         return resp.json()
 
     async def fetch_friends(self, access_token: str) -> Dict[str, Any]:
         headers = {"Authorization": f"Bearer {access_token}"}
-        resp = await self.client.get(f"{self.api_base}/v1/api/talk/friends",
-                                     headers=headers)
+        resp = await self._request("GET", f"{self.api_base}/v1/api/talk/friends",
+                                   idempotent=True, headers=headers)
         if resp.is_client_error or resp.is_server_error:
             logger.error("Kakao friends error %s: %s", resp.status_code,
                          resp.text)
@@ -109,8 +342,10 @@ class KakaoClient:
                 "button_title": "열어보기",
             },
         }
-        resp = await self.client.post(
+        resp = await self._request(
+            "POST",
             f"{self.api_base}/v1/api/talk/friends/message/send",
+            idempotent=False,
             headers=headers,
             json=data,
         )
@@ -132,8 +367,10 @@ class KakaoClient:
             "receiver_uuids": receiver_uuids,
             "template_id": template_id,
         }
-        resp = await self.client.post(
+        resp = await self._request(
+            "POST",
             f"{self.api_base}/v1/api/talk/friends/message/send",
+            idempotent=False,
             headers=headers,
             data=data,
         )
@@ -144,8 +381,163 @@ class KakaoClient:
         return resp.json()
 
 
+class KakaoFanoutSender:
+    """Deliver one Kakao talk message to many friends.
+
+    Kakao caps receiver_uuids per call, so recipients are split into allowed
+    chunks that go out concurrently (the KakaoClient limiter still paces the
+    actual requests). Per-recipient outcomes are checkpointed to <blast id>.json
+    under KAKAO_BLASTS_DIR after every chunk and kept for a day, so a
+    partially failed blast can be resumed on any worker, or after a restart,
+    and only retries what did not go out. A send holds an exclusive flock on
+    <blast id>.lock, so two concurrent resumes of one blast cannot both send.
+    """
+
+    TTL_SECONDS = 24 * 3600
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def _path(self, blast_id: str) -> Path:
+        return self.root / f"{blast_id}.json"
+
+    def _load(self, blast_id: str) -> Optional[Dict[str, Any]]:
+        if not blast_id.replace("-", "").replace("_", "").isalnum():
+            return None
+        try:
+            state = json.loads(self._path(blast_id).read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.error(f"Error reading Kakao blast {blast_id}: {e}")
+            return None
+        if state.get("updated_at", 0) < time.time() - self.TTL_SECONDS:
+            return None
+        return state
+
+    def _write(self, blast_id: str, data: str) -> None:
+        tmp_path = self._path(blast_id).with_suffix(".tmp")
+        tmp_path.write_text(data, encoding="utf-8")
+        os.replace(tmp_path, self._path(blast_id))
+
+    def _claim(self, blast_id: str) -> Any:
+        """Exclusive, non-blocking lock on one blast; raises if another send holds it."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        lock_file = open(self.root / f"{blast_id}.lock", "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            raise ValueError("blast_in_progress")
+        return lock_file
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.TTL_SECONDS
+        for path in self.root.glob("*.json"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    path.with_suffix(".lock").unlink(missing_ok=True)
+            except OSError:
+                pass
+
+    async def send(self, owner_id: str, receiver_uuids: List[str],
+                   send_chunk: Callable[[List[str]], Any],
+                   blast_id: Optional[str] = None) -> Dict[str, Any]:
+        if blast_id:
+            state = await asyncio.to_thread(self._load, blast_id)
+            if state is None or state["owner_id"] != owner_id:
+                raise ValueError("blast_not_found")
+        else:
+            await asyncio.to_thread(self._prune)
+            blast_id = secrets.token_urlsafe(8)
+            state = {"blast_id": blast_id, "owner_id": owner_id, "recipients": {}}
+        lock_file = await asyncio.to_thread(self._claim, blast_id)
+        try:
+            # Re-read under the lock: a send that finished between the first
+            # read and the claim may already have delivered some of these.
+            state = await asyncio.to_thread(self._load, blast_id) or state
+            return await self._send(state, receiver_uuids, send_chunk)
+        finally:
+            lock_file.close()
+
+    async def _send(self, state: Dict[str, Any], receiver_uuids: List[str],
+                    send_chunk: Callable[[List[str]], Any]) -> Dict[str, Any]:
+        for uuid in receiver_uuids:
+            state["recipients"].setdefault(uuid, {"status": "pending"})
+        save_lock = asyncio.Lock()
+
+        async def checkpoint() -> None:
+            async with save_lock:
+                state["updated_at"] = time.time()
+                data = json.dumps(state, ensure_ascii=False)
+                await asyncio.to_thread(self._write, state["blast_id"], data)
+
+        await checkpoint()
+        pending = [u for u, r in state["recipients"].items() if r["status"] != "sent"]
+        size = settings.kakao_message_recipients_per_call
+        chunks = [pending[i:i + size] for i in range(0, len(pending), size)]
+        semaphore = asyncio.Semaphore(settings.kakao_fanout_concurrency)
+
+        async def deliver(chunk: List[str]) -> None:
+            async with semaphore:
+                try:
+                    result = await send_chunk(chunk)
+                except httpx.HTTPStatusError as exc:
+                    self._mark(state, chunk, "failed", f"{exc.response.status_code}: {exc.response.text[:200]}")
+                    await checkpoint()
+                    return
+                except Exception as exc:
+                    self._mark(state, chunk, "failed", str(exc)[:200])
+                    await checkpoint()
+                    return
+            reasons = {}
+            for failure in result.get("failure_info") or []:
+                for uuid in failure.get("receiver_uuids") or []:
+                    reasons[uuid] = f"{failure.get('code')}: {failure.get('msg')}"
+            succeeded = result.get("successful_receiver_uuids")
+            for uuid in chunk:
+                if uuid in reasons:
+                    self._mark(state, [uuid], "failed", reasons[uuid])
+                elif succeeded is None or uuid in succeeded:
+                    self._mark(state, [uuid], "sent")
+                else:
+                    self._mark(state, [uuid], "failed", "not_delivered")
+            await checkpoint()
+
+        await asyncio.gather(*(deliver(chunk) for chunk in chunks))
+        return self.summary(state)
+
+    @staticmethod
+    def _mark(state: Dict[str, Any], uuids: List[str], status: str,
+              reason: Optional[str] = None) -> None:
+        for uuid in uuids:
+            state["recipients"][uuid] = {"status": status, "reason": reason}
+
+    @staticmethod
+    def summary(state: Dict[str, Any]) -> Dict[str, Any]:
+        recipients = state["recipients"]
+        sent = [u for u, r in recipients.items() if r["status"] == "sent"]
+        failed = [{"uuid": u, "reason": r.get("reason")}
+                  for u, r in recipients.items() if r["status"] == "failed"]
+        return {
+            "blast_id": state["blast_id"],
+            "total": len(recipients),
+            "sent_count": len(sent),
+            "failed_count": len(failed),
+            "successful_receiver_uuids": sent,
+            "failed": failed,
+        }
+
+
+_BACKEND_MISS = object()
+
+
 class SupabaseService:
 
+    PAGE_SIZE = 1000
+    EMBED_COLUMNS = "kakao_id,name,tagline,intro,interests,strengths,visibility"
+
     def __init__(self) -> None:
         self.client: Optional[Client] = None
         if settings.supabase_url and settings.supabase_key:
@@ -155,6 +547,65 @@ class SupabaseService:
             logger.warning(
                 "Supabase credentials missing; data operations will be skipped."
             )
+        # Optional direct-Postgres backend for the hot read paths; PostgREST
+        # stays the fallback for everything else and for backend errors.
+        self.backend: Optional[PostgresStorageBackend] = None
+        if settings.storage_backend == "postgres":
+            pool = get_postgres_pool()
+            if pool:
+                self.backend = PostgresStorageBackend(pool)
+        # kakao_id -> {"profile_image": ...} as of the last login on this worker.
+        # Only record_login reads it, so a stale entry can at worst skip an
+        # image refresh; visibility and permission checks always read the row.
+        # Every member_profiles write below evicts its entry.
+        self.profile_cache = TTLCache(maxsize=settings.profile_cache_size,
+                                      ttl=settings.profile_cache_ttl_seconds)
+        self.invalidation_bus: Optional[InvalidationBus] = None
+        self._login_rpc_available = True
+
+    def _from_backend(self, method: str, *args: Any) -> Any:
+        """Call a backend read; returns _BACKEND_MISS when PostgREST should serve it."""
+        if not self.backend:
+            return _BACKEND_MISS
+        try:
+            return getattr(self.backend, method)(*args)
+        except Exception as e:
+            logger.error(f"Postgres {method} failed, falling back to PostgREST: {e}")
+            return _BACKEND_MISS
+
+    def benchmark_read_paths(self, kakao_id: str,
+                             rounds: int = 5) -> Dict[str, Any]:
+        """Median latency (ms) of the hot reads over PostgREST vs direct Postgres."""
+        queries = {
+            "fetch_profile": ("fetch_profile", (kakao_id, )),
+            "fetch_public_profiles": ("fetch_public_profiles", (50, )),
+            "fetch_received_letters": ("fetch_received_letters", (kakao_id, )),
+            "list_conversations": ("list_conversations", (kakao_id, )),
+        }
+
+        def median_ms(func, args) -> Optional[float]:
+            samples = []
+            for _ in range(rounds):
+                started = time.perf_counter()
+                try:
+                    func(*args)
+                except Exception:
+                    return None
+                samples.append((time.perf_counter() - started) * 1000)
+            samples.sort()
+            return round(samples[len(samples) // 2], 2)
+
+        # Separate shallow copies, so the shared singleton never loses its
+        # backend (or serves cached rows) while requests use it.
+        direct, rest = copy.copy(self), copy.copy(self)
+        rest.backend = None
+        report: Dict[str, Any] = {}
+        for name, (method, args) in queries.items():
+            report[name] = {
+                "postgrest_ms": median_ms(getattr(rest, method), args) if self.client else None,
+                "postgres_ms": median_ms(getattr(direct, method), args) if self.backend else None,
+            }
+        return {"rounds": rounds, "queries": report}
 
     def upsert_profile(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Upsert a member profile into Supabase."""
@@ -166,6 +617,7 @@ class SupabaseService:
             
             logger.info(f"UPSERT PROFILE: kakao_id={data.get('kakao_id')}, name={data.get('name')}")
             result = self.client.table("member_profiles").upsert(data, on_conflict="kakao_id").execute()
+            self.invalidate_profile(str(data.get("kakao_id")))
             logger.info(f"UPSERT RESULT: {result.data}")
             return {"data": result.data}
         except Exception as e:
@@ -173,6 +625,9 @@ class SupabaseService:
             return {"error": str(e)}
 
     def fetch_profile(self, kakao_id: str) -> Optional[Dict[str, Any]]:
+        direct = self._from_backend("fetch_profile", kakao_id)
+        if direct is not _BACKEND_MISS:
+            return direct
         if not self.client:
             return None
         result = self.client.table("member_profiles").select("*").eq(
@@ -181,6 +636,99 @@ class SupabaseService:
             return None
         return result.data[0]
 
+    def invalidate_profile(self, kakao_id: str) -> None:
+        """Evict the row here and tell the other workers to do the same."""
+        self.profile_cache.pop(kakao_id)
+        if self.invalidation_bus:
+            self.invalidation_bus.publish("profile", kakao_id)
+
+    def record_login(self, kakao_id: str, nickname: str,
+                     profile_image_url: str) -> Dict[str, Any]:
+        """Create the member on first login, else refresh profile_image if it changed.
+
+        Returns {"created": bool, "updated": bool}. A repeat login on this
+        worker with the same image short-circuits without touching the database; otherwise a
+        single conditional upsert runs (direct Postgres, or the
+        record_member_login RPC over PostgREST), falling back to a read plus
+        at most one write when the RPC is not installed.
+        """
+        cached = self.profile_cache.get(kakao_id)
+        if cached is not None and (not profile_image_url or
+                                   cached.get("profile_image") == profile_image_url):
+            return {"created": False, "updated": False}
+
+        direct = self._from_backend("record_login", kakao_id, nickname,
+                                    profile_image_url)
+        if direct is not _BACKEND_MISS:
+            result = direct
+        elif not self.client:
+            return {"skipped": True, "reason": "supabase_not_configured"}
+        elif self._login_rpc_available:
+            try:
+                rpc = self.client.rpc("record_member_login", {
+                    "p_kakao_id": kakao_id,
+                    "p_name": nickname,
+                    "p_profile_image": profile_image_url,
+                }).execute()
+                data = rpc.data or {}
+                result = {"created": bool(data.get("inserted")),
+                          "updated": bool(data.get("updated"))}
+            except Exception as e:
+                error_str = str(e).lower()
+                if "record_member_login" in error_str or "pgrst202" in error_str:
+                    logger.warning("record_member_login RPC not installed; using read-then-write login path")
+                    self._login_rpc_available = False
+                    result = self._record_login_two_step(kakao_id, nickname, profile_image_url)
+                else:
+                    logger.error(f"Error recording login for {kakao_id}: {e}")
+                    return {"error": str(e)}
+        else:
+            result = self._record_login_two_step(kakao_id, nickname, profile_image_url)
+
+        if result.get("created") or result.get("updated"):
+            self.invalidate_profile(kakao_id)
+        if "error" not in result:
+            self.profile_cache.set(kakao_id, {"profile_image": profile_image_url})
+        return result
+
+    def _record_login_two_step(self, kakao_id: str, nickname: str,
+                               profile_image_url: str) -> Dict[str, Any]:
+        existing = self.fetch_profile(kakao_id)
+        if existing:
+            if profile_image_url and existing.get("profile_image") != profile_image_url:
+                res = self.update_profile_image(kakao_id, profile_image_url)
+                return {"created": False, "updated": "data" in res}
+            return {"created": False, "updated": False}
+        record = assemble_profile_record(kakao_id, {
+            "name": nickname,
+            "tagline": "",
+            "intro": "",
+            "interests": [],
+            "strengths": [],
+            "contact": "",
+            "visibility": "public",
+            "profile_image": profile_image_url,
+        })
+        res = self.upsert_profile(record)
+        if "error" in res:
+            return {"error": res["error"]}
+        return {"created": True, "updated": False}
+
+    def count_profiles(self) -> Optional[int]:
+        """Exact member count; None when the count could not be read."""
+        direct = self._from_backend("count_profiles")
+        if direct is not _BACKEND_MISS:
+            return direct
+        if not self.client:
+            return None
+        try:
+            result = self.client.table("member_profiles").select(
+                "kakao_id", count="exact").execute()
+            return result.count or 0
+        except Exception as e:
+            logger.error(f"Error counting member profiles: {e}")
+            return None
+
     def get_picked_profiles(self, kakao_id: str) -> list[str]:
         """Get list of kakao_ids that user has picked."""
         if not self.client:
@@ -219,6 +767,7 @@ class SupabaseService:
             result = self.client.table("member_profiles").update({
                 "has_picked": current_picks
             }).eq("kakao_id", kakao_id).execute()
+            self.invalidate_profile(kakao_id)
             return {"data": result.data, "has_picked": current_picks}
         except Exception as e:
             error_str = str(e).lower()
@@ -238,6 +787,7 @@ class SupabaseService:
             result = self.client.table("member_profiles").update({
                 "has_picked": current_picks
             }).eq("kakao_id", kakao_id).execute()
+            self.invalidate_profile(kakao_id)
             return {"data": result.data, "has_picked": current_picks}
         except Exception as e:
             error_str = str(e).lower()
@@ -256,6 +806,7 @@ class SupabaseService:
                 "profile_image": profile_image_url,
                 "updated_at": now
             }).eq("kakao_id", kakao_id).execute()
+            self.invalidate_profile(kakao_id)
             return {"data": result.data}
         except Exception as e:
             error_str = str(e).lower()
@@ -266,6 +817,9 @@ class SupabaseService:
             return {"error": str(e)}
 
     def fetch_public_profiles(self, limit: int = 50) -> list[Dict[str, Any]]:
+        direct = self._from_backend("fetch_public_profiles", limit)
+        if direct is not _BACKEND_MISS:
+            return direct
         if not self.client:
             return []
         
@@ -301,6 +855,9 @@ class SupabaseService:
 
     def fetch_member_visible_profiles(self, limit: int = 50) -> list[Dict[str, Any]]:
         """Fetch profiles visible to logged-in members (public + members visibility)."""
+        direct = self._from_backend("fetch_member_visible_profiles", limit)
+        if direct is not _BACKEND_MISS:
+            return direct
         if not self.client:
             return []
         
@@ -352,6 +909,53 @@ class SupabaseService:
                 return result.data or []
             raise
 
+    def fetch_profiles_for_search(self) -> list[Dict[str, Any]]:
+        """Full rows of every profile, for building the local search index."""
+        return self.fetch_every_profile() or []
+
+    def fetch_every_profile(self) -> Optional[list[Dict[str, Any]]]:
+        """Full rows of every profile, paged past the row cap; None when the read fails."""
+        if not self.client:
+            return None
+        try:
+            rows: list[Dict[str, Any]] = []
+            while True:
+                result = self.client.table("member_profiles").select("*").order(
+                    "kakao_id").range(len(rows), len(rows) + self.PAGE_SIZE - 1).execute()
+                page = result.data or []
+                rows.extend(page)
+                if len(page) < self.PAGE_SIZE:
+                    return rows
+        except Exception as e:
+            logger.error(f"Error fetching profiles: {e}")
+            return None
+
+    def fetch_profile_ids(self) -> Optional[list[str]]:
+        """Every kakao_id in member_profiles, sorted; None when the read fails."""
+        if not self.client:
+            return None
+        try:
+            ids: list[str] = []
+            while True:
+                result = self.client.table("member_profiles").select(
+                    "kakao_id").order("kakao_id").range(
+                        len(ids), len(ids) + self.PAGE_SIZE - 1).execute()
+                rows = result.data or []
+                ids.extend(str(r["kakao_id"]) for r in rows if r.get("kakao_id"))
+                if len(rows) < self.PAGE_SIZE:
+                    return ids
+        except Exception as e:
+            logger.error(f"Error fetching profile ids: {e}")
+            return None
+
+    def fetch_profiles_for_embedding(self, kakao_ids: list[str]) -> list[Dict[str, Any]]:
+        """Only the columns member vectors are built from, for the given profiles."""
+        if not self.client or not kakao_ids:
+            return []
+        result = self.client.table("member_profiles").select(
+            self.EMBED_COLUMNS).in_("kakao_id", kakao_ids).execute()
+        return result.data or []
+
     def update_display_order(self, orders: list[Dict[str, Any]]) -> Dict[str, Any]:
         """Update display_order for multiple profiles. orders = [{"kakao_id": "...", "display_order": 1}, ...]"""
         if not self.client:
@@ -362,6 +966,7 @@ class SupabaseService:
                 result = self.client.table("member_profiles").update({
                     "display_order": item["display_order"]
                 }).eq("kakao_id", item["kakao_id"]).execute()
+                self.invalidate_profile(item["kakao_id"])
                 results.append(result.data)
             return {"data": results, "updated": len(results)}
         except Exception as e:
@@ -381,6 +986,7 @@ class SupabaseService:
                 "fixed_role": fixed_role,
                 "updated_at": now
             }).eq("kakao_id", kakao_id).execute()
+            self.invalidate_profile(kakao_id)
             return {"data": result.data, "updated": True}
         except Exception as e:
             error_str = str(e).lower()
@@ -524,6 +1130,9 @@ class SupabaseService:
 
     def fetch_sent_letters(self, sender_kakao_id: str) -> list[Dict[str, Any]]:
         """Fetch all letters sent by a user."""
+        direct = self._from_backend("fetch_sent_letters", sender_kakao_id)
+        if direct is not _BACKEND_MISS:
+            return direct
         if not self.client:
             return []
         try:
@@ -535,6 +1144,9 @@ class SupabaseService:
 
     def fetch_received_letters(self, recipient_kakao_id: str) -> list[Dict[str, Any]]:
         """Fetch all letters received by a user (excluding admin messages without sender)."""
+        direct = self._from_backend("fetch_received_letters", recipient_kakao_id)
+        if direct is not _BACKEND_MISS:
+            return direct
         if not self.client:
             return []
         try:
@@ -633,6 +1245,9 @@ class SupabaseService:
 
     def fetch_public_letters(self) -> list[Dict[str, Any]]:
         """Fetch all public letters."""
+        direct = self._from_backend("fetch_public_letters")
+        if direct is not _BACKEND_MISS:
+            return direct
         if not self.client:
             return []
         try:
@@ -664,6 +1279,9 @@ class SupabaseService:
 
     def fetch_conversation(self, conv_id: str) -> Optional[Dict[str, Any]]:
         """Fetch a single conversation by ID."""
+        direct = self._from_backend("fetch_conversation", conv_id)
+        if direct is not _BACKEND_MISS:
+            return direct
         if not self.client:
             return None
         try:
@@ -715,6 +1333,9 @@ class SupabaseService:
 
     def list_conversations(self, kakao_id: str) -> Dict[str, Any]:
         """List all conversations where user is creator, speaker, or listener."""
+        direct = self._from_backend("list_conversations", kakao_id)
+        if direct is not _BACKEND_MISS:
+            return {"data": direct}
         if not self.client:
             return {"error": "supabase_not_configured"}
         try:
@@ -731,21 +1352,245 @@ class SupabaseService:
             return {"error": str(e)}
 
 
+class ParticipantCounter:
+    """In-memory member count for the landing badge.
+
+    Sign-ups bump the count directly; a periodic reconcile against Supabase
+    corrects any drift (deleted rows, other workers). Subscribers receive the
+    latest value through a size-1 queue, so slow SSE clients only ever see the
+    most recent count.
+    """
+
+    def __init__(self, supabase_svc: SupabaseService) -> None:
+        self.supabase = supabase_svc
+        self.count: Optional[int] = None
+        self._subscribers: set[asyncio.Queue] = set()
+
+    def get(self) -> int:
+        # Never blocks on Supabase: until the startup refresh lands the
+        # badge shows 0 and SSE clients get the real count when it arrives.
+        return self.count or 0
+
+    async def refresh(self) -> None:
+        count = await asyncio.to_thread(self.supabase.count_profiles)
+        if count is not None:
+            self._publish(count)
+
+    async def reconcile_forever(self, interval_seconds: int) -> None:
+        while True:
+            await self.refresh()
+            await asyncio.sleep(interval_seconds)
+
+    def increment(self, delta: int = 1) -> None:
+        if self.count is None:
+            # Not seeded yet: the pending refresh already includes the new row.
+            return
+        self._publish(self.count + delta)
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    def _publish(self, count: int) -> None:
+        if count == self.count:
+            return
+        self.count = count
+        for queue in list(self._subscribers):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(count)
+
+
 class EmbeddingService:
 
+    BATCH_SIZE = 512
+
     def __init__(self) -> None:
         if not settings.openai_api_key:
             logger.warning("OpenAI key missing; embeddings will be skipped.")
             self.client = None
         else:
             self.client = OpenAI(api_key=settings.openai_api_key)
+        self.cache = TTLCache(settings.embedding_cache_size)
+
+    @staticmethod
+    def _cache_key(text: str) -> str:
+        return hashlib.sha256(
+            f"{settings.embedding_model}\n{text}".encode()).hexdigest()
+
+    def _remember(self, key: str, vector: List[float]) -> None:
+        # A list of Python floats costs ~32 bytes per component; keep the
+        # cached copy as a contiguous float32 array instead.
+        self.cache.set(key, np.asarray(vector, dtype=np.float32))
+
+    def _recall(self, key: str) -> Optional[List[float]]:
+        vector = self.cache.get(key)
+        return vector.tolist() if vector is not None else None
+
+    def cached(self, text: str) -> Optional[List[float]]:
+        return self._recall(self._cache_key(text))
 
     def embed_member(self, text: str) -> Optional[List[float]]:
         if not self.client:
             return None
+        key = self._cache_key(text)
+        vector = self._recall(key)
+        if vector is not None:
+            return vector
         resp = self.client.embeddings.create(model=settings.embedding_model,
                                              input=text)
-        return resp.data[0].embedding
+        vector = resp.data[0].embedding
+        self._remember(key, vector)
+        return vector
+
+    def embed_many(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Embed several texts, sending only cache misses, in as few requests as possible."""
+        if not self.client:
+            return [None] * len(texts)
+        keys = [self._cache_key(text) for text in texts]
+        results = [self._recall(key) for key in keys]
+        missing = [i for i, vector in enumerate(results) if vector is None]
+        for start in range(0, len(missing), self.BATCH_SIZE):
+            batch = missing[start:start + self.BATCH_SIZE]
+            resp = self.client.embeddings.create(
+                model=settings.embedding_model, input=[texts[i] for i in batch])
+            for item in resp.data:
+                i = batch[item.index]
+                results[i] = item.embedding
+                self._remember(keys[i], item.embedding)
+        return results
+
+
+class InterestVocabulary:
+    """One embedding per distinct interest/strength term, composed into member vectors.
+
+    Interests come mostly from the fixed onboarding chip set, so once the
+    vocabulary is warm a profile save needs no embedding call: the member's
+    `interests` vector is the weighted, normalized mean of its term
+    vectors. Never-seen custom terms are embedded in one batched request.
+    Term vectors persist to an .npz file so restarts stay warm.
+    """
+
+    INTEREST_WEIGHT = 1.0
+    STRENGTH_WEIGHT = 0.6
+
+    def __init__(self, embedder: EmbeddingService, path: Path) -> None:
+        self.embedder = embedder
+        self.path = path
+        self._vectors: Optional[Dict[str, np.ndarray]] = None
+        self._lock = threading.Lock()
+        self.embedded_terms = 0
+
+    @staticmethod
+    def normalize_term(term: Any) -> str:
+        return " ".join(str(term or "").split())
+
+    def _loaded(self) -> Dict[str, np.ndarray]:
+        if self._vectors is None:
+            vectors: Dict[str, np.ndarray] = {}
+            try:
+                with np.load(self.path, allow_pickle=False) as data:
+                    for term, vector in zip(data["terms"], data["vectors"]):
+                        vectors[str(term)] = vector
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.error(f"Error loading interest vocabulary {self.path}: {e}")
+            self._vectors = vectors
+        return self._vectors
+
+    def unseen(self, terms: List[str]) -> List[str]:
+        """The distinct normalized terms that would need an embedding request."""
+        wanted = dict.fromkeys(t for t in map(self.normalize_term, terms) if t)
+        with self._lock:
+            known = self._loaded()
+            return [t for t in wanted if t not in known]
+
+    def vectors_for(self, terms: List[str]) -> Dict[str, np.ndarray]:
+        """Unit vectors for the given terms, embedding any not seen before."""
+        wanted = list(dict.fromkeys(t for t in map(self.normalize_term, terms) if t))
+        with self._lock:
+            known = self._loaded()
+            missing = [t for t in wanted if t not in known]
+        if missing:
+            embedded = self.embedder.embed_many(missing)
+            with self._lock:
+                for term, vector in zip(missing, embedded):
+                    if vector:
+                        unit = np.asarray(vector, dtype=np.float32)
+                        known[term] = unit / (np.linalg.norm(unit) or 1.0)
+                        self.embedded_terms += 1
+                self._save()
+        return {t: known[t] for t in wanted if t in known}
+
+    def term_vector(self, term: str) -> Optional[List[float]]:
+        vector = self.vectors_for([term]).get(self.normalize_term(term))
+        return vector.tolist() if vector is not None else None
+
+    def known_vector(self, term: str) -> Optional[List[float]]:
+        """The stored vector of a term, without embedding anything."""
+        with self._lock:
+            vector = self._loaded().get(self.normalize_term(term))
+        return vector.tolist() if vector is not None else None
+
+    def compose(self, interests: List[str],
+                strengths: List[str]) -> Optional[List[float]]:
+        weighted = [(t, self.INTEREST_WEIGHT) for t in interests or []]
+        weighted += [(t, self.STRENGTH_WEIGHT) for t in strengths or []]
+        return self._mean(weighted, self.vectors_for([t for t, _ in weighted]))
+
+    def query_vector(self, query: str) -> Optional[List[float]]:
+        """A search query in the same space as composed `interests` vectors.
+
+        Comma- or slash-separated parts count as separate terms. Known terms
+        come from the vocabulary; the rest are embedded but not kept, so
+        free-text queries never grow the vocabulary file.
+        """
+        terms = list(dict.fromkeys(
+            t for t in map(self.normalize_term, re.split(r"[,/]", query)) if t))
+        if not terms:
+            return None
+        with self._lock:
+            known = self._loaded()
+            vectors = {t: known[t] for t in terms if t in known}
+        missing = [t for t in terms if t not in vectors]
+        for term, vector in zip(missing, self.embedder.embed_many(missing)):
+            if vector:
+                unit = np.asarray(vector, dtype=np.float32)
+                vectors[term] = unit / (np.linalg.norm(unit) or 1.0)
+        return self._mean([(t, self.INTEREST_WEIGHT) for t in terms], vectors)
+
+    def _mean(self, weighted: List[tuple],
+              vectors: Dict[str, np.ndarray]) -> Optional[List[float]]:
+        total = None
+        for term, weight in weighted:
+            vector = vectors.get(self.normalize_term(term))
+            if vector is not None:
+                total = vector * weight if total is None else total + vector * weight
+        if total is None:
+            return None
+        return (total / (np.linalg.norm(total) or 1.0)).tolist()
+
+    def _save(self) -> None:
+        if not self._vectors:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            with open(tmp_path, "wb") as f:
+                np.savez(f, terms=np.array(list(self._vectors)),
+                         vectors=np.stack(list(self._vectors.values())))
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.error(f"Error saving interest vocabulary: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {"terms": len(self._loaded()),
+                "embedded_since_start": self.embedded_terms}
 
 
 CARDS = [
@@ -805,6 +1650,23 @@ YESORNO_MAPPINGS = {
 }
 
 
+INTRO_SYSTEM_PROMPT = "당신은 재미있는 자기소개를 만들어주는 전문가입니다. JSON 형식으로만 응답하세요."
+
+INTRO_JSON_FORMAT = """다음 JSON 형식으로 응답해주세요:
+{
+    "tagline": "한 줄로 나를 소개하는 문장 (20자 이내, 유머러스하게)",
+    "intro": "2-3문장의 자세한 자기소개 (친근하고 재미있게, 100자 이내)",
+    "interests": ["관심사1", "관심사2", "관심사3"],
+    "strengths": ["강점1", "강점2"]
+}
+
+주의사항:
+- 반드시 JSON 형식만 출력하세요
+- 한국어로 작성하세요
+- 유머러스하고 친근한 톤으로 작성하세요
+- 송년회 분위기에 맞게 밝고 긍정적으로 작성하세요"""
+
+
 class IntroGenerationService:
 
     def __init__(self) -> None:
@@ -812,14 +1674,14 @@ class IntroGenerationService:
             logger.warning(
                 "OpenAI key missing; intro generation will be skipped.")
             self.client = None
+            self.async_client = None
         else:
             self.client = OpenAI(api_key=settings.openai_api_key)
+            self.async_client = AsyncOpenAI(api_key=settings.openai_api_key)
 
-    def generate_intro_from_yesorno(self, yesorno_data: Dict[str, Any],
-                                    nickname: str) -> Optional[Dict[str, Any]]:
-        if not self.client:
-            return None
-
+    @staticmethod
+    def yesorno_prompt(yesorno_data: Dict[str, Any],
+                       nickname: str) -> Optional[str]:
         traits = []
         for q_num in range(1, 6):
             raw_response = yesorno_data.get(str(q_num))
@@ -837,82 +1699,15 @@ class IntroGenerationService:
             return None
 
         traits_text = ", ".join(traits)
-
-        prompt = f"""다음 성향을 가진 '{nickname}'님의 재미있는 자기소개를 만들어주세요.
+        return f"""다음 성향을 가진 '{nickname}'님의 재미있는 자기소개를 만들어주세요.
 
 성향: {traits_text}
 
-다음 JSON 형식으로 응답해주세요:
-{{
-    "tagline": "한 줄로 나를 소개하는 문장 (20자 이내, 유머러스하게)",
-    "intro": "2-3문장의 자세한 자기소개 (친근하고 재미있게, 100자 이내)",
-    "interests": ["관심사1", "관심사2", "관심사3"],
-    "strengths": ["강점1", "강점2"]
-}}
-
-주의사항:
-- 반드시 JSON 형식만 출력하세요
-- 한국어로 작성하세요
-- 유머러스하고 친근한 톤으로 작성하세요
-- 송년회 분위기에 맞게 밝고 긍정적으로 작성하세요
+{INTRO_JSON_FORMAT}
 - 위에 언급된 성향들을 자연스럽게 녹여주세요"""
 
-        try:
-            resp = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{
-                    "role":
-                    "system",
-                    "content":
-                    "당신은 재미있는 자기소개를 만들어주는 전문가입니다. JSON 형식으로만 응답하세요."
-                }, {
-                    "role": "user",
-                    "content": prompt
-                }],
-                temperature=0.8,
-                max_tokens=500,
-            )
-            content = resp.choices[0].message.content.strip()
-            if content.startswith("```"):
-                content = content.split("```")[1]
-                if content.startswith("json"):
-                    content = content[4:]
-            import json
-            raw_result = json.loads(content)
-            validated_result = {
-                "tagline":
-                str(raw_result.get("tagline", ""))[:50]
-                if raw_result.get("tagline") else "",
-                "intro":
-                str(raw_result.get("intro", ""))[:200]
-                if raw_result.get("intro") else "",
-                "interests": [],
-                "strengths": [],
-            }
-            raw_interests = raw_result.get("interests", [])
-            if isinstance(raw_interests, list):
-                validated_result["interests"] = [
-                    str(i)[:20] for i in raw_interests[:5] if i
-                ]
-            elif isinstance(raw_interests, str):
-                validated_result["interests"] = [raw_interests[:20]]
-            raw_strengths = raw_result.get("strengths", [])
-            if isinstance(raw_strengths, list):
-                validated_result["strengths"] = [
-                    str(s)[:20] for s in raw_strengths[:5] if s
-                ]
-            elif isinstance(raw_strengths, str):
-                validated_result["strengths"] = [raw_strengths[:20]]
-            return validated_result
-        except Exception as e:
-            logger.error(f"Intro generation from yesorno failed: {e}")
-            return None
-
-    def generate_intro(self, answers: Dict[str,
-                                           Any]) -> Optional[Dict[str, Any]]:
-        if not self.client:
-            return None
-
+    @staticmethod
+    def answers_prompt(answers: Dict[str, Any]) -> str:
         answer_lines = []
         for i, card in enumerate(CARDS):
             q_num = i + 1
@@ -930,104 +1725,468 @@ class IntroGenerationService:
             answer_lines.append(f"{card['question']}: {answer_text}")
 
         answers_text = "\n".join(answer_lines)
-
-        prompt = f"""다음 정보를 바탕으로 재미있고 친근한 자기소개를 만들어주세요.
+        return f"""다음 정보를 바탕으로 재미있고 친근한 자기소개를 만들어주세요.
 
 사용자 답변:
 {answers_text}
 
-다음 JSON 형식으로 응답해주세요:
-{{
-    "tagline": "한 줄로 나를 소개하는 문장 (20자 이내, 유머러스하게)",
-    "intro": "2-3문장의 자세한 자기소개 (친근하고 재미있게, 100자 이내)",
-    "interests": ["관심사1", "관심사2", "관심사3"],
-    "strengths": ["강점1", "강점2"]
-}}
+{INTRO_JSON_FORMAT}"""
 
-주의사항:
-- 반드시 JSON 형식만 출력하세요
-- 한국어로 작성하세요
-- 유머러스하고 친근한 톤으로 작성하세요
-- 송년회 분위기에 맞게 밝고 긍정적으로 작성하세요"""
+    def generate_intro_from_yesorno(self, yesorno_data: Dict[str, Any],
+                                    nickname: str) -> Optional[Dict[str, Any]]:
+        if not self.client:
+            return None
+        prompt = self.yesorno_prompt(yesorno_data, nickname)
+        if not prompt:
+            return None
+        return self._complete_intro(prompt, "Intro generation from yesorno")
+
+    def generate_intro(self, answers: Dict[str,
+                                           Any]) -> Optional[Dict[str, Any]]:
+        if not self.client:
+            return None
+        return self._complete_intro(self.answers_prompt(answers),
+                                    "Intro generation")
 
+    @staticmethod
+    def _messages(prompt: str) -> List[Dict[str, str]]:
+        return [{
+            "role": "system",
+            "content": INTRO_SYSTEM_PROMPT
+        }, {
+            "role": "user",
+            "content": prompt
+        }]
+
+    def _complete_intro(self, prompt: str,
+                        label: str) -> Optional[Dict[str, Any]]:
         try:
             resp = self.client.chat.completions.create(
                 model="gpt-4o-mini",
-                messages=[{
-                    "role":
-                    "system",
-                    "content":
-                    "당신은 재미있는 자기소개를 만들어주는 전문가입니다. JSON 형식으로만 응답하세요."
-                }, {
-                    "role": "user",
-                    "content": prompt
-                }],
+                messages=self._messages(prompt),
                 temperature=0.8,
                 max_tokens=500,
             )
-            content = resp.choices[0].message.content.strip()
-            if content.startswith("```"):
-                content = content.split("```")[1]
-                if content.startswith("json"):
-                    content = content[4:]
-            import json
-            raw_result = json.loads(content)
-            validated_result = {
-                "tagline":
-                str(raw_result.get("tagline", ""))[:50]
-                if raw_result.get("tagline") else "",
-                "intro":
-                str(raw_result.get("intro", ""))[:200]
-                if raw_result.get("intro") else "",
-                "interests": [],
-                "strengths": [],
-            }
-            raw_interests = raw_result.get("interests", [])
-            if isinstance(raw_interests, list):
-                validated_result["interests"] = [
-                    str(i)[:20] for i in raw_interests[:5] if i
-                ]
-            elif isinstance(raw_interests, str):
-                validated_result["interests"] = [raw_interests[:20]]
-            raw_strengths = raw_result.get("strengths", [])
-            if isinstance(raw_strengths, list):
-                validated_result["strengths"] = [
-                    str(s)[:20] for s in raw_strengths[:5] if s
-                ]
-            elif isinstance(raw_strengths, str):
-                validated_result["strengths"] = [raw_strengths[:20]]
-            return validated_result
+            return self.parse_intro(resp.choices[0].message.content)
         except Exception as e:
-            logger.error(f"Intro generation failed: {e}")
+            logger.error(f"{label} failed: {e}")
             return None
 
+    async def stream_intro(self, prompt: str) -> AsyncIterator[str]:
+        """Yield the raw completion text as it arrives; parse_intro() the joined text."""
+        stream = await self.async_client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=self._messages(prompt),
+            temperature=0.8,
+            max_tokens=500,
+            stream=True,
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
 
-class PineconeService:
+    @classmethod
+    def parse_intro(cls, content: str) -> Dict[str, Any]:
+        content = content.strip()
+        if content.startswith("```"):
+            content = content.split("```")[1]
+            if content.startswith("json"):
+                content = content[4:]
+        return cls._validate_intro(json.loads(content))
 
-    def __init__(self) -> None:
-        if not settings.pinecone_api_key:
-            logger.warning(
-                "Pinecone key missing; vector sync will be skipped.")
-            self.client = None
-            self.index = None
-            return
+    @staticmethod
+    def _validate_intro(raw_result: Dict[str, Any]) -> Dict[str, Any]:
+        validated_result = {
+            "tagline":
+            str(raw_result.get("tagline", ""))[:50]
+            if raw_result.get("tagline") else "",
+            "intro":
+            str(raw_result.get("intro", ""))[:200]
+            if raw_result.get("intro") else "",
+            "interests": [],
+            "strengths": [],
+        }
+        for field in ("interests", "strengths"):
+            raw_items = raw_result.get(field, [])
+            if isinstance(raw_items, list):
+                validated_result[field] = [
+                    str(item)[:20] for item in raw_items[:5] if item
+                ]
+            elif isinstance(raw_items, str):
+                validated_result[field] = [raw_items[:20]]
+        return validated_result
 
-        self.client = Pinecone(api_key=settings.pinecone_api_key)
-        if settings.pinecone_index not in [
-                idx["name"] for idx in self.client.list_indexes()
-        ]:
-            self.client.create_index(
-                name=settings.pinecone_index,
-                dimension=3072,
-                metric="cosine",
-                spec=ServerlessSpec(cloud="aws", region="us-east-1"),
-            )
-        self.index = self.client.Index(settings.pinecone_index)
 
-    def upsert_embedding(self, member_id: str, vector: List[float],
-                         metadata: Dict[str, Any], namespace: str = "") -> Dict[str, Any]:
-        if not self.index:
-            return {"skipped": True, "reason": "pinecone_not_configured"}
+class IntroPrefetcher:
+    """Speculative intro generation started as soon as the last yes/no answer lands.
+
+    Each user gets one short-lived slot holding the running task and the
+    answer combination it was started for; the generate endpoint takes the
+    slot only when the combination still matches.
+    """
+
+    def __init__(self, generator: IntroGenerationService, ttl: float,
+                 maxsize: int = 1024) -> None:
+        self.generator = generator
+        self.slots = TTLCache(maxsize, ttl=ttl)
+        self._tasks: set[asyncio.Task] = set()
+        self.started = 0
+        self.served = 0
+        self.stale = 0
+
+    def start(self, kakao_id: str, yesorno_data: Dict[str, Any],
+              nickname: str) -> bool:
+        answers_key = IntroLibrary.combination_key(yesorno_data)
+        if not answers_key or not self.generator.client:
+            return False
+        slot = self.slots.get(kakao_id)
+        if slot and slot["answers_key"] == answers_key and slot["nickname"] == nickname:
+            return False
+
+        task = asyncio.create_task(
+            asyncio.to_thread(self.generator.generate_intro_from_yesorno,
+                              dict(yesorno_data), nickname))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        self.slots.set(kakao_id, {
+            "answers_key": answers_key,
+            "nickname": nickname,
+            "task": task,
+        })
+        self.started += 1
+        return True
+
+    async def take(self, kakao_id: str, yesorno_data: Dict[str, Any],
+                   nickname: str) -> Optional[Dict[str, Any]]:
+        slot = self.slots.pop(kakao_id)
+        if not slot:
+            return None
+        if (slot["answers_key"] != IntroLibrary.combination_key(yesorno_data)
+                or slot["nickname"] != nickname):
+            self.stale += 1
+            return None
+        try:
+            result = await asyncio.shield(slot["task"])
+        except Exception as e:
+            logger.error(f"Prefetched intro generation failed: {e}")
+            return None
+        if result:
+            self.served += 1
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "slots": len(self.slots),
+            "started": self.started,
+            "served": self.served,
+            "stale": self.stale,
+        }
+
+
+# Bump whenever the reasoning prompt changes so cached paragraphs are not reused.
+ROLE_REASONING_PROMPT_VERSION = "v1"
+
+ROLE_REASONING_PROMPTS = {
+    "profile": ("사용자의 프로필과", "", "사용자 프로필"),
+    "mafbti": ("사용자의 자기소개와", "\n반말로 친근하게 작성하세요.", "사용자 자기소개"),
+}
+
+
+class RoleReasoningService:
+    """Explains, in 2-3 sentences, why a matched Mafia42 job suits a user.
+
+    `audience` selects the prompt: "profile" for logged-in onboarding
+    (polite tone, full profile text) or "mafbti" for the public MafBTI page
+    (casual tone, just the intro).
+
+    Finished paragraphs are cached per (job, normalized text, prompt
+    version, audience), and concurrent identical requests share a single
+    upstream call: the first caller leads, later ones await its future.
+    """
+
+    def __init__(self) -> None:
+        if not settings.openai_api_key:
+            self.client = None
+            self.async_client = None
+        else:
+            # Requests give up on reasoning at their deadline; bound the
+            # abandoned upstream call by the same budget.
+            budget = max(settings.role_assignment_budget_seconds,
+                         settings.mafbti_budget_seconds)
+            self.client = OpenAI(api_key=settings.openai_api_key,
+                                 timeout=budget, max_retries=1)
+            self.async_client = AsyncOpenAI(api_key=settings.openai_api_key,
+                                            timeout=budget, max_retries=1)
+        self.cache = TTLCache(settings.role_reasoning_cache_size,
+                              ttl=settings.role_reasoning_cache_ttl_seconds)
+        self._inflight: Dict[tuple, asyncio.Future] = {}
+        self.upstream_calls = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def cache_key(job: Dict[str, Any], user_text: str, audience: str) -> tuple:
+        normalized = " ".join(user_text.split()).lower()
+        return (job.get("code") or job["role"],
+                hashlib.sha256(normalized.encode()).hexdigest(),
+                ROLE_REASONING_PROMPT_VERSION, audience)
+
+    async def reason_cached(self, job: Dict[str, Any], user_text: str,
+                            audience: str) -> str:
+        key = self.cache_key(job, user_text, audience)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return await asyncio.shield(pending)
+
+        future = self._lead(key)
+        try:
+            reasoning = await asyncio.to_thread(self.reason, job, user_text,
+                                                audience)
+        except BaseException as e:
+            self._fail(key, future, e)
+            raise
+        self._finish(key, future, reasoning)
+        return reasoning
+
+    async def stream_cached(self, job: Dict[str, Any], user_text: str,
+                            audience: str) -> AsyncIterator[str]:
+        """stream(), except cache hits and coalesced followers get the whole text as one chunk."""
+        key = self.cache_key(job, user_text, audience)
+        cached = self.cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            yield await asyncio.shield(pending)
+            return
+
+        future = self._lead(key)
+        parts: List[str] = []
+        try:
+            async for delta in self.stream(job, user_text, audience):
+                parts.append(delta)
+                yield delta
+        except BaseException as e:
+            # Also covers the client disconnecting mid-stream (GeneratorExit),
+            # so followers fall back instead of waiting forever.
+            self._fail(key, future, e)
+            raise
+        self._finish(key, future, "".join(parts).strip())
+
+    def _lead(self, key: tuple) -> asyncio.Future:
+        self.upstream_calls += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        return future
+
+    def _finish(self, key: tuple, future: asyncio.Future, reasoning: str) -> None:
+        self._inflight.pop(key, None)
+        if reasoning:
+            self.cache.set(key, reasoning)
+        if not future.done():
+            future.set_result(reasoning)
+
+    def _fail(self, key: tuple, future: asyncio.Future, error: BaseException) -> None:
+        self._inflight.pop(key, None)
+        if not future.done():
+            future.set_exception(
+                error if isinstance(error, Exception) else
+                RuntimeError("role_reasoning_abandoned"))
+            future.exception()  # mark retrieved when nobody was waiting
+
+    def forget_jobs(self, jobs: List[str]) -> int:
+        """Evict cached paragraphs for the given job codes (or role names)."""
+        doomed = set(jobs)
+        return self.cache.evict_where(lambda key, _: key[0] in doomed)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.cache.stats(),
+            "prompt_version": ROLE_REASONING_PROMPT_VERSION,
+            "upstream_calls": self.upstream_calls,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight),
+        }
+
+    @staticmethod
+    def _messages(job: Dict[str, Any], user_text: str,
+                  audience: str) -> List[Dict[str, str]]:
+        subject, tone, user_label = ROLE_REASONING_PROMPTS[audience]
+        system_prompt = f"""당신은 마피아42 게임의 직업 배정 전문가입니다.
+{subject} 배정된 직업의 스토리를 바탕으로, 왜 이 직업이 어울리는지 재미있고 친근하게 설명해주세요.
+
+배정된 직업: {job['role']} ({job['team']})
+직업 스토리: {job.get('story', '')}
+
+2-3문장으로 왜 이 직업이 사용자에게 어울리는지 설명하세요.
+직업의 스토리와 사용자의 특징을 연결해서 작성하세요.{tone}
+"""
+        return [
+            {
+                "role": "system",
+                "content": system_prompt
+            },
+            {
+                "role": "user",
+                "content": f"{user_label}:\n{user_text}"
+            },
+        ]
+
+    def reason(self, job: Dict[str, Any], user_text: str,
+               audience: str) -> str:
+        """Blocking completion; raises on upstream failure."""
+        response = self.client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=self._messages(job, user_text, audience),
+            temperature=0.8,
+            max_tokens=200,
+        )
+        return response.choices[0].message.content.strip()
+
+    async def stream(self, job: Dict[str, Any], user_text: str,
+                     audience: str) -> AsyncIterator[str]:
+        stream = await self.async_client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=self._messages(job, user_text, audience),
+            temperature=0.8,
+            max_tokens=200,
+            stream=True,
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+NICKNAME_PLACEHOLDER = "{nickname}"
+
+
+class IntroLibrary:
+    """Pre-generated intros for every full yes/no answer combination.
+
+    Five ±1 answers give 32 combinations; an admin job generates a few
+    variants per combination with NICKNAME_PLACEHOLDER in place of the name
+    and stores them as JSON, so onboarding can serve an intro without an LLM
+    call. Partial answer sets are not covered and fall through to live
+    generation.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._variants: Optional[Dict[str, List[Dict[str, Any]]]] = None
+        self.build_status: Dict[str, Any] = {"state": "idle"}
+
+    @staticmethod
+    def combination_key(yesorno_data: Dict[str, Any]) -> Optional[str]:
+        signs = []
+        for q_num in range(1, 6):
+            try:
+                response = int(yesorno_data.get(str(q_num)))
+            except (TypeError, ValueError):
+                return None
+            if response not in (1, -1):
+                return None
+            signs.append("+" if response == 1 else "-")
+        return "".join(signs)
+
+    @property
+    def variants(self) -> Dict[str, List[Dict[str, Any]]]:
+        if self._variants is None:
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    self._variants = json.load(f).get("variants", {})
+            except FileNotFoundError:
+                self._variants = {}
+            except Exception as e:
+                logger.error(f"Error loading intro library {self.path}: {e}")
+                self._variants = {}
+        return self._variants
+
+    def pick(self, key: Optional[str], nickname: str) -> Optional[Dict[str, Any]]:
+        options = self.variants.get(key or "")
+        if not options:
+            return None
+
+        def fill(text: str) -> str:
+            return text.replace(NICKNAME_PLACEHOLDER, nickname)
+
+        chosen = random.choice(options)
+        return {
+            "tagline": fill(chosen.get("tagline", "")),
+            "intro": fill(chosen.get("intro", "")),
+            "interests": [fill(i) for i in chosen.get("interests", [])],
+            "strengths": [fill(i) for i in chosen.get("strengths", [])],
+        }
+
+    def build(self, generator: "IntroGenerationService",
+              variants_per_combination: int) -> Dict[str, Any]:
+        """Generate the whole library (blocking; run from a worker thread)."""
+        combos = list(itertools.product((1, -1), repeat=5))
+        library: Dict[str, List[Dict[str, Any]]] = {}
+        self.build_status = {"state": "running", "done": 0, "total": len(combos)}
+        for answers in combos:
+            data = {str(i + 1): answer for i, answer in enumerate(answers)}
+            key = self.combination_key(data)
+            generated = []
+            for _ in range(variants_per_combination):
+                intro = generator.generate_intro_from_yesorno(data, NICKNAME_PLACEHOLDER)
+                if intro:
+                    generated.append(intro)
+            if generated:
+                library[key] = generated
+            self.build_status["done"] += 1
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "generated_at": datetime.now(timezone.utc).isoformat(),
+                "variants": library,
+            }, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+        self._variants = library
+        self.build_status = {"state": "done", **self.stats()}
+        return self.build_status
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "combinations": len(self.variants),
+            "variants": sum(len(v) for v in self.variants.values()),
+        }
+
+
+class PineconeService:
+
+    FETCH_BATCH = 100
+
+    def __init__(self) -> None:
+        if not settings.pinecone_api_key:
+            logger.warning(
+                "Pinecone key missing; vector sync will be skipped.")
+            self.client = None
+            self.index = None
+            return
+
+        self.client = Pinecone(api_key=settings.pinecone_api_key)
+        if settings.pinecone_index not in [
+                idx["name"] for idx in self.client.list_indexes()
+        ]:
+            self.client.create_index(
+                name=settings.pinecone_index,
+                dimension=settings.embedding_dimension,
+                metric="cosine",
+                spec=ServerlessSpec(cloud="aws", region="us-east-1"),
+            )
+        self.index = self.client.Index(settings.pinecone_index)
+
+    def upsert_embedding(self, member_id: str, vector: List[float],
+                         metadata: Dict[str, Any], namespace: str = "") -> Dict[str, Any]:
+        if not self.index:
+            return {"skipped": True, "reason": "pinecone_not_configured"}
         try:
             upsert_result = self.index.upsert(
                 vectors=[{
@@ -1043,6 +2202,19 @@ class PineconeService:
             logger.error(f"Pinecone upsert error for {member_id}: {e}")
             return {"skipped": True, "reason": f"upsert_error: {str(e)[:100]}"}
 
+    def upsert_many(self, items: List[Dict[str, Any]],
+                    namespace: str = "") -> Dict[str, Any]:
+        """One upsert request for `items` ({"id", "values", "metadata"} dicts)."""
+        if not self.index:
+            return {"skipped": True, "reason": "pinecone_not_configured"}
+        try:
+            upsert_result = self.index.upsert(vectors=items, namespace=namespace)
+            return {"upserted_count": getattr(upsert_result, "upserted_count", None),
+                    "namespace": namespace}
+        except Exception as e:
+            logger.error(f"Pinecone batch upsert error ({len(items)} vectors): {e}")
+            return {"error": str(e)[:200]}
+
     def fetch_vector(self, member_id: str, namespace: str = "") -> Optional[List[float]]:
         if not self.index:
             return None
@@ -1056,8 +2228,74 @@ class PineconeService:
             logger.error(f"Pinecone fetch error: {e}")
             return None
 
+    def fetch_vectors(self, member_ids: List[str],
+                      namespace: str = "") -> Dict[str, List[float]]:
+        """Batched fetch_vector(); ids without a stored vector are left out."""
+        if not self.index:
+            return {}
+        vectors: Dict[str, List[float]] = {}
+        for start in range(0, len(member_ids), self.FETCH_BATCH):
+            batch = member_ids[start:start + self.FETCH_BATCH]
+            try:
+                result = self.index.fetch(ids=batch, namespace=namespace)
+                for member_id, item in result.get("vectors", {}).items():
+                    if item.get("values"):
+                        vectors[member_id] = item.get("values")
+            except Exception as e:
+                logger.error(f"Pinecone batch fetch error: {e}")
+        return vectors
+
+    def list_entries(self, namespace: str = "") -> Optional[Dict[str, Dict[str, Any]]]:
+        """id -> metadata for every vector in `namespace`; None if listing failed."""
+        if not self.index:
+            return None
+        entries: Dict[str, Dict[str, Any]] = {}
+        try:
+            for ids in self.index.list(namespace=namespace):
+                for start in range(0, len(ids), self.FETCH_BATCH):
+                    result = self.index.fetch(ids=ids[start:start + self.FETCH_BATCH],
+                                              namespace=namespace)
+                    for vector_id, item in result.get("vectors", {}).items():
+                        entries[vector_id] = item.get("metadata") or {}
+            return entries
+        except Exception as e:
+            logger.error(f"Pinecone list error for {namespace}: {e}")
+            return None
+
+    def delete_many(self, member_ids: List[str], namespace: str = "") -> Dict[str, Any]:
+        if not self.index:
+            return {"skipped": True, "reason": "pinecone_not_configured"}
+        try:
+            for start in range(0, len(member_ids), 1000):
+                self.index.delete(ids=member_ids[start:start + 1000],
+                                  namespace=namespace)
+            return {"deleted_count": len(member_ids), "namespace": namespace}
+        except Exception as e:
+            logger.error(f"Pinecone delete error: {e}")
+            return {"error": str(e)[:200]}
+
+    def update_metadata(self, member_id: str, metadata: Dict[str, Any],
+                        namespace: str = "") -> Dict[str, Any]:
+        if not self.index:
+            return {"skipped": True, "reason": "pinecone_not_configured"}
+        try:
+            self.index.update(id=member_id, set_metadata=metadata,
+                              namespace=namespace)
+            return {"updated": True}
+        except Exception as e:
+            logger.error(f"Pinecone metadata update error for {member_id}: {e}")
+            return {"error": str(e)[:200]}
+
+    @staticmethod
+    def _visibility_filter(visibility: Optional[List[str]]) -> Optional[Dict[str, Any]]:
+        """Metadata filter restricting matches to the given visibility values."""
+        if not visibility:
+            return None
+        return {"visibility": {"$in": list(visibility)}}
+
     def query_similar(self, member_id: str, top_k: int = 10, 
-                      exclude_self: bool = True, namespace: str = "") -> List[Dict[str, Any]]:
+                      exclude_self: bool = True, namespace: str = "",
+                      visibility: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         if not self.index:
             return []
         vector = self.fetch_vector(member_id, namespace=namespace)
@@ -1069,15 +2307,18 @@ class PineconeService:
                 top_k=top_k + (1 if exclude_self else 0),
                 include_metadata=True,
                 namespace=namespace,
+                filter=self._visibility_filter(visibility),
             )
             matches = []
             for match in result.get("matches", []):
                 if exclude_self and match["id"] == member_id:
                     continue
+                metadata = match.get("metadata", {})
                 matches.append({
                     "kakao_id": match["id"],
                     "score": match["score"],
-                    "metadata": match.get("metadata", {}),
+                    "metadata": metadata,
+                    "visibility": metadata.get("visibility"),
                 })
             return matches[:top_k]
         except Exception as e:
@@ -1085,17 +2326,20 @@ class PineconeService:
             return []
 
     def query_different(self, member_id: str, top_k: int = 10,
-                        exclude_self: bool = True, namespace: str = "") -> List[Dict[str, Any]]:
+                        exclude_self: bool = True, namespace: str = "",
+                        visibility: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         if not self.index:
             return []
-        similar = self.query_similar(member_id, top_k=100, exclude_self=exclude_self, namespace=namespace)
+        similar = self.query_similar(member_id, top_k=100, exclude_self=exclude_self,
+                                     namespace=namespace, visibility=visibility)
         if not similar:
             return []
         different = sorted(similar, key=lambda x: x["score"])
         return different[:top_k]
 
     def query_by_vector(self, vector: List[float], top_k: int = 5, 
-                        namespace: str = "") -> List[Dict[str, Any]]:
+                        namespace: str = "",
+                        visibility: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """Query Pinecone directly with a vector (not by member_id)."""
         if not self.index:
             return []
@@ -1105,13 +2349,16 @@ class PineconeService:
                 top_k=top_k,
                 include_metadata=True,
                 namespace=namespace,
+                filter=self._visibility_filter(visibility),
             )
             matches = []
             for match in result.get("matches", []):
+                metadata = match.get("metadata", {})
                 matches.append({
                     "id": match["id"],
                     "score": match["score"],
-                    "metadata": match.get("metadata", {}),
+                    "metadata": metadata,
+                    "visibility": metadata.get("visibility"),
                 })
             return matches
         except Exception as e:
@@ -1119,6 +2366,383 @@ class PineconeService:
             return []
 
 
+def job_catalog_version(jobs: List[Dict[str, Any]]) -> str:
+    """Content version of the job catalog; changes whenever any job row does."""
+    rows = sorted(json.dumps(job, sort_keys=True, ensure_ascii=False, default=str)
+                  for job in jobs)
+    return hashlib.sha256("\n".join(rows).encode()).hexdigest()[:12]
+
+
+TEAM_NAME_MAP = {
+    "citizen": "시민팀",
+    "mafia": "마피아팀",
+    "cult": "교주팀",
+    "시민": "시민팀",
+    "마피아": "마피아팀",
+    "교주": "교주팀",
+}
+
+
+def convert_team_name(team: str) -> str:
+    """Convert English team name to Korean team name."""
+    return TEAM_NAME_MAP.get(team, team if "팀" in team else f"{team}팀")
+
+
+class JobCatalog:
+    """Immutable, indexed snapshot of the mafia42_jobs table.
+
+    Lookups by code and by name are dict hits, and each job's Korean team
+    name is converted once when the snapshot is built. `version` is the
+    content hash from job_catalog_version(), so every worker holding the
+    same rows reports the same version (also served as the ETag of
+    /api/admin/jobs). A refresh swaps in a whole new instance.
+    """
+
+    def __init__(self, jobs: List[Dict[str, Any]]) -> None:
+        self.jobs = jobs
+        self.version = job_catalog_version(jobs)
+        self.by_code = {str(j.get("code", "")): j for j in jobs}
+        self.by_name: Dict[str, Dict[str, Any]] = {}
+        for job in jobs:
+            self.by_name.setdefault(job.get("name"), job)
+        self.team_names = {str(j.get("code", "")): convert_team_name(j.get("team", "citizen"))
+                           for j in jobs}
+
+    def __len__(self) -> int:
+        return len(self.jobs)
+
+    def get(self, code: str) -> Optional[Dict[str, Any]]:
+        return self.by_code.get(str(code))
+
+    def named(self, name: str) -> Optional[Dict[str, Any]]:
+        return self.by_name.get(name)
+
+    def team_name(self, job: Dict[str, Any]) -> str:
+        code = str(job.get("code", ""))
+        if code in self.team_names:
+            return self.team_names[code]
+        return convert_team_name(job.get("team", "citizen"))
+
+    def changed_since(self, other: "JobCatalog") -> List[str]:
+        """Codes added, removed or edited between `other` and this catalog."""
+        return [code for code in set(self.by_code) | set(other.by_code)
+                if self.by_code.get(code) != other.by_code.get(code)]
+
+
+class LocalJobMatcher:
+    """In-process copy of the Mafia42 job catalog, its vectors and a lexical classifier.
+
+    Serves as the degraded path when the vector store is slow or down (a
+    cosine match against the job vectors held in memory) and, without a
+    user vector or under overload, as a zero-network answer from the
+    character n-gram classifier. The classifier learns from each job's story
+    plus every assignment the vector matcher makes, which are appended to a
+    JSONL file so the distilled set survives restarts. Loaded in the
+    background at startup and after job re-embeds; job vectors come from
+    the shared mmap snapshot when one exists, so only the worker that
+    re-embeds the jobs fetches them from the vector store.
+    """
+
+    REFIT_EVERY = 25
+    # The classifier only looks at character n-grams; longer texts add little.
+    MAX_TEXT_CHARS = 500
+
+    def __init__(self, supabase_svc: SupabaseService,
+                 vector_svc: "PineconeService | PgVectorService",
+                 assignments_path: Path, max_distilled: int = 5000) -> None:
+        self.supabase = supabase_svc
+        self.vectors = vector_svc
+        self.assignments_path = assignments_path
+        self.max_distilled = max(1, max_distilled)
+        self.catalog = JobCatalog([])
+        self.classifier = LexicalRoleClassifier()
+        # sha256(normalized text) -> (text, code), oldest first. Guarded by
+        # _write_lock together with _unfitted and _log_rows.
+        self.distilled: Dict[str, tuple] = {}
+        self._unfitted = 0
+        self._log_rows = 0
+        self._job_vectors = VectorStore(settings.embedding_dimension,
+                                        settings.vector_store_dtype)
+        self.snapshots = VectorSnapshots(settings.vector_snapshot_dir,
+                                         f"jobs-{settings.vector_store_dtype}")
+        self.snapshot_version: Optional[str] = None
+        self.invalidation_bus: Optional[InvalidationBus] = None
+        self._load_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return bool(self.catalog)
+
+    @property
+    def has_vectors(self) -> bool:
+        return len(self._job_vectors) > 0
+
+    @property
+    def jobs(self) -> List[Dict[str, Any]]:
+        return self.catalog.jobs
+
+    @property
+    def by_code(self) -> Dict[str, Dict[str, Any]]:
+        return self.catalog.by_code
+
+    @property
+    def catalog_version(self) -> Optional[str]:
+        return self.catalog.version if self.catalog else None
+
+    def ensure_catalog(self) -> JobCatalog:
+        """The loaded catalog, or one read straight from Supabase before the first load."""
+        if self.catalog:
+            return self.catalog
+        return JobCatalog(self.supabase.fetch_mafia42_jobs())
+
+    def refresh_catalog(self) -> List[str]:
+        """Re-read the job rows; swap the catalog in and return changed codes if they differ."""
+        jobs = self.supabase.fetch_mafia42_jobs()
+        if not jobs or job_catalog_version(jobs) == self.catalog.version:
+            return []
+        catalog, previous = JobCatalog(jobs), self.catalog
+        self.catalog = catalog
+        self.refit()
+        return catalog.changed_since(previous)
+
+    def load(self, rebuild: bool = False, changed: Optional[List[str]] = None,
+             wait: bool = False) -> Dict[str, Any]:
+        """Load jobs and their vectors; `rebuild` re-fetches vectors and republishes the snapshot.
+
+        On a rebuild, other workers are told which job codes changed
+        (`changed`, or "*" for all of them) and the new catalog version.
+        A load already in progress is skipped unless `wait`, which queues
+        behind it and then loads again, since the one running may have read
+        the rows before the caller's change.
+        """
+        if not self._load_lock.acquire(blocking=wait):
+            return {"skipped": True, "reason": "already_loading"}
+        try:
+            jobs = self.supabase.fetch_mafia42_jobs()
+            snapshots_on = settings.vector_snapshot_check_seconds > 0
+            opened = self.snapshots.open() if snapshots_on and not rebuild else None
+            # An empty snapshot (published before any job was embedded) counts
+            # as missing, and an empty fetch is never published: either would
+            # leave every worker without job vectors until the next rebuild.
+            if opened and len(opened[1]):
+                self.snapshot_version, job_vectors, _ = opened
+            else:
+                job_vectors = self._fetch_job_vectors(jobs)
+                if snapshots_on and len(job_vectors):
+                    self.snapshot_version = self.snapshots.publish(job_vectors)
+            catalog = JobCatalog(jobs)
+            if rebuild and self.invalidation_bus:
+                self.invalidation_bus.publish(
+                    "jobs", ",".join(changed) if changed else "*", catalog.version)
+            self.catalog = catalog
+            self._job_vectors = job_vectors
+            if not self.distilled:
+                self._read_distilled()
+            self.refit()
+            return {"jobs": len(catalog), "vectors": len(job_vectors),
+                    "vector_bytes": job_vectors.memory_bytes(),
+                    "snapshot": self.snapshot_version,
+                    "catalog_version": self.catalog_version,
+                    "distilled": len(self.distilled)}
+        except Exception as e:
+            logger.error(f"Error loading local job matcher: {e}")
+            return {"skipped": True, "reason": str(e)[:100]}
+        finally:
+            self._load_lock.release()
+
+    def _fetch_job_vectors(self, jobs: List[Dict[str, Any]]) -> VectorStore:
+        vectors = self.vectors.fetch_vectors(
+            [str(job.get("code", "")) for job in jobs], namespace="mafia42_jobs")
+        codes, rows = list(vectors), list(vectors.values())
+        job_vectors = VectorStore(settings.embedding_dimension,
+                                  settings.vector_store_dtype)
+        if rows:
+            job_vectors.replace(codes, np.asarray(rows, dtype=np.float32))
+        return job_vectors
+
+    def sync_snapshot(self) -> None:
+        """Map a job-vector snapshot another worker published since our last load."""
+        try:
+            version = self.snapshots.current()
+            if version and version != self.snapshot_version:
+                opened = self.snapshots.open(version)
+                if opened and len(opened[1]):
+                    self.snapshot_version, self._job_vectors, _ = opened
+        except Exception as e:
+            logger.error(f"Error syncing job vector snapshot: {e}")
+
+    def _story_examples(self) -> List[tuple]:
+        return [(f"{j.get('name', '')} {j.get('story', '')}", str(j.get("code", "")))
+                for j in self.jobs]
+
+    def _distilled_examples(self) -> List[tuple]:
+        with self._write_lock:
+            distilled = list(self.distilled.values())
+        return [ex for ex in distilled if ex[1] in self.by_code]
+
+    def refit(self) -> None:
+        # Swap in a fresh classifier so concurrent predict() calls never see
+        # a half-fitted one.
+        with self._write_lock:
+            self._unfitted = 0
+        self.classifier = LexicalRoleClassifier().fit(
+            self._story_examples() + self._distilled_examples())
+
+    def _remember(self, key: str, text: str, code: str) -> None:
+        """Insert as newest and drop the oldest past the cap; caller holds _write_lock."""
+        self.distilled.pop(key, None)
+        self.distilled[key] = (text, code)
+        while len(self.distilled) > self.max_distilled:
+            del self.distilled[next(iter(self.distilled))]
+
+    def _read_distilled(self) -> None:
+        with self._write_lock:
+            try:
+                with open(self.assignments_path, encoding="utf-8") as f:
+                    for line in f:
+                        row = json.loads(line)
+                        self._remember(row["key"], row["text"][:self.MAX_TEXT_CHARS],
+                                       row["code"])
+                        self._log_rows += 1
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.error(f"Error reading {self.assignments_path}: {e}")
+
+    def _compact_log(self) -> None:
+        """Rewrite the JSONL log as one row per kept example; caller holds _write_lock.
+
+        Rows another worker appended since we read the log are dropped here;
+        they stay in that worker's memory and return when it compacts.
+        """
+        tmp_path = self.assignments_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for key, (text, code) in self.distilled.items():
+                f.write(json.dumps({"key": key, "text": text, "code": code},
+                                   ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.assignments_path)
+        self._log_rows = len(self.distilled)
+
+    def record_assignment(self, text: str, code: str) -> None:
+        """Keep a vector-matcher assignment as a training example for the classifier.
+
+        Texts are cut to MAX_TEXT_CHARS and only the ROLE_ASSIGNMENTS_MAX
+        most recent examples are kept; the JSONL log is compacted once it
+        holds twice that many rows, so neither grows without bound.
+        """
+        text = text[:self.MAX_TEXT_CHARS]
+        key = hashlib.sha256(normalize_text(text).encode()).hexdigest()
+        with self._write_lock:
+            if self.distilled.get(key, (None, None))[1] == code:
+                return
+            self._remember(key, text, code)
+            self._unfitted += 1
+            refit_due = self._unfitted >= self.REFIT_EVERY
+            try:
+                self.assignments_path.parent.mkdir(parents=True, exist_ok=True)
+                if self._log_rows >= 2 * self.max_distilled:
+                    self._compact_log()
+                else:
+                    with open(self.assignments_path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps({"key": key, "text": text, "code": code},
+                                           ensure_ascii=False) + "\n")
+                    self._log_rows += 1
+            except Exception as e:
+                logger.error(f"Error recording role assignment: {e}")
+        if refit_due and self.jobs:
+            self.refit()
+
+    def match_vector(self, vector: List[float]) -> Optional[Dict[str, Any]]:
+        codes, scores = self._job_vectors.scores(vector)
+        if not codes:
+            return None
+        best = int(np.argmax(scores))
+        job = self.by_code.get(codes[best])
+        return {"job": job, "score": float(scores[best])} if job else None
+
+    def match_text(self, text: str) -> Optional[Dict[str, Any]]:
+        prediction = self.classifier.predict(text)
+        if not prediction:
+            return None
+        job = self.by_code.get(prediction[0])
+        return {"job": job, "score": prediction[1]} if job else None
+
+    def report(self, folds: int = 5) -> Dict[str, Any]:
+        """Cross-validated agreement of the lexical classifier with the vector matcher."""
+        return {
+            "jobs": len(self.jobs),
+            "job_vectors": len(self._job_vectors),
+            **evaluate_role_classifier(self._story_examples(),
+                                       self._distilled_examples(), folds),
+        }
+
+
+class ProfileSearchIndex:
+    """Local BM25 indexes of member profiles for keyword search.
+
+    One index per search_type, over the same fields its vector namespace
+    embeds: "intro" covers name, tagline and intro, "interests" covers
+    interests and strengths. Rebuilt from Supabase at startup and kept
+    current by index_profile() calls on profile writes, so short keyword
+    queries never need an embedding call.
+    """
+
+    FIELDS = {
+        "intro": {"name": 2.0, "tagline": 1.5, "intro": 1.0},
+        "interests": {"interests": 2.0, "strengths": 1.5},
+    }
+
+    def __init__(self, supabase_svc: SupabaseService) -> None:
+        self.supabase = supabase_svc
+        self.indexes = {name: BM25Index(fields) for name, fields in self.FIELDS.items()}
+        self.built = False
+
+    def rebuild(self) -> Dict[str, Any]:
+        indexes = {name: BM25Index(fields) for name, fields in self.FIELDS.items()}
+        for row in self.supabase.fetch_profiles_for_search():
+            for index in indexes.values():
+                index.upsert(str(row.get("kakao_id")), row)
+        self.indexes, self.built = indexes, True
+        return {"profiles": len(indexes["intro"])}
+
+    def index_profile(self, profile: Optional[Dict[str, Any]]) -> None:
+        if profile and profile.get("kakao_id"):
+            doc = dict(profile)
+            for index in self.indexes.values():
+                index.upsert(str(profile["kakao_id"]), doc)
+
+    def refresh(self, kakao_id: str) -> None:
+        """Re-read one profile after another worker changed it."""
+        if not self.built:
+            return
+        profile = self.supabase.fetch_profile(kakao_id)
+        if profile:
+            self.index_profile(profile)
+        else:
+            for index in self.indexes.values():
+                index.remove(kakao_id)
+
+    def search(self, query: str, limit: int, visibility: List[str],
+               search_type: str = "intro") -> List[Dict[str, Any]]:
+        """Profiles with a `lexical_score`, best first, restricted to `visibility`."""
+        index = self.indexes[search_type]
+        hits = index.search(
+            query, limit, accept=lambda doc: doc.get("visibility") in visibility)
+        return [{**index.get(doc_id), "lexical_score": score}
+                for doc_id, score in hits]
+
+    def holders(self, term: str, visibility: List[str]) -> List[Dict[str, Any]]:
+        """Profiles listing `term` verbatim among their interests or strengths."""
+        wanted = normalize_text(term)
+        return [
+            doc for doc in self.indexes["interests"].docs()
+            if doc.get("visibility") in visibility and any(
+                normalize_text(str(t)) == wanted
+                for t in (doc.get("interests") or []) + (doc.get("strengths") or []))
+        ]
+
+
 class ClusteringService:
     """Clustering service using K-means on Pinecone embeddings."""
 
@@ -1266,13 +2890,1257 @@ class ClusteringService:
         }
 
 
-session_signer = SessionSigner()
+session_signer = SessionSigner(Path(settings.session_revocations_path))
 kakao_client = KakaoClient()
+kakao_fanout_sender = KakaoFanoutSender(settings.kakao_blasts_dir)
 supabase_service = SupabaseService()
+participant_counter = ParticipantCounter(supabase_service)
 embedding_service = EmbeddingService()
+interest_vocabulary = InterestVocabulary(
+    embedding_service, Path(settings.interest_vocabulary_path))
 intro_generation_service = IntroGenerationService()
-pinecone_service = PineconeService()
+intro_library = IntroLibrary(Path(settings.intro_library_path))
+role_reasoning_service = RoleReasoningService()
+intro_prefetcher = IntroPrefetcher(intro_generation_service,
+                                   ttl=settings.intro_prefetch_ttl_seconds)
+
+
+class TwoStageVectorService:
+    """Shortened-vector candidate generation in memory, re-ranked at full size.
+
+    Wraps PineconeService or PgVectorService behind the same interface.
+    Each member namespace keeps a CompactIndex of Matryoshka-shortened
+    vectors (COMPACT_EMBEDDING_DIMENSIONS wide); a query scans it for
+    RERANK_CANDIDATES candidates, fetches only their full-size vectors from
+    the store and re-ranks by exact cosine. Namespaces that have not been
+    loaded yet are served by the wrapped store directly.
+
+    Compact indexes are shared between workers through VectorSnapshots:
+    load() maps the active snapshot when there is one, local upserts,
+    deletes and metadata patches are applied immediately and published by
+    sync_snapshots(), which also re-maps snapshots other workers published.
+    """
+
+    NAMESPACES = ("intro", "interests")
+
+    def __init__(self, base: PineconeService | PgVectorService,
+                 supabase_svc: SupabaseService, dims: int,
+                 candidates: int) -> None:
+        self.base = base
+        self.supabase = supabase_svc
+        self.dims = dims
+        self.candidates = candidates
+        self.compact = {ns: CompactIndex(dims, settings.vector_store_dtype)
+                        for ns in self.NAMESPACES}
+        self.loaded: set = set()
+        self.served = {"two_stage": 0, "store": 0}
+        self.snapshots = {
+            ns: VectorSnapshots(settings.vector_snapshot_dir,
+                                f"compact-{ns}-{dims}-{settings.vector_store_dtype}")
+            for ns in self.NAMESPACES
+        }
+        self.snapshot_versions: Dict[str, Optional[str]] = {}
+        # namespace -> id -> VectorSnapshots.update() change.
+        self._pending: Dict[str, Dict[str, Optional[tuple]]] = {
+            ns: {} for ns in self.NAMESPACES}
+        self._pending_lock = threading.Lock()
+        self.invalidation_bus: Optional[InvalidationBus] = None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.base, name)
+
+    def load(self, rebuild: bool = False) -> Dict[str, Any]:
+        """Map the active snapshots, or rebuild from the store and publish them."""
+        counts = {}
+        snapshots_on = settings.vector_snapshot_check_seconds > 0
+        if snapshots_on and not rebuild:
+            for namespace, index in self.compact.items():
+                if self._attach_snapshot(namespace):
+                    counts[namespace] = len(index)
+        missing = [ns for ns in self.NAMESPACES if ns not in counts]
+        if not missing:
+            return counts
+        profiles = {str(p["kakao_id"]): p
+                    for p in self.supabase.fetch_profiles_for_search()
+                    if p.get("kakao_id")}
+        for namespace in missing:
+            index = self.compact[namespace]
+            vectors = self.base.fetch_vectors(list(profiles), namespace=namespace)
+            ids = list(vectors)
+            index.replace(
+                ids, np.array([vectors[i] for i in ids], dtype=np.float32),
+                [{"visibility": profiles[i].get("visibility"),
+                  "name": profiles[i].get("name", "")} for i in ids])
+            self.loaded.add(namespace)
+            counts[namespace] = len(ids)
+            if snapshots_on and ids:
+                try:
+                    self.snapshot_versions[namespace] = self.snapshots[namespace].publish(
+                        index.store, index.metadata())
+                except Exception as e:
+                    logger.error(f"Error publishing {namespace} vector snapshot: {e}")
+        return counts
+
+    def _attach_snapshot(self, namespace: str, version: Optional[str] = None) -> bool:
+        try:
+            opened = self.snapshots[namespace].open(version)
+        except Exception as e:
+            logger.error(f"Error opening {namespace} vector snapshot: {e}")
+            return False
+        if not opened or not len(opened[1]):
+            return False
+        version, store, metadata = opened
+        self.compact[namespace].attach(store, metadata)
+        self.snapshot_versions[namespace] = version
+        self.loaded.add(namespace)
+        return True
+
+    def sync_snapshots(self) -> None:
+        """Publish local upserts, then map whatever snapshot is now active."""
+        for namespace, snapshots in self.snapshots.items():
+            with self._pending_lock:
+                changes, self._pending[namespace] = self._pending[namespace], {}
+            try:
+                if changes:
+                    version = snapshots.update(self.dims,
+                                               settings.vector_store_dtype, changes)
+                    if self.invalidation_bus:
+                        self.invalidation_bus.publish("vectors", namespace, version)
+                version = snapshots.current()
+                if version and version != self.snapshot_versions.get(namespace):
+                    self._attach_snapshot(namespace, version)
+            except Exception as e:
+                logger.error(f"Error syncing {namespace} vector snapshot: {e}")
+                with self._pending_lock:
+                    newer, self._pending[namespace] = self._pending[namespace], changes
+                    for doc_id, change in newer.items():
+                        self._queue_locked(namespace, doc_id, change)
+
+    def upsert_embedding(self, member_id: str, vector: List[float],
+                         metadata: Dict[str, Any], namespace: str = "") -> Dict[str, Any]:
+        result = self.base.upsert_embedding(member_id, vector, metadata,
+                                            namespace=namespace)
+        if not result.get("skipped"):
+            self._remember(namespace, member_id, vector, metadata)
+        return result
+
+    def upsert_many(self, items: List[Dict[str, Any]],
+                    namespace: str = "") -> Dict[str, Any]:
+        result = self.base.upsert_many(items, namespace=namespace)
+        if not result.get("skipped") and not result.get("error"):
+            for item in items:
+                self._remember(namespace, item["id"], item["values"],
+                               item.get("metadata") or {})
+        return result
+
+    def update_metadata(self, member_id: str, metadata: Dict[str, Any],
+                        namespace: str = "") -> Dict[str, Any]:
+        result = self.base.update_metadata(member_id, metadata, namespace=namespace)
+        if (namespace in self.compact and not result.get("error")
+                and not result.get("skipped")):
+            self.compact[namespace].update_metadata(member_id, metadata)
+            self._queue(namespace, member_id, (None, dict(metadata)))
+        return result
+
+    def delete_many(self, member_ids: List[str], namespace: str = "") -> Dict[str, Any]:
+        result = self.base.delete_many(member_ids, namespace=namespace)
+        if (namespace in self.compact and not result.get("error")
+                and not result.get("skipped")):
+            self.compact[namespace].delete(member_ids)
+            for member_id in member_ids:
+                self._queue(namespace, member_id, None)
+        return result
+
+    def _remember(self, namespace: str, member_id: str, vector: List[float],
+                  metadata: Dict[str, Any]) -> None:
+        if namespace not in self.compact:
+            return
+        self.compact[namespace].upsert(member_id, vector, metadata)
+        self._queue(namespace, member_id, (shorten(vector, self.dims), dict(metadata)))
+
+    def _queue(self, namespace: str, member_id: str, change: Optional[tuple]) -> None:
+        if settings.vector_snapshot_check_seconds > 0:
+            with self._pending_lock:
+                self._queue_locked(namespace, member_id, change)
+
+    def _queue_locked(self, namespace: str, member_id: str,
+                      change: Optional[tuple]) -> None:
+        # A metadata patch folds into a pending upsert or patch of the same
+        # id and is dropped after a pending delete; anything else replaces.
+        pending = self._pending[namespace]
+        if change is not None and change[0] is None and member_id in pending:
+            earlier = pending[member_id]
+            if earlier is None:
+                return
+            change = (earlier[0], {**earlier[1], **change[1]})
+        pending[member_id] = change
+
+    def _shortlist_and_rerank(self, vector: List[float], top_k: int,
+                              namespace: str, id_key: str,
+                              visibility: Optional[List[str]],
+                              exclude: Optional[str] = None,
+                              farthest: bool = False) -> List[Dict[str, Any]]:
+        accept = (lambda m: m.get("visibility") in visibility) if visibility else None
+        shortlist = self.compact[namespace].search(
+            vector, max(self.candidates, top_k), accept=accept,
+            exclude=exclude, farthest=farthest)
+        full = self.base.fetch_vectors([doc_id for doc_id, _, _ in shortlist],
+                                       namespace=namespace)
+        query = np.asarray(vector, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+        matches = []
+        for doc_id, _, metadata in shortlist:
+            if doc_id not in full:
+                continue
+            candidate = np.asarray(full[doc_id], dtype=np.float32)
+            score = float(candidate @ query / (np.linalg.norm(candidate) or 1.0))
+            matches.append({id_key: doc_id, "score": score, "metadata": metadata,
+                            "visibility": metadata.get("visibility")})
+        matches.sort(key=lambda m: m["score"], reverse=not farthest)
+        self.served["two_stage"] += 1
+        return matches[:top_k]
+
+    def query_similar(self, member_id: str, top_k: int = 10,
+                      exclude_self: bool = True, namespace: str = "",
+                      visibility: Optional[List[str]] = None,
+                      farthest: bool = False) -> List[Dict[str, Any]]:
+        if namespace not in self.loaded:
+            self.served["store"] += 1
+            if farthest:
+                return self.base.query_different(member_id, top_k, exclude_self,
+                                                 namespace, visibility)
+            return self.base.query_similar(member_id, top_k, exclude_self,
+                                           namespace, visibility)
+        vector = self.base.fetch_vector(member_id, namespace=namespace)
+        if not vector:
+            return []
+        return self._shortlist_and_rerank(
+            vector, top_k, namespace, "kakao_id", visibility,
+            exclude=member_id if exclude_self else None, farthest=farthest)
+
+    def query_different(self, member_id: str, top_k: int = 10,
+                        exclude_self: bool = True, namespace: str = "",
+                        visibility: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        return self.query_similar(member_id, top_k, exclude_self, namespace,
+                                  visibility, farthest=True)
+
+    def query_by_vector(self, vector: List[float], top_k: int = 5,
+                        namespace: str = "",
+                        visibility: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        if namespace not in self.loaded:
+            self.served["store"] += 1
+            return self.base.query_by_vector(vector, top_k, namespace, visibility)
+        return self._shortlist_and_rerank(vector, top_k, namespace, "id",
+                                          visibility)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "dims": self.dims,
+            "dtype": settings.vector_store_dtype,
+            "candidates": self.candidates,
+            "served": dict(self.served),
+            "namespaces": {
+                ns: {"vectors": len(index), "loaded": ns in self.loaded,
+                     "snapshot": self.snapshots[ns].stats(),
+                     "pending": len(self._pending[ns]),
+                     "memory_bytes": index.memory_bytes(),
+                     "full_size_bytes": len(index) * settings.embedding_dimension * 4}
+                for ns, index in self.compact.items()
+            },
+        }
+
+
+class VectorWriteBuffer:
+    """Write-behind buffer in front of the vector store's upserts.
+
+    enqueue() coalesces by (namespace, id), so only a member's latest vector
+    is written. A flusher thread sends one upsert_many() per namespace and
+    VECTOR_WRITE_BATCH_SIZE vectors, as soon as that many are queued or
+    every VECTOR_WRITE_FLUSH_SECONDS, retrying with exponential backoff.
+    Batches that still fail are appended to a JSONL log that start()
+    replays, so a failed write is retried on the next boot instead of
+    leaving the index stale. Callers that need to know which of their own
+    writes failed take a token from open_batch(), pass it to enqueue() and
+    get exactly those failures back from flush(batch=token).
+    """
+
+    LATENCY_SAMPLES = 256
+    STALE_REPLAY_SECONDS = 600
+
+    def __init__(self, vectors: Any, log_path: Path, batch_size: int,
+                 flush_seconds: float, max_attempts: int) -> None:
+        self.vectors = vectors
+        self.log_path = log_path
+        self.batch_size = max(1, batch_size)
+        self.flush_seconds = flush_seconds
+        self.max_attempts = max(1, max_attempts)
+        self._pending: Dict[tuple, Dict[str, Any]] = {}
+        # (namespace, id) -> batch tokens of every caller that queued it.
+        self._owners: Dict[tuple, set] = {}
+        self._batch_failures: Dict[str, List[Dict[str, Any]]] = {}
+        self._cond = threading.Condition()
+        self._flushes_running = 0
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._log_lock = threading.Lock()
+        self._latencies: "deque[float]" = deque(maxlen=self.LATENCY_SAMPLES)
+        self.failures: "deque[Dict[str, Any]]" = deque(maxlen=100)
+        self.counters = {"enqueued": 0, "coalesced": 0, "flushed": 0,
+                         "batches": 0, "retries": 0, "failed": 0,
+                         "replayed": 0, "skipped": 0}
+
+    def start(self) -> Dict[str, Any]:
+        """Start the flusher and replay writes that failed in earlier runs."""
+        self._ensure_thread()
+        return self._replay()
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None:
+            with self._cond:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name="vector-writer", daemon=True)
+                    self._thread.start()
+
+    def open_batch(self) -> str:
+        """Return a token whose failures flush(batch=token) reports."""
+        token = secrets.token_hex(6)
+        with self._cond:
+            self._batch_failures[token] = []
+        return token
+
+    def enqueue(self, member_id: str, vector: List[float],
+                metadata: Dict[str, Any], namespace: str = "",
+                batch: Optional[str] = None) -> Dict[str, Any]:
+        if not self.vectors.index:
+            return {"skipped": True, "reason": "vector_store_not_configured"}
+        self._ensure_thread()
+        with self._cond:
+            key = (namespace, member_id)
+            if key in self._pending:
+                self.counters["coalesced"] += 1
+            self._pending[key] = {"id": member_id, "values": vector,
+                                  "metadata": metadata}
+            if batch:
+                # A coalesced write carries every caller's token: whoever
+                # queued the key learns that it did not land.
+                self._owners.setdefault(key, set()).add(batch)
+            self.counters["enqueued"] += 1
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify_all()
+        return {"queued": True, "namespace": namespace}
+
+    def flush(self, timeout: float = 120.0,
+              batch: Optional[str] = None) -> Dict[str, Any]:
+        """Write everything queued now and wait for in-flight batches.
+
+        `failed` lists the writes queued under `batch` that failed; the
+        token is closed afterwards. Without a token it is always empty.
+        """
+        self._flush_once()
+        with self._cond:
+            self._cond.wait_for(lambda: not self._flushes_running, timeout)
+            failed = self._batch_failures.pop(batch, []) if batch else []
+        return {"failed": failed, "queue_depth": len(self._pending)}
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=30)
+        self._flush_once()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._closed or len(self._pending) >= self.batch_size,
+                    self.flush_seconds)
+                if self._closed:
+                    return
+            self._flush_once()
+
+    def _flush_once(self) -> None:
+        with self._cond:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+            owners, self._owners = self._owners, {}
+            self._flushes_running += 1
+        try:
+            by_namespace: Dict[str, List[Dict[str, Any]]] = {}
+            for (namespace, _), item in pending.items():
+                by_namespace.setdefault(namespace, []).append(item)
+            for namespace, items in by_namespace.items():
+                for start in range(0, len(items), self.batch_size):
+                    self._write(namespace, items[start:start + self.batch_size],
+                                owners)
+        finally:
+            with self._cond:
+                self._flushes_running -= 1
+                self._cond.notify_all()
+
+    def _write(self, namespace: str, items: List[Dict[str, Any]],
+               owners: Dict[tuple, set]) -> None:
+        error = None
+        for attempt in range(self.max_attempts):
+            if attempt:
+                self.counters["retries"] += 1
+                time.sleep(min(0.5 * 2 ** (attempt - 1), 8.0))
+            started = time.perf_counter()
+            result = self.vectors.upsert_many(items, namespace=namespace)
+            self._latencies.append((time.perf_counter() - started) * 1000)
+            if result.get("skipped"):
+                self.counters["skipped"] += len(items)
+                return
+            error = result.get("error")
+            if not error:
+                self.counters["flushed"] += len(items)
+                self.counters["batches"] += 1
+                return
+        self.counters["failed"] += len(items)
+        self._log_failures(namespace, items, error, owners)
+
+    def _log_failures(self, namespace: str, items: List[Dict[str, Any]],
+                      error: Optional[str], owners: Dict[tuple, set]) -> None:
+        now = time.time()
+        with self._cond:
+            for item in items:
+                failure = {"namespace": namespace, "id": item["id"],
+                           "error": error, "at": now}
+                self.failures.append(failure)
+                for token in owners.get((namespace, item["id"]), ()):
+                    if token in self._batch_failures:
+                        self._batch_failures[token].append(failure)
+        try:
+            with self._log_lock:
+                self.log_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    for item in items:
+                        f.write(json.dumps({"namespace": namespace, **item,
+                                            "error": error, "at": now},
+                                           ensure_ascii=False) + "\n")
+        except Exception as e:
+            logger.error(f"Error writing vector failure log: {e}")
+
+    def _claim_logs(self) -> List[Path]:
+        # Renaming is atomic, so with several workers booting at once each
+        # log is replayed by exactly one of them.
+        candidates = [self.log_path] + [
+            p for p in self.log_path.parent.glob(f"{self.log_path.name}.replay-*")
+            if time.time() - p.stat().st_mtime > self.STALE_REPLAY_SECONDS
+        ]
+        claimed = []
+        for path in candidates:
+            target = path.with_name(
+                f"{self.log_path.name}.replay-{os.getpid()}-{secrets.token_hex(3)}")
+            try:
+                os.rename(path, target)
+            except FileNotFoundError:
+                continue
+            claimed.append(target)
+        return claimed
+
+    def _replay(self) -> Dict[str, Any]:
+        claimed = self._claim_logs()
+        if not claimed:
+            return {"replayed": 0}
+        replayed = 0
+        batch = self.open_batch()
+        try:
+            for path in claimed:
+                with open(path, encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            row = json.loads(line)
+                        except ValueError:
+                            continue
+                        self.enqueue(row["id"], row["values"], row.get("metadata") or {},
+                                     row.get("namespace", ""), batch=batch)
+                        replayed += 1
+        finally:
+            result = self.flush(batch=batch)
+        self.counters["replayed"] += replayed
+        for path in claimed:
+            path.unlink(missing_ok=True)
+        logger.info("Replayed %s failed vector writes (%s failed again)",
+                    replayed, len(result["failed"]))
+        return {"replayed": replayed, "failed_again": len(result["failed"])}
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = sorted(self._latencies)
+
+        def pct(q: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(q * len(latencies)))], 2)
+
+        return {
+            "queue_depth": len(self._pending),
+            "flushes_running": self._flushes_running,
+            **self.counters,
+            "flush_latency_ms": {"samples": len(latencies), "p50": pct(0.5),
+                                 "p95": pct(0.95),
+                                 "max": round(latencies[-1], 2) if latencies else None},
+            "recent_failures": list(self.failures)[-10:],
+            "failure_log": str(self.log_path),
+        }
+
+
+class DriftReconciler:
+    """Finds and repairs drift between member_profiles and the member vector namespaces.
+
+    Every member vector carries a `content_hash` of the text (or interest
+    terms) it was embedded from. A run lists both sides in bulk and sorts
+    each namespace into missing (content but no vector), stale (hash
+    differs), unhashed (written before hashes existed), orphaned (no
+    profile, or the content was cleared) and metadata drift (same content,
+    different visibility or name). Repair embeds only missing, stale and
+    unhashed entries (intro texts in batched requests, interests from the
+    term vocabulary), upserts them through the write buffer, deletes
+    orphans and patches metadata. Runs every DRIFT_RECONCILE_SECONDS, in one
+    worker at a time, and on demand.
+
+    A run aborts when the profile read fails or returns nothing, and holds
+    back orphan deletes above DRIFT_MAX_DELETE_FRACTION of a namespace
+    unless started with confirm_deletes, so a bad read cannot empty the
+    index.
+    """
+
+    NAMESPACES = ("intro", "interests")
+    SAMPLE = 20
+    EMBED_BATCH = 100
+
+    def __init__(self, supabase_svc: SupabaseService, vector_svc: Any,
+                 writer: VectorWriteBuffer, embedder: EmbeddingService,
+                 vocabulary: InterestVocabulary, lock_path: Path,
+                 max_delete_fraction: float = 0.05) -> None:
+        self.supabase = supabase_svc
+        self.vectors = vector_svc
+        self.writer = writer
+        self.embedder = embedder
+        self.vocabulary = vocabulary
+        self.lock_path = lock_path
+        self.max_delete_fraction = max_delete_fraction
+        self.status: Dict[str, Any] = {"state": "idle"}
+        self.last_report: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+
+    def run(self, repair: bool = True, confirm_deletes: bool = False) -> Dict[str, Any]:
+        if not self._lock.acquire(blocking=False):
+            return {"skipped": True, "reason": "already_running"}
+        try:
+            self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.lock_path, "a") as lock_file:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return {"skipped": True, "reason": "running_in_another_worker"}
+                try:
+                    return self._run(repair, confirm_deletes)
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+        finally:
+            self._lock.release()
+
+    def _progress(self, **fields: Any) -> None:
+        self.status = {**self.status, **fields}
+
+    def _run(self, repair: bool, confirm_deletes: bool) -> Dict[str, Any]:
+        started = time.time()
+        self.status = {"state": "running", "phase": "listing", "repair": repair,
+                       "started_at": started, "done": 0, "total": 0}
+        report: Dict[str, Any] = {"started_at": started, "repair": repair,
+                                  "namespaces": {}}
+        try:
+            if not self.supabase.client or not self.vectors.index:
+                report["error"] = "storage_not_configured"
+                return report
+            rows = self.supabase.fetch_every_profile()
+            if not rows:
+                # Diffing against a failed or empty read would orphan every vector.
+                report["error"] = "profile_read_failed" if rows is None else "no_profiles"
+                return report
+            profiles = {str(p["kakao_id"]): p for p in rows if p.get("kakao_id")}
+            hashes = {kakao_id: member_content_hashes(p)
+                      for kakao_id, p in profiles.items()}
+            report["profiles"] = len(profiles)
+            for namespace in self.NAMESPACES:
+                self._progress(phase="diff", namespace=namespace)
+                entries = self.vectors.list_entries(namespace)
+                if entries is None:
+                    report["namespaces"][namespace] = {"error": "list_failed"}
+                    continue
+                diff = self._diff(namespace, profiles, hashes, entries)
+                summary: Dict[str, Any] = {"vectors": len(entries)}
+                for kind, ids in diff.items():
+                    summary[kind] = {"count": len(ids), "sample": ids[:self.SAMPLE]}
+                if (diff["orphaned"] and not confirm_deletes
+                        and len(diff["orphaned"]) > self.max_delete_fraction * len(entries)):
+                    logger.warning(
+                        f"Drift reconcile holding back {len(diff['orphaned'])} orphan "
+                        f"deletes in {namespace} ({len(entries)} vectors); "
+                        "rerun with confirm_deletes to apply them.")
+                    summary["deletes_held"] = True
+                    diff["orphaned"] = []
+                if repair:
+                    summary["repaired"] = self._repair(namespace, diff, profiles)
+                report["namespaces"][namespace] = summary
+            return report
+        except Exception as e:
+            logger.error(f"Drift reconcile failed: {e}")
+            report["error"] = str(e)[:200]
+            return report
+        finally:
+            report["duration_seconds"] = round(time.time() - started, 2)
+            self.last_report = report
+            self.status = {"state": "idle", "finished_at": time.time()}
+
+    @staticmethod
+    def _diff(namespace: str, profiles: Dict[str, Dict[str, Any]],
+              hashes: Dict[str, Dict[str, str]],
+              entries: Dict[str, Dict[str, Any]]) -> Dict[str, List[str]]:
+        diff: Dict[str, List[str]] = {"missing": [], "stale": [], "unhashed": [],
+                                      "orphaned": [], "metadata": []}
+        for kakao_id, profile in profiles.items():
+            expected = hashes[kakao_id].get(namespace)
+            metadata = entries.get(kakao_id)
+            if expected is None:
+                if metadata is not None:
+                    diff["orphaned"].append(kakao_id)
+            elif metadata is None:
+                diff["missing"].append(kakao_id)
+            elif not metadata.get("content_hash"):
+                diff["unhashed"].append(kakao_id)
+            elif metadata["content_hash"] != expected:
+                diff["stale"].append(kakao_id)
+            elif (metadata.get("visibility") != profile.get("visibility", "public")
+                  or metadata.get("name") != profile.get("name", "")):
+                diff["metadata"].append(kakao_id)
+        diff["orphaned"].extend(i for i in entries if i not in profiles)
+        return diff
+
+    def _repair(self, namespace: str, diff: Dict[str, List[str]],
+                profiles: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        targets = diff["missing"] + diff["stale"] + diff["unhashed"]
+        self._progress(phase="embedding", namespace=namespace, done=0,
+                       total=len(targets))
+        queued = 0
+        token = self.writer.open_batch()
+        try:
+            for start in range(0, len(targets), self.EMBED_BATCH):
+                batch = targets[start:start + self.EMBED_BATCH]
+                if namespace == "intro":
+                    vectors = self.embedder.embed_many(
+                        [normalize_intro_text(profiles[i]) for i in batch])
+                else:
+                    # One request for the batch's unseen terms; compose() then hits the vocabulary.
+                    self.vocabulary.vectors_for([
+                        t for i in batch
+                        for t in (profiles[i].get("interests") or [])
+                        + (profiles[i].get("strengths") or [])])
+                    vectors = [self.vocabulary.compose(profiles[i].get("interests"),
+                                                       profiles[i].get("strengths"))
+                               for i in batch]
+                for kakao_id, vector in zip(batch, vectors):
+                    if vector and self.writer.enqueue(
+                            kakao_id, vector,
+                            member_vector_metadata(profiles[kakao_id], namespace),
+                            namespace, batch=token).get("queued"):
+                        queued += 1
+                self._progress(done=min(start + len(batch), len(targets)))
+            self._progress(phase="writing")
+        finally:
+            # Closes the token even when embedding fails partway through.
+            failed = self.writer.flush(batch=token)["failed"]
+        deleted = 0
+        if diff["orphaned"]:
+            result = self.vectors.delete_many(diff["orphaned"], namespace=namespace)
+            deleted = 0 if result.get("error") or result.get("skipped") else len(diff["orphaned"])
+        patched = 0
+        for kakao_id in diff["metadata"]:
+            result = self.vectors.update_metadata(
+                kakao_id, member_vector_metadata(profiles[kakao_id], namespace),
+                namespace=namespace)
+            if not result.get("error") and not result.get("skipped"):
+                patched += 1
+        return {"upserted": queued - len(failed), "failed": len(failed),
+                "deleted": deleted, "metadata_patched": patched}
+
+    async def reconcile_forever(self, interval_seconds: float) -> None:
+        while True:
+            await asyncio.sleep(interval_seconds)
+            await asyncio.to_thread(self.run)
+
+
+class JobStoryEmbedder:
+    """Re-embeds only the Mafia42 job stories that changed since the last run.
+
+    Each job vector carries a `content_hash` of the `name: story` text it
+    was embedded from. A run lists the mafia42_jobs namespace once, embeds
+    new or edited stories in one batched request, writes them through the
+    write buffer together, patches team-only edits and deletes the vectors
+    of jobs that were removed or lost their story. When anything changed,
+    the job matcher reloads under a new catalog version and role reasoning
+    cached for the changed jobs is evicted, here and (through the `jobs`
+    invalidation) in the other workers. The matcher is also rebuilt when
+    it holds no job vectors, so a run fixes a matcher left empty.
+    """
+
+    NAMESPACE = "mafia42_jobs"
+    STORY_METADATA_CHARS = 2000
+
+    def __init__(self, supabase_svc: SupabaseService, vector_svc: Any,
+                 writer: VectorWriteBuffer, embedder: EmbeddingService,
+                 matcher: LocalJobMatcher, reasoning: RoleReasoningService) -> None:
+        self.supabase = supabase_svc
+        self.vectors = vector_svc
+        self.writer = writer
+        self.embedder = embedder
+        self.matcher = matcher
+        self.reasoning = reasoning
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def text(job: Dict[str, Any]) -> str:
+        return f"{job.get('name', '')}: {job.get('story', '')}"
+
+    def metadata(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        return {"code": str(job.get("code", "")), "name": job.get("name", ""),
+                "team": job.get("team", ""),
+                "story": job["story"][:self.STORY_METADATA_CHARS],
+                "content_hash": hashlib.sha256(
+                    f"{settings.embedding_model}\n{self.text(job)}".encode()).hexdigest()}
+
+    def run(self, force: bool = False) -> Dict[str, Any]:
+        """Embed what changed; `force` reloads the matcher and republishes its snapshot regardless."""
+        if not self._lock.acquire(blocking=False):
+            return {"skipped": True, "reason": "already_running"}
+        try:
+            return self._run(force)
+        finally:
+            self._lock.release()
+
+    def _run(self, force: bool) -> Dict[str, Any]:
+        jobs = self.supabase.fetch_mafia42_jobs()
+        if not jobs:
+            return {"error": "no_jobs"}
+        entries = self.vectors.list_entries(self.NAMESPACE)
+        report: Dict[str, Any] = {"total_jobs": len(jobs), "embedded_count": 0,
+                                  "unchanged": 0, "metadata_patched": 0,
+                                  "deleted": 0, "failed_jobs": []}
+        changed: List[tuple] = []
+        patched: List[Dict[str, Any]] = []
+        for job in jobs:
+            code = str(job.get("code", ""))
+            if not job.get("story"):
+                report["failed_jobs"].append({"code": code, "reason": "no_story"})
+                continue
+            metadata = self.metadata(job)
+            stored = (entries or {}).get(code)
+            if not stored or stored.get("content_hash") != metadata["content_hash"]:
+                changed.append((job, metadata))
+            elif stored.get("team") != metadata["team"]:
+                patched.append(metadata)
+            else:
+                report["unchanged"] += 1
+
+        if changed:
+            report["embedded_count"] = self._embed(changed, report["failed_jobs"])
+        for metadata in patched:
+            result = self.vectors.update_metadata(metadata["code"], metadata,
+                                                  namespace=self.NAMESPACE)
+            if not result.get("error") and not result.get("skipped"):
+                report["metadata_patched"] += 1
+        touched = [m["code"] for _, m in changed] + [m["code"] for m in patched]
+        # Without a listing (list_entries failed) nothing is known to be orphaned.
+        keep = {str(j.get("code", "")) for j in jobs if j.get("story")}
+        removed = [code for code in entries or {} if code not in keep]
+        if removed:
+            result = self.vectors.delete_many(removed, namespace=self.NAMESPACE)
+            if not result.get("error") and not result.get("skipped"):
+                report["deleted"] = len(removed)
+                touched += removed
+
+        if touched or force or not self.matcher.has_vectors:
+            # Waits out a load already in progress (e.g. the periodic
+            # refresh), which would otherwise swallow this rebuild and its
+            # `jobs` event.
+            result = self.matcher.load(rebuild=True, changed=touched or None, wait=True)
+            if result.get("skipped"):
+                report["reload_error"] = result.get("reason")
+            names = [j.get("name") for j in jobs if str(j.get("code", "")) in set(touched)]
+            self.reasoning.forget_jobs(touched + names)
+        report["changed_codes"] = touched
+        report["catalog_version"] = self.matcher.catalog_version
+        return report
+
+    def _embed(self, changed: List[tuple], failed_jobs: List[Dict[str, Any]]) -> int:
+        try:
+            vectors = self.embedder.embed_many([self.text(job) for job, _ in changed])
+        except Exception as e:
+            logger.error(f"Error embedding job stories: {e}")
+            failed_jobs.extend({"code": m["code"], "reason": str(e)[:100]}
+                               for _, m in changed)
+            return 0
+        queued = 0
+        token = self.writer.open_batch()
+        for (_, metadata), vector in zip(changed, vectors):
+            if not vector:
+                failed_jobs.append({"code": metadata["code"], "reason": "embedding_failed"})
+                continue
+            result = self.writer.enqueue(metadata["code"], vector, metadata,
+                                         self.NAMESPACE, batch=token)
+            if result.get("skipped"):
+                failed_jobs.append({"code": metadata["code"], "reason": result.get("reason")})
+            else:
+                queued += 1
+        for failure in self.writer.flush(batch=token)["failed"]:
+            queued -= 1
+            failed_jobs.append({"code": failure["id"], "reason": failure["error"]})
+        return queued
+
+
+class ReembedJobs:
+    """Background re-embedding of every member profile, resumable across restarts.
+
+    A job snapshots the sorted kakao_id list and works through it in batches
+    of REEMBED_BATCH_SIZE: each batch reads only the embedded columns, sends
+    its intro texts in one embedding request, composes interest vectors from
+    the term vocabulary and queues both through the write buffer. Up to
+    REEMBED_CONCURRENCY batches run per round; after each round the buffer
+    is flushed and the cursor is checkpointed to <job id>.json under
+    REEMBED_JOBS_DIR, so a job cut off by a crash or deploy resumes from its
+    last checkpoint when the next worker boots. One job runs at a time
+    across workers. A dry run reads the same batches but only estimates
+    tokens and cost.
+    """
+
+    ACTIVE = ("queued", "running", "interrupted")
+    RESUMABLE = ACTIVE + ("failed",)
+    # No tokenizer is installed: ~4 ASCII characters per token, and Hangul
+    # (or other non-ASCII) characters counted as a token each, which errs high.
+    CHARS_PER_TOKEN = 4
+    ERROR_SAMPLE = 20
+
+    def __init__(self, supabase_svc: SupabaseService, embedder: EmbeddingService,
+                 vocabulary: InterestVocabulary, writer: VectorWriteBuffer,
+                 root: Path, batch_size: int, concurrency: int,
+                 price_per_million_tokens: float) -> None:
+        self.supabase = supabase_svc
+        self.embedder = embedder
+        self.vocabulary = vocabulary
+        self.writer = writer
+        self.root = root
+        self.batch_size = max(1, batch_size)
+        self.concurrency = max(1, concurrency)
+        self.price_per_million_tokens = price_per_million_tokens
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._cancel: Dict[str, threading.Event] = {}
+        self._threads: List[threading.Thread] = []
+        self._shutdown = threading.Event()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def estimate_tokens(cls, text: str) -> int:
+        ascii_chars = sum(1 for c in text if c.isascii())
+        return -(-ascii_chars // cls.CHARS_PER_TOKEN) + len(text) - ascii_chars
+
+    def _path(self, job_id: str) -> Path:
+        return self.root / f"{job_id}.json"
+
+    def _save(self, job: Dict[str, Any]) -> None:
+        with self._lock:
+            data = json.dumps(job, ensure_ascii=False)
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._path(job["id"]).with_suffix(".tmp")
+        tmp_path.write_text(data, encoding="utf-8")
+        os.replace(tmp_path, self._path(job["id"]))
+
+    def _load(self, job_id: str) -> Optional[Dict[str, Any]]:
+        if job_id in self._jobs:
+            return self._jobs[job_id]
+        if not job_id.replace("-", "").isalnum():
+            return None
+        try:
+            return json.loads(self._path(job_id).read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _all(self) -> List[Dict[str, Any]]:
+        jobs = [self._load(p.stem) for p in self.root.glob("*.json")]
+        return sorted((j for j in jobs if j), key=lambda j: j["created_at"])
+
+    def _try_lock(self) -> Optional[Any]:
+        self.root.mkdir(parents=True, exist_ok=True)
+        lock_file = open(self.root / "active.lock", "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return None
+        return lock_file
+
+    def public(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            view = json.loads(json.dumps({k: v for k, v in job.items() if k != "ids"}))
+        view["progress"] = round(job["cursor"] / job["total"], 4) if job["total"] else 1.0
+        return view
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self._load(job_id)
+        return self.public(job) if job else None
+
+    def recent(self, limit: int = 20) -> List[Dict[str, Any]]:
+        return [self.public(j) for j in reversed(self._all())][:limit]
+
+    def start(self, dry_run: bool = False,
+              batch_size: Optional[int] = None) -> Dict[str, Any]:
+        if not self.supabase.client:
+            return {"skipped": True, "reason": "supabase_not_configured"}
+        if not dry_run and not (self.embedder.client and self.writer.vectors.index):
+            return {"skipped": True, "reason": "embeddings_not_configured"}
+        lock_file = self._try_lock()
+        if lock_file is None:
+            running = [j["id"] for j in self._all() if j["state"] in self.ACTIVE]
+            return {"skipped": True, "reason": "job_running",
+                    "job_id": running[-1] if running else None}
+        ids = self.supabase.fetch_profile_ids()
+        if ids is None:
+            lock_file.close()
+            return {"error": "profile_ids_unavailable"}
+        if not dry_run:
+            # A fresh full pass covers whatever an interrupted job had left.
+            for old in self._all():
+                if old["state"] in self.RESUMABLE and not old["dry_run"]:
+                    old["state"] = "superseded"
+                    self._save(old)
+        now = time.time()
+        job: Dict[str, Any] = {
+            "id": f"{int(now)}-{secrets.token_hex(3)}",
+            "state": "queued", "dry_run": dry_run,
+            "batch_size": max(1, batch_size or self.batch_size),
+            "concurrency": self.concurrency,
+            "created_at": now, "started_at": None, "updated_at": now,
+            "finished_at": None, "total": len(ids), "cursor": 0, "runs": 0,
+            "counts": {"intro": 0, "interests": 0, "failed": 0, "missing": 0},
+            "errors": [], "ids": ids,
+        }
+        if dry_run:
+            job["estimate"] = {"intro_texts": 0, "intro_cached": 0,
+                               "intro_tokens": 0, "new_terms": 0,
+                               "term_tokens": 0, "requests": 0,
+                               "price_per_million_tokens": self.price_per_million_tokens,
+                               "cost_usd": 0.0}
+        self._save(job)
+        self._launch(job, lock_file)
+        return self.public(job)
+
+    def resume(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self._load(job_id)
+        if job is None:
+            return None
+        if job["state"] not in self.RESUMABLE:
+            return {"skipped": True, "reason": f"job_{job['state']}"}
+        lock_file = self._try_lock()
+        if lock_file is None:
+            return {"skipped": True, "reason": "job_running"}
+        self._launch(job, lock_file)
+        return self.public(job)
+
+    def resume_pending(self) -> Optional[str]:
+        """Pick up the job a crash or deploy cut off; called once per worker boot."""
+        pending = [j for j in self._all() if j["state"] in self.ACTIVE]
+        if not pending:
+            return None
+        lock_file = self._try_lock()
+        if lock_file is None:
+            return None
+        job = pending[-1]
+        logger.info("Resuming re-embed job %s at %s/%s", job["id"],
+                    job["cursor"], job["total"])
+        self._launch(job, lock_file)
+        return job["id"]
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self._load(job_id)
+        if job is None:
+            return None
+        if job["state"] not in self.RESUMABLE:
+            return self.public(job)
+        if job_id in self._cancel:
+            self._cancel[job_id].set()
+        else:
+            lock_file = self._try_lock()
+            if lock_file is None:
+                # Running in another worker, which checks for this marker
+                # between rounds.
+                self._path(job_id).with_suffix(".cancel").touch()
+            else:
+                with lock_file:
+                    job.update(state="cancelled", finished_at=time.time())
+                    self._save(job)
+        return {**self.public(job), "cancel_requested": True}
+
+    def stop(self, timeout: float = 30.0) -> None:
+        """Let running jobs checkpoint their current round and stop as interrupted."""
+        self._shutdown.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _launch(self, job: Dict[str, Any], lock_file: Any) -> None:
+        self._jobs[job["id"]] = job
+        self._cancel[job["id"]] = threading.Event()
+        thread = threading.Thread(target=self._run, args=(job, lock_file),
+                                  name=f"reembed-{job['id']}", daemon=True)
+        self._threads.append(thread)
+        thread.start()
+
+    def _run(self, job: Dict[str, Any], lock_file: Any) -> None:
+        job_id = job["id"]
+        cancel_marker = self._path(job_id).with_suffix(".cancel")
+        new_terms: set = set()
+        try:
+            job.update(state="running", started_at=job["started_at"] or time.time(),
+                       runs=job["runs"] + 1, error=None)
+            self._save(job)
+            step = job["batch_size"]
+            with ThreadPoolExecutor(max_workers=job["concurrency"],
+                                    thread_name_prefix="reembed") as pool:
+                while job["cursor"] < job["total"]:
+                    if self._cancel[job_id].is_set() or cancel_marker.exists():
+                        job["state"] = "cancelled"
+                        break
+                    if self._shutdown.is_set():
+                        job["state"] = "interrupted"
+                        break
+                    end = min(job["total"], job["cursor"] + step * job["concurrency"])
+                    batches = [job["ids"][i:min(i + step, end)]
+                               for i in range(job["cursor"], end, step)]
+                    if job["dry_run"]:
+                        results = list(pool.map(self._estimate_batch, batches))
+                        failed = []
+                    else:
+                        token = self.writer.open_batch()
+                        try:
+                            results = list(pool.map(
+                                lambda ids: self._embed_batch(ids, token), batches))
+                        finally:
+                            failed = self.writer.flush(batch=token)["failed"]
+                    with self._lock:
+                        for result in results:
+                            for key in job["counts"]:
+                                job["counts"][key] += result.get(key, 0)
+                            if job["dry_run"]:
+                                self._add_estimate(job["estimate"], result, new_terms)
+                        for failure in failed:
+                            job["counts"]["failed"] += 1
+                            namespace = failure["namespace"]
+                            if job["counts"].get(namespace, 0) > 0:
+                                job["counts"][namespace] -= 1
+                            if len(job["errors"]) < self.ERROR_SAMPLE:
+                                job["errors"].append(
+                                    f"{namespace}:{failure['id']}:{failure['error']}")
+                        job["cursor"] = end
+                        job["updated_at"] = time.time()
+                    self._save(job)
+                else:
+                    job["state"] = "completed"
+        except Exception as e:
+            logger.error(f"Re-embed job {job_id} failed at {job['cursor']}: {e}")
+            job.update(state="failed", error=str(e)[:200])
+        finally:
+            if job["state"] != "interrupted":
+                job["finished_at"] = time.time()
+            job["updated_at"] = time.time()
+            self._save(job)
+            cancel_marker.unlink(missing_ok=True)
+            self._jobs.pop(job_id, None)
+            self._cancel.pop(job_id, None)
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+            lock_file.close()
+            logger.info("Re-embed job %s %s at %s/%s", job_id, job["state"],
+                        job["cursor"], job["total"])
+
+    def _rows(self, kakao_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        return {str(r["kakao_id"]): r
+                for r in self.supabase.fetch_profiles_for_embedding(kakao_ids)}
+
+    def _embed_batch(self, kakao_ids: List[str], token: str) -> Dict[str, Any]:
+        rows = self._rows(kakao_ids)
+        counts = {"intro": 0, "interests": 0, "missing": len(kakao_ids) - len(rows)}
+        intro = [(k, normalize_intro_text(p)) for k, p in rows.items()]
+        intro = [(k, text) for k, text in intro if text.strip()]
+        for (kakao_id, _), vector in zip(intro, self.embedder.embed_many(
+                [text for _, text in intro])):
+            if vector and self.writer.enqueue(
+                    kakao_id, vector, member_vector_metadata(rows[kakao_id], "intro"),
+                    "intro", batch=token).get("queued"):
+                counts["intro"] += 1
+        # One request for the batch's unseen terms; compose() then hits the vocabulary.
+        self.vocabulary.vectors_for([
+            t for p in rows.values()
+            for t in (p.get("interests") or []) + (p.get("strengths") or [])])
+        for kakao_id, profile in rows.items():
+            vector = self.vocabulary.compose(profile.get("interests"),
+                                             profile.get("strengths"))
+            if vector and self.writer.enqueue(
+                    kakao_id, vector, member_vector_metadata(profile, "interests"),
+                    "interests", batch=token).get("queued"):
+                counts["interests"] += 1
+        return counts
+
+    def _estimate_batch(self, kakao_ids: List[str]) -> Dict[str, Any]:
+        rows = self._rows(kakao_ids)
+        texts = [t for t in map(normalize_intro_text, rows.values()) if t.strip()]
+        uncached = [t for t in texts if self.embedder.cached(t) is None]
+        return {"missing": len(kakao_ids) - len(rows),
+                "intro_texts": len(texts), "intro_cached": len(texts) - len(uncached),
+                "intro_tokens": sum(map(self.estimate_tokens, uncached)),
+                "terms": self.vocabulary.unseen([
+                    t for p in rows.values()
+                    for t in (p.get("interests") or []) + (p.get("strengths") or [])])}
+
+    def _add_estimate(self, estimate: Dict[str, Any], result: Dict[str, Any],
+                      new_terms: set) -> None:
+        terms = [t for t in result["terms"] if t not in new_terms]
+        new_terms.update(terms)
+        estimate["intro_texts"] += result["intro_texts"]
+        estimate["intro_cached"] += result["intro_cached"]
+        estimate["intro_tokens"] += result["intro_tokens"]
+        estimate["new_terms"] += len(terms)
+        estimate["term_tokens"] += sum(map(self.estimate_tokens, terms))
+        estimate["requests"] += bool(result["intro_tokens"]) + bool(terms)
+        tokens = estimate["intro_tokens"] + estimate["term_tokens"]
+        estimate["cost_usd"] = round(
+            tokens / 1_000_000 * self.price_per_million_tokens, 6)
+
+
+async def refresh_job_catalog(interval_seconds: float) -> None:
+    """Pick up mafia42_jobs edits made outside /admin/embed-jobs (e.g. in the Supabase UI)."""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        changed = await asyncio.to_thread(local_job_matcher.refresh_catalog)
+        if changed:
+            logger.info("Job catalog now %s (%s jobs changed)",
+                        local_job_matcher.catalog_version, len(changed))
+            role_reasoning_service.forget_jobs(changed)
+
+
+async def watch_vector_snapshots(interval_seconds: float) -> None:
+    """Keep this worker's mapped vector snapshots current (see VectorSnapshots)."""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        await asyncio.to_thread(local_job_matcher.sync_snapshot)
+        if isinstance(pinecone_service, TwoStageVectorService):
+            await asyncio.to_thread(pinecone_service.sync_snapshots)
+
+
+def benchmark_vector_tiers(vector_svc: Any, supabase_svc: SupabaseService,
+                           namespace: str, dims_options: List[int], k: int,
+                           candidates: int) -> Dict[str, Any]:
+    """recall@k of shortened vs. re-ranked retrieval on the stored member vectors."""
+    ids = [str(p["kakao_id"]) for p in supabase_svc.fetch_profiles_for_search()
+           if p.get("kakao_id")]
+    vectors = vector_svc.fetch_vectors(ids, namespace=namespace)
+    if not vectors:
+        return {"namespace": namespace, "vectors": 0, "error": "no_vectors"}
+    matrix = np.array(list(vectors.values()), dtype=np.float32)
+    dims_options = [d for d in dims_options if 0 < d < matrix.shape[1]]
+    return {"namespace": namespace,
+            **recall_benchmark(matrix, dims_options, k, candidates),
+            "quantization": quantization_report(matrix, k)}
+
+
+def _build_vector_service() -> PineconeService | PgVectorService | TwoStageVectorService:
+    service: PineconeService | PgVectorService | None = None
+    if settings.vector_backend == "pgvector":
+        pool = get_postgres_pool()
+        if pool:
+            service = PgVectorService(pool, settings.embedding_dimension)
+        else:
+            logger.warning("pgvector backend unavailable; using Pinecone instead.")
+    service = service or PineconeService()
+    if settings.vector_retrieval_mode == "two_stage":
+        return TwoStageVectorService(service, supabase_service,
+                                     settings.compact_embedding_dimensions,
+                                     settings.rerank_candidates)
+    return service
+
+
+pinecone_service = _build_vector_service()
 clustering_service = ClusteringService(pinecone_service, supabase_service)
+profile_search_index = ProfileSearchIndex(supabase_service)
+local_job_matcher = LocalJobMatcher(supabase_service, pinecone_service,
+                                    Path(settings.role_assignments_path),
+                                    settings.role_assignments_max)
+vector_writer = VectorWriteBuffer(
+    pinecone_service, Path(settings.vector_write_failure_log),
+    settings.vector_write_batch_size, settings.vector_write_flush_seconds,
+    settings.vector_write_max_attempts)
+drift_reconciler = DriftReconciler(
+    supabase_service, pinecone_service, vector_writer, embedding_service,
+    interest_vocabulary, settings.data_dir / "drift_reconcile.lock",
+    settings.drift_max_delete_fraction)
+job_story_embedder = JobStoryEmbedder(
+    supabase_service, pinecone_service, vector_writer, embedding_service,
+    local_job_matcher, role_reasoning_service)
+reembed_jobs = ReembedJobs(
+    supabase_service, embedding_service, interest_vocabulary, vector_writer,
+    settings.reembed_jobs_dir, settings.reembed_batch_size,
+    settings.reembed_concurrency, settings.embedding_price_per_million_tokens)
+invalidation_bus = InvalidationBus(
+    settings.invalidation_bus,
+    get_postgres_pool() if settings.database_url else None,
+    supabase_service.client, settings.invalidation_poll_seconds)
+session_signer.invalidation_bus = invalidation_bus
+supabase_service.invalidation_bus = invalidation_bus
+local_job_matcher.invalidation_bus = invalidation_bus
+if isinstance(pinecone_service, TwoStageVectorService):
+    pinecone_service.invalidation_bus = invalidation_bus
+
+
+def _on_profile_invalidated(kakao_id: str, _version: Optional[str]) -> None:
+    supabase_service.profile_cache.pop(kakao_id)
+    profile_search_index.refresh(kakao_id)
+
+
+def _on_jobs_invalidated(codes: str, _version: Optional[str]) -> None:
+    local_job_matcher.load(wait=True)
+    if codes == "*":
+        role_reasoning_service.cache.clear()
+        return
+    changed = codes.split(",")
+    role_reasoning_service.forget_jobs(changed + [
+        local_job_matcher.by_code[c].get("name") for c in changed
+        if c in local_job_matcher.by_code])
+
+
+def _on_vectors_invalidated(_namespace: str, _version: Optional[str]) -> None:
+    if isinstance(pinecone_service, TwoStageVectorService):
+        pinecone_service.sync_snapshots()
+
+
+def _resync_after_gap() -> None:
+    # Events published while this worker's LISTEN connection was down are
+    # gone; drop or rebuild everything they could have invalidated.
+    supabase_service.profile_cache.clear()
+    if profile_search_index.built:
+        profile_search_index.rebuild()
+    _on_jobs_invalidated("*", None)
+    _on_vectors_invalidated("*", None)
+    for kakao_id, revoked_ms in session_signer._read_revocations().items():
+        session_signer.apply_revocation(kakao_id, revoked_ms)
+
+
+invalidation_bus.on("profile", _on_profile_invalidated)
+invalidation_bus.on(
+    "session", lambda kakao_id, version: session_signer.apply_revocation(
+        kakao_id, int(version) if version else int(time.time() * 1000)))
+invalidation_bus.on("jobs", _on_jobs_invalidated)
+invalidation_bus.on("vectors", _on_vectors_invalidated)
+invalidation_bus.on_resync(_resync_after_gap)
 
 
 def normalize_profile_text(payload: Dict[str, Any]) -> str:
@@ -1297,16 +4165,33 @@ def normalize_intro_text(payload: Dict[str, Any]) -> str:
     return "\n".join([p for p in parts if p])
 
 
-def normalize_interests_text(payload: Dict[str, Any]) -> str:
-    """Extract interests-focused text for embedding."""
-    interests = payload.get("interests") or []
-    strengths = payload.get("strengths") or []
-    parts = [
-        payload.get("name", ""),
-        "관심사: " + ", ".join(interests) if interests else "",
-        "강점: " + ", ".join(strengths) if strengths else "",
-    ]
-    return "\n".join([p for p in parts if p])
+def member_content_hashes(payload: Dict[str, Any]) -> Dict[str, str]:
+    """Hash of what each member namespace's vector is built from.
+
+    A namespace is absent when the profile has nothing to embed there.
+    """
+    hashes = {}
+    intro_text = normalize_intro_text(payload)
+    if intro_text.strip():
+        hashes["intro"] = hashlib.sha256(
+            f"{settings.embedding_model}\n{intro_text}".encode()).hexdigest()
+    terms = sorted(
+        [f"i:{InterestVocabulary.normalize_term(t)}" for t in payload.get("interests") or []]
+        + [f"s:{InterestVocabulary.normalize_term(t)}" for t in payload.get("strengths") or []])
+    terms = [t for t in terms if len(t) > 2]
+    if terms:
+        hashes["interests"] = hashlib.sha256(
+            "\n".join([settings.embedding_model, "interests-v1", *terms]).encode()).hexdigest()
+    return hashes
+
+
+def member_vector_metadata(payload: Dict[str, Any], namespace: str) -> Dict[str, Any]:
+    metadata = {"visibility": payload.get("visibility", "public"),
+                "name": payload.get("name", "")}
+    content_hash = member_content_hashes(payload).get(namespace)
+    if content_hash:
+        metadata["content_hash"] = content_hash
+    return metadata
 
 
 def assemble_profile_record(kakao_id: str,
@@ -0,0 +1,430 @@
+import fcntl
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def unit_rows(matrix: np.ndarray) -> np.ndarray:
+    return matrix / (np.linalg.norm(matrix, axis=-1, keepdims=True) + 1e-12)
+
+
+def shorten(vectors: Any, dims: int) -> np.ndarray:
+    """Matryoshka shortening: keep the first `dims` components and renormalize.
+
+    text-embedding-3-* models are trained so that a prefix of the vector is
+    itself a usable embedding; this is what the API's `dimensions`
+    parameter does server-side, so no extra embedding call is needed.
+    """
+    return unit_rows(np.asarray(vectors, dtype=np.float32)[..., :dims])
+
+
+class VectorStore:
+    """Contiguous unit-normalized vectors keyed by id, as float32, float16 or int8.
+
+    int8 rows carry a symmetric per-vector scale (max |x| maps to 127).
+    Scoring is a dot product on the stored arrays themselves: BLAS for
+    float32, float32 accumulation straight over float16, and an
+    int32-accumulated integer dot product against the int8-quantized query,
+    rescaled per row afterwards. Only the query is converted, once per call.
+    """
+
+    DTYPES = ("float32", "float16", "int8")
+
+    def __init__(self, dims: int, dtype: str = "float32") -> None:
+        if dtype not in self.DTYPES:
+            raise ValueError(f"unsupported vector dtype: {dtype}")
+        self.dims = dims
+        self.dtype = dtype
+        self.ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._data = np.zeros((0, dims), dtype=dtype)
+        self._scale = np.ones(0, dtype=np.float32)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _encode(self, matrix: Any) -> Tuple[np.ndarray, np.ndarray]:
+        rows = unit_rows(np.asarray(matrix, dtype=np.float32).reshape(-1, self.dims))
+        if self.dtype != "int8":
+            return rows.astype(self.dtype), np.ones(len(rows), dtype=np.float32)
+        scale = np.abs(rows).max(axis=1) / 127
+        scale[scale == 0] = 1.0
+        return np.round(rows / scale[:, None]).astype(np.int8), scale.astype(np.float32)
+
+    def replace(self, ids: List[str], matrix: Any) -> None:
+        data, scale = self._encode(matrix) if len(ids) else (
+            np.zeros((0, self.dims), dtype=self.dtype), np.ones(0, dtype=np.float32))
+        with self._lock:
+            self.ids = list(ids)
+            self._rows = {doc_id: i for i, doc_id in enumerate(ids)}
+            self._data, self._scale = data, scale
+
+    @classmethod
+    def from_arrays(cls, ids: List[str], data: np.ndarray,
+                    scale: np.ndarray) -> "VectorStore":
+        """Wrap already-encoded arrays (e.g. memory-mapped ones) without copying."""
+        store = cls(data.shape[1], str(data.dtype))
+        store.ids = list(ids)
+        store._rows = {doc_id: i for i, doc_id in enumerate(ids)}
+        store._data, store._scale = data, scale
+        return store
+
+    def arrays(self) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        with self._lock:
+            return self.ids, self._data, self._scale
+
+    def upsert(self, doc_id: str, vector: Sequence[float]) -> int:
+        """Store one vector; returns its row."""
+        data, scale = self._encode(vector)
+        with self._lock:
+            i = self._rows.get(doc_id)
+            if i is not None:
+                if not self._data.flags.writeable:
+                    # Memory-mapped snapshot: copy on first write.
+                    self._data, self._scale = np.array(self._data), np.array(self._scale)
+                self._data[i], self._scale[i] = data[0], scale[0]
+                return i
+            # Appends copy the arrays so concurrent readers keep a consistent snapshot.
+            self._data = np.concatenate([self._data, data])
+            self._scale = np.concatenate([self._scale, scale])
+            self._rows[doc_id] = len(self.ids)
+            self.ids = self.ids + [doc_id]
+            return len(self.ids) - 1
+
+    def delete(self, doc_ids: Sequence[str]) -> int:
+        """Drop rows by id; returns how many were present."""
+        with self._lock:
+            gone = {doc_id for doc_id in doc_ids if doc_id in self._rows}
+            if not gone:
+                return 0
+            keep = np.array([doc_id not in gone for doc_id in self.ids], dtype=bool)
+            # Fancy indexing copies, so readers holding the old arrays are unaffected.
+            self._data, self._scale = self._data[keep], self._scale[keep]
+            self.ids = [doc_id for doc_id in self.ids if doc_id not in gone]
+            self._rows = {doc_id: i for i, doc_id in enumerate(self.ids)}
+            return len(gone)
+
+    def get(self, doc_id: str) -> Optional[np.ndarray]:
+        i = self._rows.get(doc_id)
+        if i is None:
+            return None
+        return self._data[i].astype(np.float32) * self._scale[i]
+
+    def scores(self, query: Sequence[float]) -> Tuple[List[str], np.ndarray]:
+        """(ids, cosine score per row) for a query of the store's width."""
+        with self._lock:
+            ids, data, scale = self.ids, self._data, self._scale
+        q = np.asarray(query, dtype=np.float32)[:self.dims]
+        q = q / (np.linalg.norm(q) or 1.0)
+        if self.dtype == "float32":
+            return ids, data @ q
+        if self.dtype == "float16":
+            return ids, np.einsum("ij,j->i", data, q, dtype=np.float32)
+        q_scale = float(np.abs(q).max() / 127) or 1.0
+        q8 = np.round(q / q_scale).astype(np.int8)
+        dots = np.einsum("ij,j->i", data, q8, dtype=np.int32)
+        return ids, dots.astype(np.float32) * scale * q_scale
+
+    def memory_bytes(self) -> int:
+        return int(self._data.nbytes + (self._scale.nbytes if self.dtype == "int8" else 0))
+
+
+class CompactIndex:
+    """Exact in-memory search over shortened vectors, for candidate generation.
+
+    Holds one `dims`-wide VectorStore row per id plus the metadata used for
+    filtering; full-size vectors stay in the vector store and are only
+    fetched for the candidates being re-ranked.
+    """
+
+    def __init__(self, dims: int, dtype: str = "float32") -> None:
+        self.dims = dims
+        self.store = VectorStore(dims, dtype)
+        self._metadata: Dict[str, Dict[str, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def upsert(self, doc_id: str, vector: Sequence[float],
+               metadata: Optional[Dict[str, Any]] = None) -> None:
+        self._metadata[doc_id] = dict(metadata or {})
+        self.store.upsert(doc_id, shorten(vector, self.dims))
+
+    def replace(self, ids: List[str], matrix: np.ndarray,
+                metadata: List[Dict[str, Any]]) -> None:
+        """Swap in a whole namespace at once (`matrix` rows are full-size vectors)."""
+        self._metadata = {doc_id: dict(m) for doc_id, m in zip(ids, metadata)}
+        self.store.replace(ids, shorten(matrix, self.dims) if len(ids) else matrix)
+
+    def attach(self, store: VectorStore, metadata: Dict[str, Dict[str, Any]]) -> None:
+        """Serve from an existing store, e.g. one opened from a snapshot."""
+        self._metadata, self.store = dict(metadata), store
+
+    def metadata(self) -> Dict[str, Dict[str, Any]]:
+        return dict(self._metadata)
+
+    def update_metadata(self, doc_id: str, metadata: Dict[str, Any]) -> None:
+        if doc_id in self._metadata:
+            self._metadata[doc_id] = {**self._metadata[doc_id], **metadata}
+
+    def delete(self, doc_ids: Sequence[str]) -> int:
+        for doc_id in doc_ids:
+            self._metadata.pop(doc_id, None)
+        return self.store.delete(doc_ids)
+
+    def search(self, vector: Sequence[float], top_k: int,
+               accept: Optional[Callable[[Dict[str, Any]], bool]] = None,
+               exclude: Optional[str] = None,
+               farthest: bool = False) -> List[Tuple[str, float, Dict[str, Any]]]:
+        ids, scores = self.store.scores(shorten(vector, self.dims))
+        if not ids:
+            return []
+        order = np.argsort(scores if farthest else -scores)
+        hits = []
+        for i in order:
+            metadata = self._metadata.get(ids[i], {})
+            if ids[i] == exclude or (accept and not accept(metadata)):
+                continue
+            hits.append((ids[i], float(scores[i]), metadata))
+            if len(hits) >= top_k:
+                break
+        return hits
+
+    def memory_bytes(self) -> int:
+        return self.store.memory_bytes()
+
+
+class VectorSnapshots:
+    """Versioned VectorStore snapshots on disk, opened with mmap.
+
+    Layout: `<root>/<name>/<version>/{vectors.npy, scale.npy, index.json}`
+    plus `<root>/<name>/CURRENT` naming the active version. Publishing
+    writes a new version directory and swaps CURRENT with os.replace under
+    an flock, so concurrent uvicorn workers serialize their writes and
+    readers never see a half-written snapshot. Readers np.load the arrays
+    with mmap_mode="r", so every worker maps the same page-cache pages
+    instead of holding its own copy.
+    """
+
+    KEEP = 3
+
+    def __init__(self, root: Path, name: str) -> None:
+        self.dir = root / name
+        self.name = name
+
+    def current(self) -> Optional[str]:
+        try:
+            return (self.dir / "CURRENT").read_text().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def open(self, version: Optional[str] = None
+             ) -> Optional[Tuple[str, VectorStore, Dict[str, Dict[str, Any]]]]:
+        """(version, store, metadata by id) of `version` or the active snapshot."""
+        version = version or self.current()
+        if not version:
+            return None
+        path = self.dir / version
+        with open(path / "index.json", encoding="utf-8") as f:
+            index = json.load(f)
+        data = np.load(path / "vectors.npy", mmap_mode="r")
+        scale = np.load(path / "scale.npy", mmap_mode="r")
+        store = VectorStore.from_arrays(index["ids"], data, scale)
+        return version, store, dict(zip(index["ids"], index["metadata"]))
+
+    def publish(self, store: VectorStore,
+                metadata: Optional[Dict[str, Dict[str, Any]]] = None) -> str:
+        with self._locked():
+            return self._publish_locked(store, metadata or {})
+
+    def update(self, dims: int, dtype: str,
+               changes: Dict[str, Optional[Tuple[Optional[Sequence[float]],
+                                                 Dict[str, Any]]]]) -> str:
+        """Apply changes on top of the active snapshot and publish.
+
+        A change is (vector, metadata) to upsert, (None, metadata) to patch
+        the metadata of an existing row, or None to delete the row.
+        Re-reading the active snapshot under the lock means one worker's
+        publish never drops rows another worker published in between.
+        """
+        with self._locked():
+            opened = self.open()
+            if opened:
+                _, store, metadata = opened
+            else:
+                store, metadata = VectorStore(dims, dtype), {}
+            deleted = [doc_id for doc_id, change in changes.items() if change is None]
+            store.delete(deleted)
+            for doc_id in deleted:
+                metadata.pop(doc_id, None)
+            for doc_id, change in changes.items():
+                if change is None:
+                    continue
+                vector, doc_metadata = change
+                if vector is not None:
+                    store.upsert(doc_id, vector)
+                    metadata[doc_id] = doc_metadata
+                elif doc_id in metadata:
+                    metadata[doc_id] = {**metadata[doc_id], **doc_metadata}
+            return self._publish_locked(store, metadata)
+
+    def _locked(self) -> Any:
+        self.dir.mkdir(parents=True, exist_ok=True)
+        return _FileLock(self.dir / ".lock")
+
+    def _publish_locked(self, store: VectorStore,
+                        metadata: Dict[str, Dict[str, Any]]) -> str:
+        ids, data, scale = store.arrays()
+        version = f"v{time.time_ns()}"
+        tmp_dir = self.dir / f".{version}.tmp"
+        tmp_dir.mkdir(parents=True)
+        np.save(tmp_dir / "vectors.npy", np.ascontiguousarray(data))
+        np.save(tmp_dir / "scale.npy", np.ascontiguousarray(scale))
+        with open(tmp_dir / "index.json", "w", encoding="utf-8") as f:
+            json.dump({"ids": ids, "metadata": [metadata.get(i, {}) for i in ids],
+                       "dims": store.dims, "dtype": store.dtype}, f,
+                      ensure_ascii=False)
+        os.replace(tmp_dir, self.dir / version)
+        current_tmp = self.dir / "CURRENT.tmp"
+        current_tmp.write_text(version)
+        os.replace(current_tmp, self.dir / "CURRENT")
+        self._prune(version)
+        return version
+
+    def _prune(self, active: str) -> None:
+        # Old versions may still be mapped by other workers; on POSIX the
+        # pages stay valid after unlink, so keeping a few is only a courtesy.
+        versions = sorted(p.name for p in self.dir.iterdir()
+                          if p.is_dir() and p.name.startswith("v"))
+        for version in versions[:-self.KEEP]:
+            if version != active:
+                shutil.rmtree(self.dir / version, ignore_errors=True)
+
+    def stats(self) -> Dict[str, Any]:
+        version = self.current()
+        size = 0
+        if version:
+            size = sum(f.stat().st_size for f in (self.dir / version).iterdir())
+        return {"name": self.name, "version": version, "bytes": size}
+
+
+class _FileLock:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    def __enter__(self) -> "_FileLock":
+        self._file = open(self.path, "a")
+        fcntl.flock(self._file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._file.close()
+
+
+def recall_benchmark(matrix: np.ndarray, dims_options: Sequence[int], k: int,
+                     candidates: int, max_queries: int = 200) -> Dict[str, Any]:
+    """recall@k of shortened search with and without full-size re-ranking.
+
+    Every stored vector (up to `max_queries`) is used as a query against the
+    others; exact full-size cosine top-k is the ground truth.
+    """
+    full = unit_rows(np.asarray(matrix, dtype=np.float32))
+    n = len(full)
+    if n <= k:
+        return {"vectors": n, "error": "not_enough_vectors"}
+    queries = np.arange(min(n, max_queries))
+
+    def top(scores: np.ndarray, q: int, count: int) -> np.ndarray:
+        scores = scores.copy()
+        scores[q] = -np.inf
+        return np.argsort(-scores)[:count]
+
+    started = time.perf_counter()
+    truth = [set(top(full @ full[q], q, k)) for q in queries]
+    full_us = (time.perf_counter() - started) / len(queries) * 1e6
+    report: Dict[str, Any] = {
+        "vectors": n,
+        "queries": len(queries),
+        "k": k,
+        "candidates": candidates,
+        "full": {"dims": full.shape[1], "recall": 1.0,
+                 "memory_bytes": int(full.nbytes),
+                 "mean_query_us": round(full_us, 2)},
+        "modes": [],
+    }
+    for dims in dims_options:
+        compact = shorten(full, dims)
+        hits_compact = hits_reranked = 0
+        elapsed = 0.0
+        for q, expected in zip(queries, truth):
+            started = time.perf_counter()
+            shortlist = top(compact @ compact[q], q, max(candidates, k))
+            reranked = shortlist[np.argsort(-(full[shortlist] @ full[q]))[:k]]
+            elapsed += time.perf_counter() - started
+            hits_compact += len(expected & set(shortlist[:k]))
+            hits_reranked += len(expected & set(reranked))
+        total = len(queries) * k
+        report["modes"].append({
+            "dims": dims,
+            "memory_bytes": int(compact.nbytes),
+            "recall_compact": round(hits_compact / total, 4),
+            "recall_reranked": round(hits_reranked / total, 4),
+            "mean_query_us": round(elapsed / len(queries) * 1e6, 2),
+        })
+    return report
+
+
+def quantization_report(matrix: np.ndarray, k: int,
+                        max_queries: int = 200) -> Dict[str, Any]:
+    """Memory per vector and top-k agreement with float32 for each VectorStore dtype."""
+    full = unit_rows(np.asarray(matrix, dtype=np.float32))
+    n, dims = full.shape
+    ids = [str(i) for i in range(n)]
+    queries = range(min(n, max_queries))
+    k = min(k, n - 1)
+    sample = [float(x) for x in full[0]]
+    report: Dict[str, Any] = {
+        "vectors": n,
+        "k": k,
+        "python_list_bytes_per_vector": sys.getsizeof(sample)
+        + sum(sys.getsizeof(x) for x in sample),
+        "dtypes": [],
+    }
+    if k < 1:
+        return report
+    truth = []
+    for q in queries:
+        scores = full @ full[q]
+        scores[q] = -np.inf
+        truth.append((set(np.argsort(-scores)[:k]), full @ full[q]))
+    for dtype in VectorStore.DTYPES:
+        store = VectorStore(dims, dtype)
+        store.replace(ids, full)
+        hits = 0
+        max_error = 0.0
+        elapsed = 0.0
+        for q, (expected, exact) in zip(queries, truth):
+            started = time.perf_counter()
+            _, scores = store.scores(full[q])
+            elapsed += time.perf_counter() - started
+            max_error = max(max_error, float(np.abs(scores - exact).max()))
+            scores[q] = -np.inf
+            hits += len(expected & set(np.argsort(-scores)[:k]))
+        report["dtypes"].append({
+            "dtype": dtype,
+            "bytes_per_vector": store.memory_bytes() // n,
+            "memory_bytes": store.memory_bytes(),
+            "recall": round(hits / (len(truth) * k), 4),
+            "max_score_error": round(max_error, 6),
+            "mean_query_us": round(elapsed / len(truth) * 1e6, 2),
+        })
+    return report
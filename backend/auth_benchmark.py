@@ -0,0 +1,42 @@
+"""Per-request auth overhead: full session verification vs a session cache hit.
+
+Run from backend/:  python auth_benchmark.py [--iterations 20000]
+
+Times what get_current_user/optional_user do per request, both without
+the session cache (itsdangerous HMAC, base64 and JSON decode, timestamp
+and revocation check, SessionUser build) and through it.
+"""
+import argparse
+import json
+import time
+from typing import Any, Dict
+
+from app.main import SessionUser, _load_session_user, session_signer
+
+
+def run(iterations: int) -> Dict[str, Any]:
+    token = session_signer.sign({"kakao_id": "benchmark", "nickname": "benchmark"})
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        SessionUser(**session_signer.verify(token))
+    uncached_us = (time.perf_counter() - started) / iterations * 1e6
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        _load_session_user(token)
+    cached_us = (time.perf_counter() - started) / iterations * 1e6
+
+    return {
+        "iterations": iterations,
+        "verify_us": round(uncached_us, 2),
+        "cached_us": round(cached_us, 2),
+        "cache": session_signer.cache.stats(),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+    print(json.dumps(run(max(1, args.iterations)), indent=2))
@@ -0,0 +1,14 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# app.config reads the environment at import time: point every data file at
+# a scratch directory and keep the suite away from real services.
+os.environ["DATA_DIR"] = tempfile.mkdtemp(prefix="farewell-tests-")
+for key in ("SUPABASE_URL", "SUPABASE_KEY", "OPENAI_API_KEY", "PINECONE_API_KEY",
+            "DATABASE_URL"):
+    os.environ[key] = ""
+os.environ.setdefault("INVALIDATION_BUS", "local")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
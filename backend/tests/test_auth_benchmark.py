@@ -0,0 +1,8 @@
+import auth_benchmark
+
+
+def test_benchmark_times_both_paths():
+    result = auth_benchmark.run(5)
+    assert result["iterations"] == 5
+    assert result["verify_us"] > 0 and result["cached_us"] > 0
+    assert result["cache"]["size"] >= 1
@@ -0,0 +1,140 @@
+import pytest
+
+from app.services import DriftReconciler, member_content_hashes
+
+
+def profile(kakao_id, **fields):
+    return {"kakao_id": kakao_id, "name": f"n{kakao_id}", "intro": f"intro {kakao_id}",
+            "interests": ["독서"], "strengths": [], "visibility": "public", **fields}
+
+
+def entry(p, namespace="intro", **fields):
+    return {"visibility": p["visibility"], "name": p["name"],
+            "content_hash": member_content_hashes(p)[namespace], **fields}
+
+
+class FakeSupabase:
+    client = True
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def fetch_every_profile(self):
+        return self.rows
+
+
+class FakeVectors:
+    index = True
+
+    def __init__(self, entries):
+        self.entries = entries
+        self.deleted = []
+
+    def list_entries(self, namespace):
+        return dict(self.entries) if namespace == "intro" else {}
+
+    def delete_many(self, ids, namespace=""):
+        self.deleted.extend(ids)
+        return {"deleted": len(ids)}
+
+    def update_metadata(self, kakao_id, metadata, namespace=""):
+        return {"updated": True}
+
+
+class FakeWriter:
+    def __init__(self):
+        self.flushed = []
+
+    def open_batch(self):
+        return "token"
+
+    def enqueue(self, *args, **kwargs):
+        return {"queued": True}
+
+    def flush(self, *args, batch=None, **kwargs):
+        self.flushed.append(batch)
+        return {"failed": []}
+
+
+class FakeEmbedder:
+    def embed_many(self, texts):
+        return [[1.0, 0.0] for _ in texts]
+
+
+class FailingEmbedder:
+    def embed_many(self, texts):
+        raise RuntimeError("embedding service down")
+
+
+class FakeVocabulary:
+    def __init__(self):
+        self.warmed = []
+        self.composed = 0
+
+    def vectors_for(self, terms):
+        self.warmed.append(list(terms))
+        return {}
+
+    def compose(self, interests, strengths):
+        self.composed += 1
+        return [0.0, 1.0]
+
+
+def make_reconciler(tmp_path, rows, entries, fraction=0.05, embedder=None, vocabulary=None):
+    return DriftReconciler(FakeSupabase(rows), FakeVectors(entries), FakeWriter(),
+                           embedder or FakeEmbedder(), vocabulary, tmp_path / "drift.lock",
+                           max_delete_fraction=fraction)
+
+
+def test_diff_sorts_every_kind_of_drift():
+    same, stale, unhashed, renamed = profile("1"), profile("2"), profile("3"), profile("4")
+    missing, cleared = profile("5"), profile("6", intro="", name="", tagline="")
+    profiles = {p["kakao_id"]: p for p in (same, stale, unhashed, renamed, missing, cleared)}
+    hashes = {k: member_content_hashes(p) for k, p in profiles.items()}
+    entries = {"1": entry(same), "2": entry(stale, content_hash="old"),
+               "3": entry(unhashed, content_hash=None), "4": entry(renamed, name="old"),
+               "6": {"visibility": "public", "name": ""}, "gone": {"content_hash": "x"}}
+    diff = DriftReconciler._diff("intro", profiles, hashes, entries)
+    assert diff == {"missing": ["5"], "stale": ["2"], "unhashed": ["3"],
+                    "orphaned": ["6", "gone"], "metadata": ["4"]}
+
+
+def test_run_aborts_when_the_profile_read_fails_or_is_empty(tmp_path):
+    for rows, error in ((None, "profile_read_failed"), ([], "no_profiles")):
+        reconciler = make_reconciler(tmp_path, rows, {"1": {"content_hash": "x"}})
+        report = reconciler.run()
+        assert report["error"] == error
+        assert reconciler.vectors.deleted == []
+
+
+def test_mass_orphan_deletes_need_confirmation(tmp_path):
+    kept = profile("1")
+    entries = {"1": entry(kept), **{f"o{i}": {"content_hash": "x"} for i in range(3)}}
+    reconciler = make_reconciler(tmp_path, [kept], entries)
+    summary = reconciler.run()["namespaces"]["intro"]
+    assert summary["deletes_held"] and summary["orphaned"]["count"] == 3
+    assert reconciler.vectors.deleted == []
+
+    summary = reconciler.run(confirm_deletes=True)["namespaces"]["intro"]
+    assert "deletes_held" not in summary
+    assert sorted(reconciler.vectors.deleted) == ["o0", "o1", "o2"]
+
+
+def test_interest_repair_warms_the_vocabulary_once_per_batch(tmp_path):
+    rows = [profile(str(i), interests=[f"관심{i}"], strengths=["요리"]) for i in range(3)]
+    vocabulary = FakeVocabulary()
+    reconciler = make_reconciler(tmp_path, rows, {}, vocabulary=vocabulary)
+    diff = {"missing": ["0", "1", "2"], "stale": [], "unhashed": [],
+            "orphaned": [], "metadata": []}
+    report = reconciler._repair("interests", diff, {p["kakao_id"]: p for p in rows})
+    assert vocabulary.warmed == [["관심0", "요리", "관심1", "요리", "관심2", "요리"]]
+    assert vocabulary.composed == 3 and report["upserted"] == 3
+
+
+def test_repair_closes_the_write_token_when_embedding_fails(tmp_path):
+    rows = [profile("1")]
+    reconciler = make_reconciler(tmp_path, rows, {}, embedder=FailingEmbedder())
+    diff = {"missing": ["1"], "stale": [], "unhashed": [], "orphaned": [], "metadata": []}
+    with pytest.raises(RuntimeError):
+        reconciler._repair("intro", diff, {"1": rows[0]})
+    assert reconciler.writer.flushed == ["token"]
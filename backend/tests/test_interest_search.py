@@ -0,0 +1,51 @@
+import asyncio
+
+from app import main
+from app.main import SessionUser
+
+
+class FakeIndex:
+    built = True
+
+    def __init__(self):
+        self.visibility = None
+
+    def holders(self, term, visibility):
+        self.visibility = visibility
+        return [{"kakao_id": "1", "visibility": "public"}]
+
+
+class FailingVocabulary:
+    def __init__(self):
+        self.calls = []
+
+    def known_vector(self, term):
+        self.calls.append(("known", term))
+        return None
+
+    def query_vector(self, term):
+        self.calls.append(("query", term))
+        raise RuntimeError("openai down")
+
+
+def search(monkeypatch, user, limit=20):
+    index, vocabulary = FakeIndex(), FailingVocabulary()
+    monkeypatch.setattr(main, "profile_search_index", index)
+    monkeypatch.setattr(main, "interest_vocabulary", vocabulary)
+    result = asyncio.run(main.search_interest("새 취미", limit, user))
+    return result, index, vocabulary
+
+
+def test_anonymous_search_sees_public_profiles_and_never_embeds(monkeypatch):
+    result, index, vocabulary = search(monkeypatch, None)
+    assert index.visibility == ["public"]
+    assert vocabulary.calls == [("known", "새 취미")]
+    assert [p["kakao_id"] for p in result["profiles"]] == ["1"]
+
+
+def test_embedding_errors_fall_back_to_exact_holders(monkeypatch):
+    user = SessionUser(kakao_id="2", nickname="n")
+    result, index, vocabulary = search(monkeypatch, user, limit=10_000)
+    assert index.visibility == main.SEARCH_VISIBILITY
+    assert vocabulary.calls == [("query", "새 취미")]
+    assert result["exact_count"] == 1 and len(result["profiles"]) == 1
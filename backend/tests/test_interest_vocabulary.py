@@ -0,0 +1,44 @@
+import numpy as np
+
+from app.services import InterestVocabulary
+
+BASIS = {"등산": [1.0, 0.0, 0.0], "독서": [0.0, 1.0, 0.0], "요리": [0.0, 0.0, 1.0]}
+
+
+class FakeEmbedder:
+    def __init__(self):
+        self.requests = []
+
+    def embed_many(self, texts):
+        self.requests.append(list(texts))
+        return [BASIS.get(t, [1.0, 1.0, 1.0]) for t in texts]
+
+
+def test_compose_is_the_weighted_mean_of_term_vectors(tmp_path):
+    vocabulary = InterestVocabulary(FakeEmbedder(), tmp_path / "vocab.npz")
+    vector = np.asarray(vocabulary.compose(["등산"], ["독서"]))
+    expected = np.asarray([1.0, InterestVocabulary.STRENGTH_WEIGHT, 0.0])
+    assert np.allclose(vector, expected / np.linalg.norm(expected))
+
+
+def test_query_vector_matches_composed_space_without_growing_the_vocabulary(tmp_path):
+    embedder = FakeEmbedder()
+    vocabulary = InterestVocabulary(embedder, tmp_path / "vocab.npz")
+    vocabulary.compose(["등산"], [])
+    embedder.requests.clear()
+
+    vector = vocabulary.query_vector("등산, 요리")
+    assert embedder.requests == [["요리"]]
+    assert np.allclose(vector, np.asarray([1.0, 0.0, 1.0]) / np.sqrt(2))
+    assert vocabulary.stats()["terms"] == 1
+    assert np.allclose(vocabulary.query_vector("등산"), vocabulary.compose(["등산"], []))
+
+
+def test_known_vector_never_embeds(tmp_path):
+    embedder = FakeEmbedder()
+    vocabulary = InterestVocabulary(embedder, tmp_path / "vocab.npz")
+    vocabulary.compose(["등산"], [])
+    embedder.requests.clear()
+    assert np.allclose(vocabulary.known_vector(" 등산 "), [1.0, 0.0, 0.0])
+    assert vocabulary.known_vector("요리") is None
+    assert embedder.requests == [] and vocabulary.stats()["terms"] == 1
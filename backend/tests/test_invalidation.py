@@ -0,0 +1,103 @@
+import json
+import threading
+import time
+
+from app.invalidation import InvalidationBus
+
+
+def make_local_bus():
+    bus = InvalidationBus("local", None, None, 0.1)
+    bus.start()
+    return bus
+
+
+def drain(bus):
+    bus._executor.submit(lambda: None).result(5)
+
+
+def test_local_ping_round_trips():
+    bus = make_local_bus()
+    assert bus.ping(5) is not None
+    stats = bus.stats()
+    assert stats["mode"] == "local" and stats["lag_ms"]["samples"] == 1
+
+
+def test_handlers_run_for_other_workers_events_only():
+    bus = make_local_bus()
+    seen = []
+    bus.on("profile", lambda kakao_id, version: seen.append((kakao_id, version)))
+    bus.on("session", lambda kakao_id, version: 1 / 0)
+    bus._receive(json.dumps({"entity": "profile", "id": "1", "version": "v1",
+                             "origin": "elsewhere"}))
+    bus._receive(json.dumps({"entity": "profile", "id": "2", "origin": bus.origin}))
+    bus._receive(json.dumps({"entity": "session", "id": "3", "origin": "elsewhere"}))
+    bus._receive("not json")
+    drain(bus)
+    assert seen == [("1", "v1")]
+    stats = bus.stats()
+    assert stats["applied"] == 1 and stats["own_skipped"] == 1
+    assert stats["errors"] == 2
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+
+    def is_closed(self):
+        return self.closed
+
+
+class FakePool:
+    def __init__(self):
+        self.sent = []
+        self.listens = 0
+        self.connection = None
+        self.release = threading.Event()
+
+    def listen(self, channel, callback):
+        self.listens += 1
+        self.connection = FakeConnection()
+        return self.connection
+
+    def execute(self, query, *args):
+        self.release.wait(5)
+        self.sent.append(args)
+
+
+def make_bus(pool):
+    bus = InvalidationBus("notify", pool, None, 0.1)
+    bus.start()
+    assert bus.mode == "notify"
+    return bus
+
+
+def test_publish_does_not_wait_for_the_transport():
+    pool = FakePool()
+    bus = make_bus(pool)
+    try:
+        started = time.perf_counter()
+        bus.publish("profile", "1")
+        bus.publish("profile", "2")
+        assert time.perf_counter() - started < 1
+        assert pool.sent == []
+        pool.release.set()
+    finally:
+        bus.stop()
+    assert len(pool.sent) == 2
+    assert '"id": "1"' in pool.sent[0][1] and '"id": "2"' in pool.sent[1][1]
+    assert bus.stats()["published"] == 2
+
+
+def test_listen_reconnect_runs_resync_handlers():
+    pool = FakePool()
+    pool.release.set()
+    bus = make_bus(pool)
+    resynced = threading.Event()
+    bus.on_resync(resynced.set)
+    try:
+        pool.connection.closed = True
+        assert resynced.wait(5)
+    finally:
+        bus.stop()
+    assert pool.listens == 2
+    assert bus.stats()["resyncs"] == 1
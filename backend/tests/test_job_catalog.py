@@ -0,0 +1,30 @@
+from app.services import JobCatalog, job_catalog_version
+
+JOBS = [
+    {"code": "1", "name": "경찰", "team": "citizen", "story": "조사"},
+    {"code": "2", "name": "마피아", "team": "mafia", "story": "처치"},
+]
+
+
+def test_version_ignores_row_order_and_tracks_edits():
+    assert job_catalog_version(JOBS) == job_catalog_version(list(reversed(JOBS)))
+    edited = [JOBS[0], {**JOBS[1], "story": "밤에 처치"}]
+    assert job_catalog_version(edited) != job_catalog_version(JOBS)
+
+
+def test_lookups_and_team_names():
+    catalog = JobCatalog(JOBS)
+    assert len(catalog) == 2
+    assert catalog.get(1)["name"] == "경찰"
+    assert catalog.named("마피아")["code"] == "2"
+    assert catalog.team_name(catalog.get("2")) == "마피아팀"
+    assert catalog.team_name({"code": "9", "team": "cult"}) == "교주팀"
+    assert not JobCatalog([])
+
+
+def test_changed_since_lists_added_removed_and_edited_codes():
+    before = JobCatalog(JOBS)
+    after = JobCatalog([{**JOBS[0], "story": "새 스토리"},
+                        {"code": "3", "name": "의사", "team": "citizen", "story": "치료"}])
+    assert sorted(after.changed_since(before)) == ["1", "2", "3"]
+    assert JobCatalog(JOBS).changed_since(before) == []
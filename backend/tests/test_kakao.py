@@ -0,0 +1,120 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.services import KakaoClient, KakaoFanoutSender
+
+
+class MockKakao:
+    """Stands in for kapi.kakao.com: rate-limits the first call, fails some uuids."""
+
+    def __init__(self, rejected=(), throttle_first=False):
+        self.rejected = set(rejected)
+        self.throttle_first = throttle_first
+        self.delivered = []
+        self.calls = 0
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        if self.throttle_first and self.calls == 1:
+            return httpx.Response(429, headers={"Retry-After": "0"})
+        uuids = json.loads(request.content)["receiver_uuids"]
+        ok = [u for u in uuids if u not in self.rejected]
+        self.delivered.extend(ok)
+        failed = [u for u in uuids if u in self.rejected]
+        body = {"successful_receiver_uuids": ok}
+        if failed:
+            body["failure_info"] = [{"code": -532, "msg": "daily limit", "receiver_uuids": failed}]
+        return httpx.Response(200, json=body)
+
+
+def make_client(kakao: MockKakao) -> KakaoClient:
+    client = KakaoClient()
+    client.client = httpx.AsyncClient(transport=httpx.MockTransport(kakao))
+    return client
+
+
+def sender_for(client: KakaoClient):
+    return lambda chunk: client.send_friend_message("token", chunk, "hi", "http://x")
+
+
+def test_rate_limited_send_is_retried():
+    kakao = MockKakao(throttle_first=True)
+    result = asyncio.run(make_client(kakao).send_friend_message("token", ["a"], "hi", "http://x"))
+    assert result["successful_receiver_uuids"] == ["a"]
+    assert kakao.calls == 2
+
+
+def test_server_errors_are_retried_only_for_idempotent_calls():
+    statuses = []
+
+    def flaky(request):
+        statuses.append(request.method)
+        if len(statuses) == 1:
+            return httpx.Response(503)
+        return httpx.Response(200, json={"id": 1, "successful_receiver_uuids": []})
+
+    client = KakaoClient()
+    client.client = httpx.AsyncClient(transport=httpx.MockTransport(flaky))
+    assert asyncio.run(client.fetch_user("token"))["id"] == 1
+    assert statuses == ["GET", "GET"]
+
+    statuses.clear()
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(client.send_friend_message("token", ["a"], "hi", "http://x"))
+    assert statuses == ["POST"]
+
+
+def test_exhausted_rate_limit_window_pauses_the_limiter():
+    client = KakaoClient()
+    wait = client.limiter.observe(httpx.Headers({"X-RateLimit-Remaining": "0",
+                                                 "X-RateLimit-Reset": "2"}))
+    assert wait == 2.0
+    assert client.limiter.paused_until > 0
+
+
+def test_blast_resumes_on_another_worker(tmp_path):
+    uuids = [f"u{i}" for i in range(12)]
+    kakao = MockKakao(rejected={"u3", "u7"})
+    client = make_client(kakao)
+    first = asyncio.run(KakaoFanoutSender(tmp_path).send("owner", uuids, sender_for(client)))
+    assert first["sent_count"] == 10
+    assert {f["uuid"] for f in first["failed"]} == {"u3", "u7"}
+
+    kakao.rejected.clear()
+    resumed = asyncio.run(KakaoFanoutSender(tmp_path).send(
+        "owner", [], sender_for(client), blast_id=first["blast_id"]))
+    assert resumed["sent_count"] == 12 and resumed["failed_count"] == 0
+    assert sorted(kakao.delivered) == sorted(uuids)
+
+
+def test_blast_belongs_to_its_owner(tmp_path):
+    client = make_client(MockKakao(rejected={"a"}))
+    sender = KakaoFanoutSender(tmp_path)
+    first = asyncio.run(sender.send("owner", ["a"], sender_for(client)))
+    with pytest.raises(ValueError, match="blast_not_found"):
+        asyncio.run(sender.send("someone", [], sender_for(client), blast_id=first["blast_id"]))
+
+
+def test_concurrent_resumes_do_not_double_send(tmp_path):
+    kakao = MockKakao(rejected={"a", "b"})
+    client = make_client(kakao)
+    sender = KakaoFanoutSender(tmp_path)
+    blast_id = asyncio.run(sender.send("owner", ["a", "b"], sender_for(client)))["blast_id"]
+    kakao.rejected.clear()
+
+    async def slow_chunk(chunk):
+        await asyncio.sleep(0.05)
+        return await sender_for(client)(chunk)
+
+    async def scenario():
+        return await asyncio.gather(
+            sender.send("owner", [], slow_chunk, blast_id=blast_id),
+            KakaoFanoutSender(tmp_path).send("owner", [], slow_chunk, blast_id=blast_id),
+            return_exceptions=True)
+
+    outcomes = asyncio.run(scenario())
+    assert sum(isinstance(o, ValueError) and str(o) == "blast_in_progress" for o in outcomes) == 1
+    assert sorted(kakao.delivered) == ["a", "b"]
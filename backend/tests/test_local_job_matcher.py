@@ -0,0 +1,165 @@
+import json
+import threading
+
+import numpy as np
+
+from app.config import settings
+from app.services import JobStoryEmbedder, LocalJobMatcher, JobCatalog
+from app.vectors import VectorSnapshots, VectorStore
+
+
+class NoSupabase:
+    def fetch_mafia42_jobs(self):
+        return []
+
+
+def make_matcher(path, max_distilled=4):
+    matcher = LocalJobMatcher(NoSupabase(), None, path, max_distilled)
+    matcher.catalog = JobCatalog([
+        {"code": "1", "name": "경찰", "team": "citizen", "story": "밤마다 한 명을 조사합니다"},
+        {"code": "2", "name": "마피아", "team": "mafia", "story": "밤에 한 명을 처치합니다"},
+    ])
+    return matcher
+
+
+def test_assignments_are_capped_deduped_and_compacted(tmp_path):
+    path = tmp_path / "role_assignments.jsonl"
+    matcher = make_matcher(path)
+    for i in range(20):
+        matcher.record_assignment(f"자기소개 {i}", "1")
+    matcher.record_assignment("자기소개 19", "1")
+    assert len(matcher.distilled) == 4
+    assert [text for text, _ in matcher.distilled.values()][-1] == "자기소개 19"
+    rows = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert len(rows) <= 2 * 4
+
+    reloaded = make_matcher(path)
+    reloaded._read_distilled()
+    assert list(reloaded.distilled) == list(matcher.distilled)
+
+
+def test_long_texts_are_truncated(tmp_path):
+    matcher = make_matcher(tmp_path / "role_assignments.jsonl")
+    matcher.record_assignment("가" * 5000, "2")
+    (text, code), = matcher.distilled.values()
+    assert len(text) == LocalJobMatcher.MAX_TEXT_CHARS and code == "2"
+
+
+def test_concurrent_recording_and_refits(tmp_path):
+    matcher = make_matcher(tmp_path / "role_assignments.jsonl", max_distilled=50)
+    matcher.REFIT_EVERY = 3
+
+    def record(worker):
+        for i in range(100):
+            matcher.record_assignment(f"worker {worker} text {i}", str(1 + i % 2))
+
+    threads = [threading.Thread(target=record, args=(w, )) for w in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(matcher.distilled) == 50
+    assert matcher.match_text("밤마다 조사") is not None
+
+
+JOBS = [{"code": "1", "name": "경찰", "team": "citizen", "story": "조사"}]
+
+
+class JobsSupabase:
+    def fetch_mafia42_jobs(self):
+        return JOBS
+
+
+class FakeVectors:
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    def fetch_vectors(self, ids, namespace=""):
+        return {i: self.vectors[i] for i in ids if i in self.vectors}
+
+
+def snapshot_matcher(tmp_path, vectors):
+    matcher = LocalJobMatcher(JobsSupabase(), FakeVectors(vectors),
+                              tmp_path / "role_assignments.jsonl")
+    matcher.snapshots = VectorSnapshots(tmp_path, "jobs")
+    return matcher
+
+
+def test_empty_job_vectors_are_not_published(tmp_path):
+    matcher = snapshot_matcher(tmp_path, {})
+    assert matcher.load()["vectors"] == 0
+    assert matcher.snapshots.current() is None
+
+    vector = np.eye(settings.embedding_dimension, dtype=np.float32)[0]
+    matcher.vectors.vectors = {"1": vector}
+    assert matcher.load()["vectors"] == 1
+    assert matcher.snapshots.current() is not None
+
+
+def test_an_empty_snapshot_counts_as_missing(tmp_path):
+    vector = np.eye(settings.embedding_dimension, dtype=np.float32)[0]
+    matcher = snapshot_matcher(tmp_path, {"1": vector})
+    empty = matcher.snapshots.publish(VectorStore(settings.embedding_dimension))
+    result = matcher.load()
+    assert result["vectors"] == 1 and result["snapshot"] != empty
+    assert matcher.match_vector(vector.tolist())["job"]["code"] == "1"
+
+
+class FakeBus:
+    def __init__(self):
+        self.events = []
+
+    def publish(self, entity, entity_id, version=None):
+        self.events.append((entity, entity_id))
+
+
+def test_waiting_rebuild_runs_after_a_load_in_progress(tmp_path):
+    vector = np.eye(settings.embedding_dimension, dtype=np.float32)[0]
+    matcher = snapshot_matcher(tmp_path, {"1": vector})
+    matcher.invalidation_bus = FakeBus()
+    results = []
+    matcher._load_lock.acquire()  # a load already running
+    waiter = threading.Thread(target=lambda: results.append(
+        matcher.load(rebuild=True, changed=["1"], wait=True)))
+    waiter.start()
+    assert matcher.load()["reason"] == "already_loading"
+    matcher._load_lock.release()
+    waiter.join(10)
+    assert results[0]["vectors"] == 1
+    assert matcher.invalidation_bus.events == [("jobs", "1")]
+
+
+class StoredJobVectors:
+    def __init__(self, entries):
+        self.entries = entries
+
+    def list_entries(self, namespace):
+        return self.entries
+
+
+class RecordingMatcher:
+    catalog_version = "v"
+
+    def __init__(self, has_vectors):
+        self.has_vectors = has_vectors
+        self.loads = []
+
+    def load(self, **kwargs):
+        self.loads.append(kwargs)
+        return {"vectors": 1}
+
+
+class NoReasoning:
+    def forget_jobs(self, keys):
+        pass
+
+
+def test_unchanged_jobs_still_rebuild_an_empty_matcher():
+    embedder = JobStoryEmbedder(JobsSupabase(), None, None, None, None, NoReasoning())
+    embedder.vectors = StoredJobVectors({"1": embedder.metadata(JOBS[0])})
+    for has_vectors, loads in ((True, 0), (False, 1)):
+        embedder.matcher = RecordingMatcher(has_vectors)
+        report = embedder.run()
+        assert report["unchanged"] == 1 and report["changed_codes"] == []
+        assert len(embedder.matcher.loads) == loads
+    assert embedder.matcher.loads[0]["wait"] is True
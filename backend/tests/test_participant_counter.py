@@ -0,0 +1,45 @@
+import asyncio
+
+from app.services import ParticipantCounter
+
+
+class FakeSupabase:
+    def __init__(self, count):
+        self.count = count
+        self.calls = 0
+
+    def count_profiles(self):
+        self.calls += 1
+        return self.count
+
+
+def test_get_never_reads_supabase_before_seeding():
+    supabase = FakeSupabase(7)
+    counter = ParticipantCounter(supabase)
+    assert counter.get() == 0
+    counter.increment()
+    assert counter.get() == 0
+    assert supabase.calls == 0
+
+
+def test_refresh_seeds_and_notifies_subscribers():
+    async def scenario():
+        counter = ParticipantCounter(FakeSupabase(7))
+        queue = counter.subscribe()
+        await counter.refresh()
+        counter.increment()
+        return counter.get(), queue.get_nowait()
+
+    assert asyncio.run(scenario()) == (8, 8)
+
+
+def test_failed_refresh_keeps_last_count():
+    async def scenario():
+        supabase = FakeSupabase(3)
+        counter = ParticipantCounter(supabase)
+        await counter.refresh()
+        supabase.count = None
+        await counter.refresh()
+        return counter.get()
+
+    assert asyncio.run(scenario()) == 3
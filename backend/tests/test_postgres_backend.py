@@ -0,0 +1,114 @@
+"""PostgresStorageBackend against a real local Postgres.
+
+Set TEST_DATABASE_URL (e.g. postgresql://postgres@localhost/postgres) to run;
+each test works in a throwaway schema that is dropped afterwards.
+"""
+import asyncio
+import os
+import secrets
+import uuid
+
+import pytest
+
+from app.postgres import PostgresPool, PostgresStorageBackend, asyncpg
+
+TEST_DSN = os.getenv("TEST_DATABASE_URL", "")
+
+pytestmark = pytest.mark.skipif(not TEST_DSN or asyncpg is None,
+                                reason="TEST_DATABASE_URL not set")
+
+SCHEMA_SQL = """
+CREATE TABLE member_profiles (
+    kakao_id text PRIMARY KEY, name text, tagline text, intro text,
+    interests text[], strengths text[], contact text, want_to_talk_to text,
+    visibility text, profile_image text, display_order int,
+    updated_at timestamptz DEFAULT now());
+CREATE TABLE conversations (
+    id uuid PRIMARY KEY DEFAULT gen_random_uuid(), creator_id text,
+    speakers jsonb DEFAULT '[]', listeners jsonb DEFAULT '[]',
+    title text, content text, date timestamptz DEFAULT now());
+"""
+
+
+async def _admin(sql):
+    conn = await asyncpg.connect(TEST_DSN)
+    try:
+        await conn.execute(sql)
+    finally:
+        await conn.close()
+
+
+@pytest.fixture
+def backend():
+    schema = f"test_{secrets.token_hex(4)}"
+    asyncio.run(_admin(f"CREATE SCHEMA {schema}; SET search_path TO {schema};"
+                       f"{SCHEMA_SQL.replace('CREATE TABLE ', f'CREATE TABLE {schema}.')}"))
+    separator = "&" if "?" in TEST_DSN else "?"
+    pool = PostgresPool(f"{TEST_DSN}{separator}search_path={schema}",
+                        min_size=1, max_size=2, statement_cache_size=100)
+    try:
+        yield PostgresStorageBackend(pool)
+    finally:
+        pool.close()
+        asyncio.run(_admin(f"DROP SCHEMA {schema} CASCADE"))
+
+
+def test_record_login_inserts_then_only_updates_changed_image(backend):
+    assert backend.record_login("1", "a", "") == {"created": True, "updated": False}
+    assert backend.record_login("1", "a", "") == {"created": False, "updated": False}
+    assert backend.record_login("1", "a", "http://img") == {"created": False, "updated": True}
+    assert backend.record_login("1", "a", "http://img") == {"created": False, "updated": False}
+    profile = backend.fetch_profile("1")
+    assert profile["profile_image"] == "http://img"
+    assert isinstance(profile["updated_at"], str)
+    assert backend.count_profiles() == 1
+
+
+def test_feeds_respect_visibility_and_order(backend):
+    backend.record_login("1", "a", "")
+    backend.record_login("2", "b", "")
+    backend.record_login("3", "c", "")
+    backend.pool.execute("UPDATE member_profiles SET visibility = 'members' WHERE kakao_id = '2'")
+    backend.pool.execute("UPDATE member_profiles SET visibility = 'private' WHERE kakao_id = '3'")
+    backend.pool.execute("UPDATE member_profiles SET display_order = 1 WHERE kakao_id = '2'")
+    assert [p["kakao_id"] for p in backend.fetch_public_profiles(10)] == ["1"]
+    assert [p["kakao_id"] for p in backend.fetch_member_visible_profiles(10)] == ["2", "1"]
+
+
+def test_conversation_lookup_by_text_id(backend):
+    conv_id = backend.pool.fetchval(
+        "INSERT INTO conversations (creator_id, listeners) "
+        "VALUES ('1', '[\"2\"]') RETURNING id::text")
+    assert backend.fetch_conversation(conv_id)["creator_id"] == "1"
+    assert backend.fetch_conversation(str(uuid.uuid4())) is None
+    assert [c["id"] for c in backend.list_conversations("2")] == [conv_id]
+
+    async def explain(pool):
+        async with pool.acquire() as conn:
+            await conn.execute("SET enable_seqscan = off")
+            return await conn.fetch("EXPLAIN " + backend._sql_fetch_conversation,
+                                    conv_id)
+
+    plan = "\n".join(r[0] for r in backend.pool.run(explain))
+    assert "Index" in plan
+
+
+def test_pgvector_namespace_query_is_not_starved_by_other_namespaces(backend):
+    from app.postgres import PgVectorService
+
+    vectors = PgVectorService(backend.pool, dimension=3)
+    try:
+        vectors._ensure_schema()
+    except Exception as e:
+        pytest.skip(f"pgvector unavailable: {e}")
+    # Many member vectors sit right on the query; the jobs are further away.
+    vectors.upsert_many([{"id": str(i), "values": [1.0, 0.0, 0.001 * i]}
+                         for i in range(300)], namespace="intro")
+    vectors.upsert_many([{"id": f"job{i}", "values": [0.0, 1.0, 0.1 * i]}
+                         for i in range(5)], namespace="mafia42_jobs")
+    matches = vectors.query_by_vector([1.0, 0.0, 0.0], top_k=3,
+                                      namespace="mafia42_jobs")
+    assert len(matches) == 3
+    assert all(m["id"].startswith("job") for m in matches)
+    farthest = vectors.query_different("0", top_k=1, namespace="intro")
+    assert farthest[0]["id"] == "299"
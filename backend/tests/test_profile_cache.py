@@ -0,0 +1,36 @@
+from app.services import SupabaseService
+
+
+class FakeBackend:
+    def __init__(self):
+        self.row = {"kakao_id": "1", "visibility": "public", "profile_image": "a.png"}
+        self.logins = 0
+
+    def fetch_profile(self, kakao_id):
+        return dict(self.row)
+
+    def record_login(self, kakao_id, nickname, profile_image_url):
+        self.logins += 1
+        return {"created": False, "updated": False}
+
+
+def make_service():
+    service = SupabaseService()
+    service.backend = FakeBackend()
+    return service
+
+
+def test_repeat_login_with_same_image_skips_the_database():
+    service = make_service()
+    service.record_login("1", "a", "a.png")
+    service.record_login("1", "a", "a.png")
+    assert service.backend.logins == 1
+    service.record_login("1", "a", "b.png")
+    assert service.backend.logins == 2
+
+
+def test_fetch_profile_reads_the_live_row_after_login():
+    service = make_service()
+    service.record_login("1", "a", "a.png")
+    service.backend.row["visibility"] = "private"
+    assert service.fetch_profile("1")["visibility"] == "private"
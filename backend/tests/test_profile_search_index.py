@@ -0,0 +1,30 @@
+from app.services import ProfileSearchIndex
+
+PROFILES = [
+    {"kakao_id": "1", "name": "김등산", "intro": "주말마다 회사 일을 합니다",
+     "interests": ["독서"], "strengths": [], "visibility": "public"},
+    {"kakao_id": "2", "name": "박철수", "intro": "조용히 책을 읽어요",
+     "interests": ["등산"], "strengths": ["요리"], "visibility": "public"},
+]
+
+
+class FakeSupabase:
+    def fetch_profiles_for_search(self):
+        return PROFILES
+
+
+def test_search_type_picks_the_indexed_fields():
+    index = ProfileSearchIndex(FakeSupabase())
+    index.rebuild()
+    intro = [p["kakao_id"] for p in index.search("등산", 5, ["public"], "intro")]
+    interests = [p["kakao_id"] for p in index.search("등산", 5, ["public"], "interests")]
+    assert intro == ["1"]
+    assert interests == ["2"]
+
+
+def test_profile_writes_reach_every_index():
+    index = ProfileSearchIndex(FakeSupabase())
+    index.rebuild()
+    index.index_profile({**PROFILES[0], "interests": ["등산"]})
+    assert {p["kakao_id"] for p in index.search("등산", 5, ["public"], "interests")} == {"1", "2"}
+    assert [p["kakao_id"] for p in index.holders("요리", ["public"])] == ["2"]
@@ -0,0 +1,139 @@
+from app.services import ReembedJobs
+
+
+class FakeSupabase:
+    client = True
+
+    def __init__(self, count):
+        self.rows = {str(i): {"kakao_id": str(i), "name": f"n{i}", "intro": f"intro {i}",
+                              "interests": ["독서"], "strengths": [], "visibility": "public"}
+                     for i in range(count)}
+
+    def fetch_profile_ids(self):
+        return sorted(self.rows)
+
+    def fetch_profiles_for_embedding(self, ids):
+        return [self.rows[i] for i in ids if i in self.rows]
+
+
+class FakeEmbedder:
+    client = True
+
+    def embed_many(self, texts):
+        return [[1.0, 0.0] for _ in texts]
+
+    def cached(self, text):
+        return None
+
+
+class FakeVocabulary:
+    def vectors_for(self, terms):
+        return {}
+
+    def compose(self, interests, strengths):
+        return [0.0, 1.0] if interests else None
+
+    def unseen(self, terms):
+        return sorted(set(terms))
+
+
+class FakeWriter:
+    class vectors:
+        index = True
+
+    def __init__(self):
+        self.enqueued = []
+        self.on_flush = None
+        self.failed = []
+        self.flushed = []
+
+    def open_batch(self):
+        return "token"
+
+    def enqueue(self, kakao_id, vector, metadata, namespace, batch=None):
+        self.enqueued.append((namespace, kakao_id))
+        return {"queued": True}
+
+    def flush(self, *args, batch=None, **kwargs):
+        self.flushed.append(batch)
+        if self.on_flush:
+            self.on_flush()
+        failed, self.failed = self.failed, []
+        return {"failed": failed}
+
+
+def make_jobs(root, writer, supabase):
+    return ReembedJobs(supabase, FakeEmbedder(), FakeVocabulary(), writer, root,
+                       batch_size=3, concurrency=2, price_per_million_tokens=0.13)
+
+
+def wait(jobs):
+    for thread in jobs._threads:
+        thread.join(10)
+
+
+def test_interrupted_job_resumes_from_its_checkpoint(tmp_path):
+    supabase, writer = FakeSupabase(23), FakeWriter()
+    first = make_jobs(tmp_path, writer, supabase)
+    # Simulate a deploy right after the first round is flushed.
+    writer.on_flush = first._shutdown.set
+    job_id = first.start()["id"]
+    wait(first)
+    interrupted = first.get(job_id)
+    assert interrupted["state"] == "interrupted"
+    assert interrupted["cursor"] == 6 and interrupted["runs"] == 1
+
+    writer.on_flush = None
+    second = make_jobs(tmp_path, writer, supabase)
+    assert second.resume_pending() == job_id
+    wait(second)
+    done = second.get(job_id)
+    assert done["state"] == "completed"
+    assert done["cursor"] == done["total"] == 23 and done["runs"] == 2
+    assert done["counts"]["intro"] == 23 and done["counts"]["interests"] == 23
+    # Nothing before the checkpoint was embedded twice.
+    assert len(writer.enqueued) == len(set(writer.enqueued)) == 46
+
+
+def test_only_one_job_runs_at_a_time(tmp_path):
+    supabase, writer = FakeSupabase(10), FakeWriter()
+    jobs = make_jobs(tmp_path, writer, supabase)
+    lock = jobs._try_lock()
+    try:
+        assert jobs.start()["reason"] == "job_running"
+    finally:
+        lock.close()
+
+
+def test_dry_run_estimates_without_writing(tmp_path):
+    supabase, writer = FakeSupabase(5), FakeWriter()
+    jobs = make_jobs(tmp_path, writer, supabase)
+    job_id = jobs.start(dry_run=True)["id"]
+    wait(jobs)
+    job = jobs.get(job_id)
+    assert job["state"] == "completed"
+    assert job["estimate"]["intro_texts"] == 5 and job["estimate"]["new_terms"] == 1
+    assert writer.enqueued == []
+
+
+def test_write_failures_move_counts_to_failed(tmp_path):
+    supabase, writer = FakeSupabase(2), FakeWriter()
+    writer.failed = [{"namespace": "intro", "id": "0", "error": "boom"},
+                     {"namespace": "legacy", "id": "1", "error": "boom"}]
+    jobs = make_jobs(tmp_path, writer, supabase)
+    job_id = jobs.start()["id"]
+    wait(jobs)
+    job = jobs.get(job_id)
+    assert job["state"] == "completed"
+    assert job["counts"]["intro"] == 1 and job["counts"]["failed"] == 2
+    assert "legacy" not in job["counts"]
+
+
+def test_failed_round_still_closes_its_write_token(tmp_path):
+    supabase, writer = FakeSupabase(2), FakeWriter()
+    jobs = make_jobs(tmp_path, writer, supabase)
+    jobs.embedder.embed_many = lambda texts: 1 / 0
+    job_id = jobs.start()["id"]
+    wait(jobs)
+    assert jobs.get(job_id)["state"] == "failed"
+    assert writer.flushed == ["token"]
@@ -0,0 +1,34 @@
+from unittest import mock
+
+import pytest
+
+from app.services import SessionSigner
+
+
+def test_login_in_the_same_second_as_a_revocation_is_accepted(tmp_path):
+    signer = SessionSigner(tmp_path / "revocations.json")
+    with mock.patch("app.services.time.time", return_value=1_000.100):
+        old = signer.sign({"kakao_id": "1"})
+    with mock.patch("app.services.time.time", return_value=1_000.200):
+        signer.revoke("1")
+    with mock.patch("app.services.time.time", return_value=1_000.300):
+        fresh = signer.sign({"kakao_id": "1"})
+        with pytest.raises(ValueError, match="session_revoked"):
+            signer.verify(old)
+        assert signer.verify(fresh)["kakao_id"] == "1"
+
+
+def test_revocations_survive_a_restart(tmp_path):
+    path = tmp_path / "revocations.json"
+    token = SessionSigner(path).sign({"kakao_id": "1"})
+    SessionSigner(path).revoke("1")
+    with pytest.raises(ValueError, match="session_revoked"):
+        SessionSigner(path).verify(token)
+
+
+def test_cached_sessions_are_returned_as_copies(tmp_path):
+    signer = SessionSigner(tmp_path / "revocations.json")
+    token = signer.sign({"kakao_id": "1"})
+    first = signer.load_session(token, dict)
+    first["kakao_id"] = "2"
+    assert signer.load_session(token, dict)["kakao_id"] == "1"
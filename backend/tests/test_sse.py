@@ -0,0 +1,19 @@
+import asyncio
+
+from app.main import _guard_sse, _sse_event
+
+
+def collect(events):
+    async def run():
+        return [frame async for frame in events]
+    return asyncio.run(run())
+
+
+def test_failing_stream_ends_with_an_error_event():
+    async def stream():
+        yield _sse_event({"text": "a"}, "token")
+        raise RuntimeError("boom")
+
+    frames = collect(_guard_sse(stream(), "role_assignment_failed"))
+    assert frames[0].startswith("event: token")
+    assert frames[-1] == 'event: error\ndata: {"detail": "role_assignment_failed"}\n\n'
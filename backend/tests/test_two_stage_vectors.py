@@ -0,0 +1,39 @@
+from app.config import settings
+from app.services import TwoStageVectorService
+
+
+class FakeBase:
+    def upsert_many(self, items, namespace=""):
+        return {"upserted": len(items)}
+
+    def update_metadata(self, member_id, metadata, namespace=""):
+        return {"updated": True}
+
+    def delete_many(self, member_ids, namespace=""):
+        return {"deleted": len(member_ids)}
+
+
+def make_service(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "vector_snapshot_dir", tmp_path)
+    return TwoStageVectorService(FakeBase(), None, dims=4, candidates=10)
+
+
+def test_deletes_and_metadata_patches_reach_the_snapshot(monkeypatch, tmp_path):
+    service = make_service(monkeypatch, tmp_path)
+    service.upsert_many([{"id": "a", "values": [1, 0, 0, 0, 0], "metadata": {"name": "a"}},
+                         {"id": "b", "values": [0, 1, 0, 0, 0], "metadata": {"name": "b"}}],
+                        namespace="intro")
+    service.update_metadata("a", {"visibility": "private"}, namespace="intro")
+    service.sync_snapshots()
+    _, store, metadata = service.snapshots["intro"].open()
+    assert sorted(store.ids) == ["a", "b"]
+    assert metadata["a"] == {"name": "a", "visibility": "private"}
+
+    service.delete_many(["b"], namespace="intro")
+    service.update_metadata("a", {"name": "renamed"}, namespace="intro")
+    assert len(service.compact["intro"]) == 1
+    service.sync_snapshots()
+    _, store, metadata = service.snapshots["intro"].open()
+    assert store.ids == ["a"]
+    assert metadata == {"a": {"name": "renamed", "visibility": "private"}}
+    assert service.compact["intro"].search([0, 1, 0, 0], 5)[0][0] == "a"
@@ -0,0 +1,56 @@
+import numpy as np
+
+from app.vectors import VectorSnapshots, VectorStore
+
+
+def store_of(rows):
+    store = VectorStore(4)
+    store.replace(list(rows), np.asarray(list(rows.values()), dtype=np.float32))
+    return store
+
+
+def test_publish_and_open_round_trip(tmp_path):
+    snapshots = VectorSnapshots(tmp_path, "members")
+    assert snapshots.open() is None
+    version = snapshots.publish(store_of({"a": [1, 0, 0, 0], "b": [0, 1, 0, 0]}),
+                                {"a": {"visibility": "public"}})
+    opened_version, store, metadata = snapshots.open()
+    assert opened_version == version == snapshots.current()
+    assert store.ids == ["a", "b"]
+    assert not store._data.flags.writeable  # memory-mapped, shared between workers
+    assert metadata == {"a": {"visibility": "public"}, "b": {}}
+    ids, scores = store.scores([1, 0, 0, 0])
+    assert ids[int(np.argmax(scores))] == "a"
+
+
+def test_update_keeps_rows_published_by_another_worker(tmp_path):
+    mine, theirs = VectorSnapshots(tmp_path, "members"), VectorSnapshots(tmp_path, "members")
+    mine.publish(store_of({"a": [1, 0, 0, 0]}))
+    theirs.update(4, "float32", {"b": ([0, 1, 0, 0], {"name": "b"})})
+    mine.update(4, "float32", {"a": ([0, 0, 1, 0], {"name": "a"})})
+    _, store, metadata = mine.open()
+    assert sorted(store.ids) == ["a", "b"]
+    assert np.allclose(store.get("a"), [0, 0, 1, 0])
+    assert metadata["b"] == {"name": "b"}
+
+
+def test_old_versions_are_pruned(tmp_path):
+    snapshots = VectorSnapshots(tmp_path, "members")
+    for i in range(6):
+        snapshots.publish(store_of({"a": [1, i, 0, 0]}))
+    versions = [p for p in snapshots.dir.iterdir() if p.is_dir() and p.name.startswith("v")]
+    assert len(versions) == VectorSnapshots.KEEP
+    assert snapshots.current() in {p.name for p in versions}
+
+
+def test_update_deletes_and_patches_rows(tmp_path):
+    snapshots = VectorSnapshots(tmp_path, "members")
+    snapshots.publish(store_of({"a": [1, 0, 0, 0], "b": [0, 1, 0, 0]}),
+                      {"a": {"name": "a", "visibility": "public"}, "b": {"name": "b"}})
+    snapshots.update(4, "float32", {"b": None,
+                                    "a": (None, {"visibility": "private"}),
+                                    "c": (None, {"name": "never upserted"})})
+    _, store, metadata = snapshots.open()
+    assert store.ids == ["a"]
+    assert np.allclose(store.get("a"), [1, 0, 0, 0])
+    assert metadata == {"a": {"name": "a", "visibility": "private"}}
@@ -0,0 +1,74 @@
+import json
+
+from app.services import VectorWriteBuffer
+
+
+class FakeVectors:
+    index = True
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.calls = []
+
+    def upsert_many(self, items, namespace=""):
+        self.calls.append((namespace, [item["id"] for item in items]))
+        if any(item["id"] in self.failing for item in items):
+            return {"error": "boom"}
+        return {"upserted": len(items)}
+
+
+def make_buffer(tmp_path, vectors, batch_size=10):
+    return VectorWriteBuffer(vectors, tmp_path / "failed.jsonl", batch_size,
+                             flush_seconds=60, max_attempts=1)
+
+
+def test_enqueue_coalesces_by_namespace_and_id(tmp_path):
+    vectors = FakeVectors()
+    buffer = make_buffer(tmp_path, vectors)
+    buffer.enqueue("1", [0.1], {}, "intro")
+    buffer.enqueue("1", [0.2], {}, "intro")
+    buffer.enqueue("1", [0.3], {}, "interests")
+    buffer.flush()
+    assert sorted(vectors.calls) == [("interests", ["1"]), ("intro", ["1"])]
+    assert buffer.counters["coalesced"] == 1
+    assert buffer.counters["flushed"] == 2
+
+
+def test_flush_reports_only_the_callers_failures(tmp_path):
+    vectors = FakeVectors(failing={"bad"})
+    buffer = make_buffer(tmp_path, vectors, batch_size=1)
+    mine, theirs = buffer.open_batch(), buffer.open_batch()
+    buffer.enqueue("ok", [0.1], {}, "intro", batch=mine)
+    buffer.enqueue("bad", [0.1], {}, "intro", batch=theirs)
+    assert buffer.flush(batch=mine)["failed"] == []
+    failed = buffer.flush(batch=theirs)["failed"]
+    assert [(f["namespace"], f["id"]) for f in failed] == [("intro", "bad")]
+    # Once reported, a batch's failures are not reported again.
+    assert buffer.flush(batch=theirs)["failed"] == []
+    assert buffer.flush()["failed"] == []
+
+
+def test_coalesced_failure_is_reported_to_every_caller(tmp_path):
+    buffer = make_buffer(tmp_path, FakeVectors(failing={"bad"}))
+    first, second = buffer.open_batch(), buffer.open_batch()
+    buffer.enqueue("bad", [0.1], {}, "intro", batch=first)
+    buffer.enqueue("bad", [0.2], {}, "intro", batch=second)
+    assert len(buffer.flush(batch=first)["failed"]) == 1
+    assert len(buffer.flush(batch=second)["failed"]) == 1
+
+
+def test_failed_writes_are_logged_and_replayed_on_start(tmp_path):
+    vectors = FakeVectors(failing={"bad"})
+    buffer = make_buffer(tmp_path, vectors)
+    buffer.enqueue("bad", [0.1], {"name": "a"}, "intro")
+    buffer.flush()
+    rows = [json.loads(line) for line in (tmp_path / "failed.jsonl").read_text().splitlines()]
+    assert [(r["namespace"], r["id"], r["metadata"]) for r in rows] == [
+        ("intro", "bad", {"name": "a"})]
+
+    vectors.failing.clear()
+    restarted = make_buffer(tmp_path, vectors)
+    assert restarted.start() == {"replayed": 1, "failed_again": 0}
+    assert vectors.calls[-1] == ("intro", ["bad"])
+    assert not (tmp_path / "failed.jsonl").exists()
+    restarted.close()
@@ -6,6 +6,7 @@ import {
   useLocation,
   useNavigate,
 } from "react-router-dom";
+import { postEventStream } from "./sse";
 import ForceGraph2D from "react-force-graph-2d";
 import "./App.css";
 import IntroPage from "./pages/IntroPage";
@@ -553,9 +554,23 @@ function App() {
         headers: authHeaders,
       });
       const data = await res.json();
-      if (!res.ok) throw new Error(data.detail || "실패");
+      if (!res.ok) throw new Error(data.detail?.reason || data.detail || "실패");
+      let job = data.job;
+      while (["queued", "running"].includes(job.state)) {
+        setReembedStatus(
+          `임베딩 갱신 중... ${job.cursor}/${job.total}명 (자기소개 ${job.counts.intro}개, 관심사 ${job.counts.interests}개)`,
+        );
+        await new Promise((resolve) => setTimeout(resolve, 2000));
+        const poll = await fetch(`${API_BASE}/admin/reembed-jobs/${job.id}`, {
+          headers: authHeaders,
+        });
+        const polled = await poll.json();
+        if (!poll.ok) throw new Error(polled.detail || "실패");
+        job = polled.job;
+      }
+      if (job.state !== "completed") throw new Error(job.error || job.state);
       setReembedStatus(
-        `완료! 총 ${data.stats.total}명 중 자기소개 ${data.stats.intro_success}개, 관심사 ${data.stats.interests_success}개 임베딩됨`,
+        `완료! 총 ${job.total}명 중 자기소개 ${job.counts.intro}개, 관심사 ${job.counts.interests}개 임베딩됨`,
       );
     } catch (err) {
       setReembedStatus(`오류: ${err.message}`);
@@ -573,7 +588,7 @@ function App() {
       const data = await res.json();
       if (!res.ok) throw new Error(data.detail || "실패");
       setJobEmbedStatus(
-        `완료! 총 ${data.total_jobs}개 중 ${data.embedded_count}개 직업 스토리 임베딩됨`,
+        `완료! 총 ${data.total_jobs}개 중 ${data.embedded_count}개 직업 스토리 임베딩됨 (변경 없음 ${data.unchanged}개, 삭제 ${data.deleted}개)`,
       );
     } catch (err) {
       setJobEmbedStatus(`오류: ${err.message}`);
@@ -881,21 +896,32 @@ function App() {
     if (!session?.session_token) return;
     setRoleLoading(true);
     try {
-      const res = await fetch(`${API_BASE}/role-assignment`, {
-        method: "POST",
-        headers: authHeaders,
-        body: JSON.stringify({
-          name: profile.name,
-          tagline: profile.tagline,
-          intro: profile.intro,
-          interests: profile.interests,
-          strengths: profile.strengths,
-        }),
-      });
-      const data = await res.json();
-      if (!res.ok) throw new Error(data.detail || "역할 배정 실패");
-      setRoleResult(data);
-      setShowRoleModal(true);
+      let reasoning = "";
+      await postEventStream(
+        `${API_BASE}/role-assignment/stream`,
+        {
+          headers: authHeaders,
+          body: {
+            name: profile.name,
+            tagline: profile.tagline,
+            intro: profile.intro,
+            interests: profile.interests,
+            strengths: profile.strengths,
+          },
+        },
+        (event, data) => {
+          if (event === "role") {
+            setRoleResult({ ...data, reasoning: "" });
+            setShowRoleModal(true);
+            setRoleLoading(false);
+          } else if (event === "token") {
+            reasoning += data.text;
+            setRoleResult((prev) => ({ ...prev, reasoning }));
+          } else if (event === "done") {
+            setRoleResult(data);
+          }
+        },
+      );
     } catch (err) {
       setStatus(`역할 확인 오류: ${err.message}`);
     } finally {
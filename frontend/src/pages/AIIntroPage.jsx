@@ -129,14 +129,14 @@ function AIIntroPage({ session, onIntroGenerated }) {
     }
   };
 
-  const generateIntro = async () => {
+  const generateIntro = async (regenerate = false) => {
     if (!session?.session_token) return;
 
     setGenerating(true);
     setError("");
 
     try {
-      const res = await fetch(`${API_BASE}/generate-intro-from-yesorno`, {
+      const res = await fetch(`${API_BASE}/generate-intro-from-yesorno${regenerate ? "?regenerate=true" : ""}`, {
         method: "POST",
         headers: {
           Authorization: `Bearer ${session.session_token}`,
@@ -266,7 +266,7 @@ function AIIntroPage({ session, onIntroGenerated }) {
               </button>
               <button
                 className="primary"
-                onClick={generateIntro}
+                onClick={() => generateIntro()}
                 disabled={generating}
               >
                 {generating
@@ -326,7 +326,7 @@ function AIIntroPage({ session, onIntroGenerated }) {
             <div className="button-row">
               <button
                 className="secondary"
-                onClick={generateIntro}
+                onClick={() => generateIntro(true)}
                 disabled={generating}
               >
                 {generating ? "생성 중..." : "다시 생성"}
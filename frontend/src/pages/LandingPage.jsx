@@ -79,6 +79,27 @@ export default function LandingPage({ session, onLogin, onShare, onCreateConvers
     fetchData();
   }, [isLoggedIn, session?.session_token]);
 
+  useEffect(() => {
+    if (typeof EventSource === "undefined") return undefined;
+    const source = new EventSource(`${API_BASE}/profiles/count/stream`);
+    source.onmessage = (event) => {
+      try {
+        const data = JSON.parse(event.data);
+        if (typeof data.count === "number") {
+          setProfileCount(data.count);
+        }
+      } catch (err) {
+        console.error("Failed to parse count event:", err);
+      }
+    };
+    // The server ends the stream with an `error` event when it fails; keep the
+    // last count and let EventSource reconnect on its own.
+    source.addEventListener("error", (event) => {
+      if (event.data) console.error("Count stream error:", event.data);
+    });
+    return () => source.close();
+  }, []);
+
   const togglePick = async (targetKakaoId) => {
     if (!isLoggedIn || pickLoading) return;
     setPickLoading(true);
@@ -137,6 +158,28 @@ export default function LandingPage({ session, onLogin, onShare, onCreateConvers
     }
   };
 
+  const searchInterest = async (term) => {
+    setSearchQuery(term);
+    setSearchType("interests");
+    setSearchLoading(true);
+    try {
+      const res = await fetch(
+        `${API_BASE}/interests/search?term=${encodeURIComponent(term)}&limit=20`,
+      );
+      const data = await res.json();
+      if (res.ok) {
+        setSearchResults(data.profiles || []);
+      } else {
+        alert(data.detail || "검색에 실패했습니다.");
+      }
+    } catch (err) {
+      console.error("Interest search failed:", err);
+      alert("검색 중 오류가 발생했습니다.");
+    } finally {
+      setSearchLoading(false);
+    }
+  };
+
   const clearSearch = () => {
     setSearchResults(null);
     setSearchQuery("");
@@ -338,7 +381,11 @@ export default function LandingPage({ session, onLogin, onShare, onCreateConvers
                   {profile.interests?.length > 0 && (
                     <div className="search-result-interests">
                       {profile.interests.slice(0, 5).map((interest, idx) => (
-                        <span key={idx} className="interest-chip-small">
+                        <span
+                          key={idx}
+                          className="interest-chip-small clickable"
+                          onClick={() => searchInterest(interest)}
+                        >
                           {interest}
                         </span>
                       ))}
@@ -418,7 +465,14 @@ export default function LandingPage({ session, onLogin, onShare, onCreateConvers
               {currentProfile?.interests?.length > 0 && (
                 <div className="card-chips">
                   {currentProfile.interests.map((interest, idx) => (
-                    <span key={idx} className="chip">
+                    <span
+                      key={idx}
+                      className="chip clickable"
+                      onClick={(e) => {
+                        e.stopPropagation();
+                        searchInterest(interest);
+                      }}
+                    >
                       {interest}
                     </span>
                   ))}
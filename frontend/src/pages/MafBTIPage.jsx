@@ -1,5 +1,6 @@
 import { useState } from "react";
 import { Link, useNavigate } from "react-router-dom";
+import { postEventStream } from "../sse";
 import "./MafBTIPage.css";
 
 const DEFAULT_JOB_IMAGE = "/job_images/이레귤러_시민_시민 스킨.png";
@@ -33,21 +34,28 @@ export default function MafBTIPage({ session, onLogin }) {
     setError("");
 
     try {
-      const res = await fetch("/api/mafbti", {
-        method: "POST",
-        headers: {
-          "Content-Type": "application/json",
-          Authorization: `Bearer ${session.session_token}`,
+      let reasoning = "";
+      await postEventStream(
+        "/api/mafbti/stream",
+        {
+          headers: {
+            "Content-Type": "application/json",
+            Authorization: `Bearer ${session.session_token}`,
+          },
+          body: { intro: intro.trim() },
         },
-        body: JSON.stringify({ intro: intro.trim() }),
-      });
-
-      if (!res.ok) {
-        throw new Error("서버 오류가 발생했어요");
-      }
-
-      const data = await res.json();
-      setResult(data);
+        (event, data) => {
+          if (event === "role") {
+            setResult({ ...data, reasoning: "" });
+            setLoading(false);
+          } else if (event === "token") {
+            reasoning += data.text;
+            setResult((prev) => ({ ...prev, reasoning }));
+          } else if (event === "done") {
+            setResult(data);
+          }
+        },
+      );
     } catch (err) {
       console.error(err);
       setError("분석 중 오류가 발생했어요. 다시 시도해주세요!");
@@ -1,5 +1,6 @@
 import { useState, useEffect } from "react";
 import { useNavigate, useLocation } from "react-router-dom";
+import { postEventStream } from "../sse";
 
 const API_BASE = "/api";
 
@@ -276,17 +277,23 @@ export default function OnboardingPage({ session, onComplete }) {
     setLoading(true);
     try {
       console.log("Fetching role assignment with auth:", !!session?.session_token);
-      const res = await fetch(`${API_BASE}/role-assignment`, {
-        method: "POST",
-        headers: authHeaders,
-        body: JSON.stringify(profile),
-      });
-      const data = await res.json();
-      if (!res.ok) {
-        console.error("Role assignment failed:", res.status, data);
-        throw new Error(data.detail || "역할 배정 실패");
-      }
-      setRoleResult(data);
+      let reasoning = "";
+      await postEventStream(
+        `${API_BASE}/role-assignment/stream`,
+        { headers: authHeaders, body: profile },
+        (event, data) => {
+          if (event === "role") {
+            // Reveal the role as soon as it is matched; the reasoning streams in after.
+            setRoleResult({ ...data, reasoning: "" });
+            setLoading(false);
+          } else if (event === "token") {
+            reasoning += data.text;
+            setRoleResult((prev) => ({ ...prev, reasoning }));
+          } else if (event === "done") {
+            setRoleResult(data);
+          }
+        },
+      );
     } catch (err) {
       console.error("Role assignment error:", err);
       setRoleResult({ error: err.message });